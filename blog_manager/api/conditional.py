@@ -0,0 +1,98 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def _site_param(request):
+    try:
+        return int(request.query_params.get("site"))
+    except (TypeError, ValueError):
+        return None
+
+
+def site_scope(view, request, *args, **kwargs):
+    """Version of `?site=<id>` if given, else of all sites."""
+    from blog.services.versions import site_version
+
+    return site_version(_site_param(request))
+
+
+def global_scope(view, request, *args, **kwargs):
+    from blog.services.versions import site_version
+
+    return site_version(None)
+
+
+def post_scope(view, request, *args, **kwargs):
+    """Detail of a post: version of its site (looked up by pk in one query)."""
+    from blog.services.versions import post_site_version
+
+    pk = kwargs.get(view.lookup_url_kwarg or view.lookup_field)
+    if pk is None or not str(pk).isdigit():
+        return None
+    return post_site_version(pk)
+
+
+def site_detail_scope(view, request, *args, **kwargs):
+    from blog.services.versions import site_version
+
+    pk = kwargs.get("pk")
+    if pk is None or not str(pk).isdigit():
+        return None
+    return site_version(int(pk))
+
+
+def version_etag(version, request):
+    # stessa versione ma path/query/formato diversi => rappresentazioni diverse
+    raw = f"{version.token}|{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}"
+    return quote_etag(hashlib.sha1(raw.encode("utf-8")).hexdigest()[:32])
+
+
+def conditional_get(**scopes):
+    """
+    Class decorator for read views: ETag/Last-Modified from the per-site content
+    version (blog.services.versions) and 304 before the handler runs any queryset.
+
+    `scopes` maps the handler name (list, retrieve, get) to a scope function
+    `(view, request, *args, **kwargs) -> ContentVersion | None`; None skips the
+    conditional logic (e.g. unknown pk, let the view 404).
+
+        @conditional_get(list=site_scope, retrieve=post_scope)
+        class PostViewSet(ModelViewSet): ...
+    """
+    def decorate(cls):
+        for name, scope in scopes.items():
+            setattr(cls, name, _wrap(getattr(cls, name), scope))
+        return cls
+    return decorate
+
+
+def _wrap(handler, scope):
+    def wrapped(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return handler(self, request, *args, **kwargs)
+        version = scope(self, request, *args, **kwargs)
+        if version is None:
+            return handler(self, request, *args, **kwargs)
+        # riusata da api.response_cache.cached_read senza una seconda lookup
+        request._content_version = version
+
+        etag = version_etag(version, request)
+        # HTTP-date ha risoluzione al secondo
+        last_modified = int(version.last_modified.timestamp()) if version.last_modified else None
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        resp = handler(self, request, *args, **kwargs)
+        if 200 <= resp.status_code < 300:
+            resp.headers.setdefault("ETag", etag)
+            if last_modified is not None:
+                resp.headers.setdefault("Last-Modified", http_date(last_modified))
+        return resp
+
+    wrapped.__name__ = handler.__name__
+    wrapped.__doc__ = handler.__doc__
+    wrapped.__wrapped__ = handler
+    return wrapped
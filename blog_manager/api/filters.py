@@ -1,13 +1,36 @@
+import django_filters
 from django.core.exceptions import FieldError
 from rest_framework.exceptions import ValidationError
-from rest_framework.filters import OrderingFilter
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from blog.models import Post
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    `?search=` sul backend full-text configurato (FTS5 / MySQL FULLTEXT / fallback LIKE,
+    vedi blog.services.search). Il queryset esce annotato con `search_rank` e,
+    con FTS5, `search_snippet`.
+    """
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+        if not query:
+            return queryset
+        from blog.services.search import search_posts
+
+        request._search_ranked = True
+        return search_posts(queryset, query)
+
 
 class SafeOrderingFilter(OrderingFilter):
     """
     Evita 500 su ordering non valido restituendo 400 con dettaglio.
+    Con una ricerca full-text attiva e senza `?ordering=` esplicito ordina per rilevanza.
     """
     def filter_queryset(self, request, queryset, view):
         ordering = self.get_ordering(request, queryset, view)
+        if getattr(request, "_search_ranked", False) and not request.query_params.get(self.ordering_param):
+            ordering = ["-search_rank", *(ordering or [])]
         if ordering:
             try:
                 return queryset.order_by(*ordering)
@@ -15,3 +38,16 @@ class SafeOrderingFilter(OrderingFilter):
                 # Es.: "Cannot resolve keyword 'foo' into field"
                 raise ValidationError({"ordering": str(exc)})
         return queryset
+
+
+class PostFilter(django_filters.FilterSet):
+    """
+    Filtri Post: `site`, `status` e cluster/subcluster sulle colonne indicizzate
+    persistite dal front-matter (`?cluster=django&subcluster=forms`).
+    """
+    cluster = django_filters.CharFilter(field_name="cluster_slug")
+    subcluster = django_filters.CharFilter(field_name="subcluster_slug")
+
+    class Meta:
+        model = Post
+        fields = ["site", "status", "cluster", "subcluster"]
@@ -0,0 +1,121 @@
+import base64
+from datetime import datetime
+from functools import partial
+
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class _KnownCountPaginator(DjangoPaginator):
+    """Paginator che usa un conteggio già noto (cache/stima) invece di COUNT(*)."""
+    def __init__(self, object_list, per_page, known_count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if known_count is not None:
+            self.count = known_count
+
+
+class PostPagination(PageNumberPagination):
+    """
+    Paginazione dei post.
+
+    - default: page-number (`?page=`); per le liste non filtrate il totale viene
+      da blog.services.counts (cache/stima) invece di un COUNT(*) per pagina.
+    - opt-in: `?cursor=` (vuoto per la prima pagina) attiva la paginazione a
+      cursore su (published_at, id), nessun OFFSET né COUNT. Solo in avanti
+      (`next`), pensata per lo scroll infinito; l'ordine è sempre quello di
+      default (-published_at, -id), quindi `?ordering=` diversi sono rifiutati.
+    """
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    cursor_ordering = ("-published_at", "-id")
+
+    cursor_mode = False
+    known_count = None
+
+    @property
+    def django_paginator_class(self):
+        return partial(_KnownCountPaginator, known_count=self.known_count)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if self.cursor_mode:
+            return self.paginate_cursor(queryset, request, view)
+        self.known_count = None
+        if not queryset.query.where and not queryset.query.distinct:
+            from blog.services.counts import cached_post_count
+            self.known_count = cached_post_count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({"next": self.next_link, "previous": None, "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema["required"] = ["results"]
+        return schema
+
+    def get_schema_operation_parameters(self, view):
+        params = super().get_schema_operation_parameters(view)
+        params.append({
+            "name": self.cursor_query_param,
+            "required": False,
+            "in": "query",
+            "description": "Opt-in cursor pagination on (published_at, id); empty value for the first page.",
+            "schema": {"type": "string"},
+        })
+        return params
+
+    # --- cursor -----------------------------------------------------------
+
+    @staticmethod
+    def encode_cursor(published_at, pk):
+        raw = f"{published_at.isoformat() if published_at else ''}|{pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(token):
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+            stamp, pk = raw.rsplit("|", 1)
+            return (datetime.fromisoformat(stamp) if stamp else None), int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound("Invalid cursor")
+
+    def paginate_cursor(self, queryset, request, view=None):
+        ordering = request.query_params.get("ordering")
+        if ordering and tuple(f.strip() for f in ordering.split(",")) not in (self.cursor_ordering, self.cursor_ordering[:1]):
+            raise ValidationError({"ordering": "cursor pagination only supports -published_at ordering"})
+
+        page_size = self.get_page_size(request)
+        # DESC su SQLite e MySQL mette già i NULL (bozze senza data) in fondo: niente NULLS LAST emulato
+        queryset = queryset.order_by(*self.cursor_ordering)
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            published_at, pk = self.decode_cursor(token)
+            if published_at is None:
+                queryset = queryset.filter(published_at__isnull=True, id__lt=pk)
+            else:
+                queryset = queryset.filter(
+                    Q(published_at__lt=published_at)
+                    | Q(published_at=published_at, id__lt=pk)
+                    | Q(published_at__isnull=True)
+                )
+
+        rows = list(queryset[:page_size + 1])
+        self.request = request
+        self.next_link = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            url = remove_query_param(request.build_absolute_uri(), self.page_query_param)
+            self.next_link = replace_query_param(
+                url, self.cursor_query_param, self.encode_cursor(last.published_at, last.pk)
+            )
+        return rows
@@ -0,0 +1,12 @@
+from rest_framework.renderers import JSONRenderer
+
+
+class NDJSONRenderer(JSONRenderer):
+    """Newline-delimited JSON: lets `Accept: application/x-ndjson` pass content
+    negotiation on streaming endpoints; error bodies are rendered as one line."""
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        body = super().render(data, accepted_media_type, renderer_context)
+        return body + b"\n" if body else body
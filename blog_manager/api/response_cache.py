@@ -0,0 +1,122 @@
+"""
+Read-through cache of anonymous GET responses (serialized data, before rendering).
+
+Keys combine the site content version (blog.services.versions), the full
+path and the Accept header, so every post/category write -- which bumps the
+version from the model signals -- invalidates the affected entries at once;
+stale keys simply expire after BLOG_RESPONSE_CACHE_TTL.
+
+The backend is the `blog_responses` cache alias (settings BLOG_RESPONSE_CACHE:
+locmem, file, db or off). Hits and misses are counted in the same cache and
+reported by `manage.py response_cache --stats`.
+"""
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = "blog_responses"
+HITS_KEY = "stats:hits"
+MISSES_KEY = "stats:misses"
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def enabled():
+    if getattr(settings, "BLOG_RESPONSE_CACHE", "locmem") == "off":
+        return False
+    try:
+        return not isinstance(get_cache(), DummyCache)
+    except Exception:
+        return False
+
+
+def _count(key):
+    c = get_cache()
+    try:
+        c.incr(key)
+    except ValueError:
+        # chiave assente (prima volta o scaduta): add evita di azzerare un incr concorrente
+        if not c.add(key, 1, timeout=None):
+            c.incr(key)
+    except Exception as e:
+        logger.debug("response cache stats unavailable: %s", e)
+
+
+def stats():
+    c = get_cache()
+    hits = c.get(HITS_KEY) or 0
+    misses = c.get(MISSES_KEY) or 0
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "hit_rate": (hits / total) if total else 0.0}
+
+
+def reset_stats():
+    get_cache().delete_many([HITS_KEY, MISSES_KEY])
+
+
+def cache_key(version, request):
+    raw = f"{version.token}|{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}"
+    return "resp:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def cached_read(*handlers):
+    """
+    Class decorator: cache the response data of `handlers` (e.g. "list",
+    "retrieve") for anonymous GETs. Must sit *below* @conditional_get, which
+    performs the version lookup and leaves it on the request.
+
+        @conditional_get(list=site_scope, retrieve=post_scope)
+        @cached_read("list", "retrieve")
+        class PostViewSet(ModelViewSet): ...
+    """
+    def decorate(cls):
+        for name in handlers:
+            setattr(cls, name, _wrap(getattr(cls, name)))
+        return cls
+    return decorate
+
+
+def _wrap(handler):
+    def wrapped(self, request, *args, **kwargs):
+        version = getattr(request, "_content_version", None)
+        user = getattr(request, "user", None)
+        if (
+            version is None
+            or request.method != "GET"
+            or (user is not None and user.is_authenticated)
+            or not enabled()
+        ):
+            return handler(self, request, *args, **kwargs)
+
+        c = get_cache()
+        key = cache_key(version, request)
+        hit = c.get(key)
+        if hit is not None:
+            _count(HITS_KEY)
+            status_code, data = hit
+            resp = Response(data, status=status_code)
+            resp["X-Cache"] = "HIT"
+            return resp
+
+        _count(MISSES_KEY)
+        resp = handler(self, request, *args, **kwargs)
+        if resp.status_code == 200 and getattr(resp, "data", None) is not None:
+            try:
+                c.set(key, (resp.status_code, resp.data), getattr(settings, "BLOG_RESPONSE_CACHE_TTL", 600))
+            except Exception as e:
+                logger.warning("response cache set failed: %s", e)
+        resp["X-Cache"] = "MISS"
+        return resp
+
+    wrapped.__name__ = handler.__name__
+    wrapped.__doc__ = handler.__doc__
+    wrapped.__wrapped__ = handler
+    return wrapped
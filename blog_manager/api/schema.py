@@ -0,0 +1,205 @@
+"""
+Precomputed OpenAPI schema served at /api/schema/ (drf-spectacular introspects
+every view and serializer, seconds on a cold worker: not per request).
+
+The schema is generated once per code version, at deploy time by
+`manage.py build_schema` (files in BLOG_SCHEMA_DIR) or lazily by the first
+request of a worker, then kept in memory with its gzip variants. Every
+artifact carries the hash of its content (the ETag) and the fingerprint of
+the source it was generated from: an artifact on disk whose fingerprint
+doesn't match the running code is regenerated, never served.
+
+`manage.py build_schema --check --file schema.yaml` fails when the committed
+schema (or the built artifact) no longer matches the code: run it in CI.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from importlib import import_module
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+from django.views import View
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    "yaml": ("openapi.yaml", "application/vnd.oai.openapi; charset=utf-8"),
+    "json": ("openapi.json", "application/vnd.oai.openapi+json; charset=utf-8"),
+}
+MANIFEST = "manifest.json"
+_SKIP_DIRS = {"tests", "migrations", "__pycache__", "jekyll-test", "node_modules", ".venv", "venv"}
+
+_lock = threading.Lock()
+_current = None
+
+
+def schema_dir():
+    return Path(getattr(settings, "BLOG_SCHEMA_DIR", "") or Path(settings.BASE_DIR) / "var" / "openapi")
+
+
+def source_fingerprint():
+    """Hash of the project sources and of the settings/libraries the schema depends on."""
+    import drf_spectacular
+    import rest_framework
+
+    root = Path(import_module(settings.ROOT_URLCONF).__file__).resolve().parent
+    h = hashlib.sha256()
+    h.update(f"{drf_spectacular.__version__}|{rest_framework.VERSION}|".encode())
+    h.update(repr(sorted(getattr(settings, "SPECTACULAR_SETTINGS", {}).items())).encode())
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in _SKIP_DIRS)
+        for name in sorted(filenames):
+            if name.endswith(".py"):
+                path = Path(dirpath) / name
+                h.update(str(path.relative_to(root)).encode())
+                h.update(path.read_bytes())
+    return h.hexdigest()[:16]
+
+
+class SchemaArtifact:
+    """Rendered schema: bodies per (format, gzip) plus content hash and source fingerprint."""
+    __slots__ = ("hash", "fingerprint", "bodies")
+
+    def __init__(self, hash, fingerprint, bodies):
+        self.hash = hash
+        self.fingerprint = fingerprint
+        self.bodies = bodies
+
+    @classmethod
+    def from_rendered(cls, fingerprint, rendered):
+        bodies = {}
+        for fmt, body in rendered.items():
+            bodies[(fmt, False)] = body
+            bodies[(fmt, True)] = gzip.compress(body, mtime=0)
+        return cls(hashlib.sha256(rendered["json"]).hexdigest()[:16], fingerprint, bodies)
+
+    def etag(self, fmt, gz=False):
+        return quote_etag(f"{self.hash}-{fmt}{'-gzip' if gz else ''}")
+
+
+def render_schema():
+    """Run drf-spectacular once; returns {"yaml": bytes, "json": bytes} (same bytes as `manage.py spectacular`)."""
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS(urlconf=None, api_version=None)
+    schema = generator.get_schema(request=None, public=True)
+    return {
+        "yaml": OpenApiYamlRenderer().render(schema, renderer_context={}),
+        "json": OpenApiJsonRenderer().render(schema, renderer_context={}),
+    }
+
+
+def build(fingerprint=None):
+    return SchemaArtifact.from_rendered(fingerprint or source_fingerprint(), render_schema())
+
+
+def _write(path, data):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def save(artifact, directory=None):
+    """Write the bodies and, last, the manifest (a reader never sees a half-written artifact)."""
+    directory = Path(directory or schema_dir())
+    directory.mkdir(parents=True, exist_ok=True)
+    for fmt, (name, _ctype) in FORMATS.items():
+        _write(directory / name, artifact.bodies[(fmt, False)])
+        _write(directory / f"{name}.gz", artifact.bodies[(fmt, True)])
+    manifest = {"hash": artifact.hash, "fingerprint": artifact.fingerprint, "files": [n for n, _c in FORMATS.values()]}
+    _write(directory / MANIFEST, json.dumps(manifest, indent=2).encode("utf-8"))
+    return directory
+
+
+def read_manifest(directory=None):
+    try:
+        return json.loads((Path(directory or schema_dir()) / MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def load(fingerprint, directory=None):
+    """Artifact from disk if it was built from the running code, else None."""
+    directory = Path(directory or schema_dir())
+    manifest = read_manifest(directory)
+    if not manifest:
+        return None
+    if manifest.get("fingerprint") != fingerprint:
+        logger.info("OpenAPI schema on disk is stale (built from %s, code is %s)", manifest.get("fingerprint"), fingerprint)
+        return None
+    try:
+        bodies = {}
+        for fmt, (name, _ctype) in FORMATS.items():
+            bodies[(fmt, False)] = (directory / name).read_bytes()
+            bodies[(fmt, True)] = (directory / f"{name}.gz").read_bytes()
+    except OSError as e:
+        logger.warning("OpenAPI schema files unreadable in %s: %s", directory, e)
+        return None
+    return SchemaArtifact(manifest["hash"], fingerprint, bodies)
+
+
+def get_artifact():
+    """Schema of this process: memory, else disk (same fingerprint), else generated once."""
+    global _current
+    if _current is not None:
+        return _current
+    with _lock:
+        if _current is None:
+            fingerprint = source_fingerprint()
+            artifact = load(fingerprint)
+            if artifact is None:
+                artifact = build(fingerprint)
+                try:
+                    save(artifact)
+                except OSError as e:
+                    logger.warning("Cannot store OpenAPI schema in %s: %s", schema_dir(), e)
+            _current = artifact
+    return _current
+
+
+def reset():
+    """Forget the in-memory schema (tests, `build_schema`)."""
+    global _current
+    with _lock:
+        _current = None
+
+
+def _negotiate(request):
+    fmt = request.GET.get("format", "")
+    if fmt in ("json", "openapi-json"):
+        return "json"
+    if fmt in ("yaml", "openapi"):
+        return "yaml"
+    accept = request.META.get("HTTP_ACCEPT", "")
+    return "json" if "json" in accept and "yaml" not in accept else "yaml"
+
+
+class CachedSchemaView(View):
+    """GET /api/schema/ — YAML by default, JSON with ?format=json or Accept: *json."""
+
+    def get(self, request, *args, **kwargs):
+        artifact = get_artifact()
+        fmt = _negotiate(request)
+        gz = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+        etag = artifact.etag(fmt, gz)
+
+        # stessa rappresentazione con o senza gzip: un ETag vale per entrambe le varianti
+        if_none_match = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+        if "*" in if_none_match or {etag, artifact.etag(fmt, not gz)} & {t.removeprefix("W/") for t in if_none_match}:
+            resp = HttpResponseNotModified()
+        else:
+            resp = HttpResponse(artifact.bodies[(fmt, gz)], content_type=FORMATS[fmt][1])
+            if gz:
+                resp["Content-Encoding"] = "gzip"
+            resp["Content-Disposition"] = f'inline; filename="{FORMATS[fmt][0]}"'
+        resp["ETag"] = etag
+        resp["Cache-Control"] = "public, no-cache"
+        resp["Vary"] = "Accept, Accept-Encoding"
+        return resp
@@ -10,21 +10,21 @@ from django.utils import timezone
 logger = logging.getLogger(__name__)
 
 from .models import Author, Category, Comment, Post, PostImage, Site, ExportAudit
-import re
 from django import forms
 from django.shortcuts import render, redirect
 from django.urls import path
 from django.utils.safestring import mark_safe
-from .services.github_ops import delete_post_from_repo
+from .services.github_ops import delete_posts_from_repo
 from .utils import create_categories_from_frontmatter
 
 
 @admin.register(Site)
 class SiteAdmin(admin.ModelAdmin):
-    list_display = ("id", "name")
-    readonly_fields = ("repo_candidate",)
+    list_display = ("id", "name", "provision_state")
+    list_filter = ("provision_status",)
+    readonly_fields = ("repo_candidate", "provision_status", "provision_progress", "provision_message", "provisioned_at")
     search_fields = ("name",)
-    actions = ["run_migrations"]
+    actions = ["run_migrations", "reprovision"]
     change_form_template = "admin/blog/site_change_form.html"
     fieldsets = (
         (None, {"fields": ("name", "domain")}),
@@ -43,8 +43,34 @@ class SiteAdmin(admin.ModelAdmin):
                 "classes": ("collapse",),
             },
         ),
+        (
+            "Provisioning",
+            {"fields": ("provision_status", "provision_progress", "provision_message", "provisioned_at")},
+        ),
     )
 
+    def provision_state(self, obj: Site) -> str:
+        """Provisioning status for the changelist, with progress while cloning."""
+        if obj.provision_status == Site.PROVISION_CLONING:
+            return f"cloning {obj.provision_progress}%"
+        return obj.provision_status
+
+    provision_state.short_description = "Provisioning"
+
+    def reprovision(self, request, queryset):
+        """Put the selected sites back to pending and start the provisioning worker."""
+        from .services.provisioning import schedule_provisioning
+
+        ids = list(queryset.exclude(provision_status=Site.PROVISION_CLONING).values_list("id", flat=True))
+        Site.objects.filter(pk__in=ids).update(
+            provision_status=Site.PROVISION_PENDING, provision_progress=0, provision_message=""
+        )
+        for site_id in ids:
+            schedule_provisioning(site_id)
+        self.message_user(request, f"Provisioning programmato per {len(ids)} siti.")
+
+    reprovision.short_description = "Re-provision working copy (clone/init)"
+
     def repo_candidate(self, obj: Site) -> str:
         """Return the full candidate repo path shown in admin (either repo_path or BLOG_REPO_BASE/<slug>)."""
         if obj.repo_path and str(obj.repo_path).strip():
@@ -103,9 +129,26 @@ class SiteAdmin(admin.ModelAdmin):
         custom = [
             path('<path:object_id>/run_sync/', self.admin_site.admin_view(self.run_sync_view), name='blog_site_run_sync'),
             path('<path:object_id>/run_sync/tail/', self.admin_site.admin_view(self.tail_sync_log), name='blog_site_run_sync_tail'),
+            path('<path:object_id>/provision/status/', self.admin_site.admin_view(self.provision_status_view), name='blog_site_provision_status'),
         ]
         return custom + urls
 
+    def provision_status_view(self, request, object_id):
+        """JSON polled by the change form while the working copy is being provisioned."""
+        from django.http import JsonResponse
+
+        row = Site.objects.filter(pk=object_id).values(
+            "provision_status", "provision_progress", "provision_message", "provisioned_at"
+        ).first()
+        if row is None:
+            return JsonResponse({"status": "missing"}, status=404)
+        return JsonResponse({
+            "status": row["provision_status"],
+            "progress": row["provision_progress"],
+            "message": row["provision_message"],
+            "provisioned_at": row["provisioned_at"].isoformat() if row["provisioned_at"] else None,
+        })
+
     def run_sync_view(self, request, object_id):
         from django.shortcuts import render
         from django.core.management import call_command
@@ -362,10 +405,13 @@ class PostAdmin(admin.ModelAdmin):
     publish_posts.short_description = "Publish selected posts"
 
     def refresh_posts(self, request, queryset):
-        """Admin action to refresh selected posts: compare DB content with repo content and record drift or ok."""
+        """Admin action to refresh selected posts: compare DB content with repo content and record drift or ok.
+
+        Uses one recursive tree listing per repo and compares git blob shas; files are downloaded
+        only when they differ (to show a diff). Results are stored as bulk ExportJob rows.
+        """
         from .github_client import GitHubClient
-        from .utils import content_hash
-        from .models import ExportJob
+        from .services.drift import detect_drift
 
         gh = None
         try:
@@ -374,92 +420,31 @@ class PostAdmin(admin.ModelAdmin):
             self.message_user(request, "GitHub client initialization failed (missing token?)", level=messages.ERROR)
             return
 
+        results = detect_drift(list(queryset.select_related("site")), client=gh)
+
         oks = 0
         drifts = 0
-        for p in queryset.select_related("site"):
-            logger.debug("refresh_posts: checking post pk=%s site=%s", getattr(p, 'pk', None), getattr(p, 'site', None))
-            owner = getattr(p.site, "repo_owner", None)
-            repo = getattr(p.site, "repo_name", None)
-            branch = getattr(p.site, "default_branch", "main")
-            path = getattr(p, "repo_path", None)
-            try:
-                file_obj = gh.get_file(owner, repo, path, branch=branch)
-                logger.debug("refresh_posts: got file_obj=%s", bool(file_obj))
-            except Exception as e:
-                logger.exception("refresh_posts: get_file failed for post pk=%s: %s", p.pk, e)
-                # Try to extract friendly message; if it's a 404-like error we'll treat as drift_absent
-                emsg = None
-                try:
-                    arg0 = e.args[0]
-                    if isinstance(arg0, dict) and "message" in arg0:
-                        emsg = arg0["message"]
-                except Exception:
-                    emsg = str(e)
-                if emsg and "404" in emsg:
-                    msg_code = "drift_absent"
-                elif emsg and ("Token mancante" in emsg or "permessi" in emsg):
-                    msg_code = "permission_denied"
-                elif emsg and ("Rate limit" in emsg or "rate limit" in emsg or "429" in emsg):
-                    msg_code = "rate_limited"
-                else:
-                    msg_code = "drift_absent"
-
-                ExportJob.objects.create(
-                    post=p,
-                    commit_sha=None,
-                    repo_url=f"https://github.com/{owner}/{repo}",
-                    branch=branch,
-                    path=path,
-                    export_status="failed",
-                    action="refresh",
-                    message=emsg or msg_code,
-                )
-                # Map to admin-visible message
-                if msg_code == "permission_denied":
-                    self.message_user(request, f"Post {p.pk} error: Token mancante o permessi insufficienti.", level=messages.ERROR)
-                elif msg_code == "rate_limited":
-                    self.message_user(request, f"Post {p.pk} rate-limited by GitHub: riprova più tardi.", level=messages.ERROR)
-                else:
-                    self.message_user(request, f"Post {p.pk} drift: file absent in repo.", level=messages.WARNING)
-                drifts += 1
-                continue
-
-            repo_content = file_obj.get("content")
-            local_hash = content_hash(p)
-            # Compute hash of repo content in same way; create a temporary Post-like object? We'll reuse content_hash by patching p.content temporarily
-            orig_content = p.content
-            try:
-                p.content = repo_content
-                repo_hash = content_hash(p)
-            finally:
-                p.content = orig_content
-
-            if repo_hash == local_hash:
-                ExportJob.objects.create(
-                    post=p,
-                    commit_sha=file_obj.get("sha"),
-                    repo_url=f"https://github.com/{owner}/{repo}",
-                    branch=branch,
-                    path=path,
-                        export_status="success",
-                        action="refresh",
-                        message="ok",
-                )
-                self.message_user(request, f"Post {p.pk} ok (no drift).", level=messages.INFO)
+        for r in results:
+            pk = r["post"].pk
+            status = r["status"]
+            if status == "ok":
                 oks += 1
+                continue
+            drifts += 1
+            # Map to admin-visible message
+            if status == "permission_denied":
+                self.message_user(request, f"Post {pk} error: Token mancante o permessi insufficienti.", level=messages.ERROR)
+            elif status == "rate_limited":
+                self.message_user(request, f"Post {pk} rate-limited by GitHub: riprova più tardi.", level=messages.ERROR)
+            elif status == "drift_absent":
+                self.message_user(request, f"Post {pk} drift: file absent in repo.", level=messages.WARNING)
+            elif status == "drift_content":
+                if r.get("diff"):
+                    self.message_user(request, format_html("Post {} drift: content differs.<pre>{}</pre>", pk, r["diff"]), level=messages.WARNING)
+                else:
+                    self.message_user(request, f"Post {pk} drift: content differs.", level=messages.WARNING)
             else:
-                ExportJob.objects.create(
-                    post=p,
-                    commit_sha=file_obj.get("sha"),
-                    repo_url=f"https://github.com/{owner}/{repo}",
-                    branch=branch,
-                    path=path,
-                        export_status="failed",
-                        action="refresh",
-                        message="drift_content",
-                )
-                self.message_user(request, f"Post {p.pk} drift: content differs.", level=messages.WARNING)
-                drifts += 1
+                self.message_user(request, f"Post {pk} error: {r.get('message') or status}", level=messages.ERROR)
 
         self.message_user(request, f"Refresh complete: {oks} ok, {drifts} drifts.", level=messages.INFO)
 
@@ -489,23 +474,24 @@ class PostAdmin(admin.ModelAdmin):
                     mode = "db"
 
                     logger.debug("posts queryset pks=%s", [p.pk for p in posts])
+                repo_results = {}
+                if mode == "repo" and allow_repo_effective:
+                    # delete all files from the repo in a single commit, then sync the local working copy once
+                    selected = list(posts)
+                    if len(selected) == 1:
+                        commit_msg = f"admin: delete post #{selected[0].pk}"
+                    else:
+                        commit_msg = f"admin: delete {len(selected)} posts (" + ", ".join(f"#{p.pk}" for p in selected) + ")"
+                    try:
+                        repo_results = delete_posts_from_repo(selected, message=commit_msg, sync_local=True)
+                        logger.debug("batch delete results = %r", repo_results)
+                    except Exception as e:
+                        repo_results = {p.pk: {"status": "error", "message": str(e)} for p in selected}
+
                 for p in posts:
                     if mode == "repo" and allow_repo_effective:
-                        # attempt to delete from repo first (and optionally sync local working copy)
-                        try:
-                            logger.debug("About to call delete_post_from_repo: %r", delete_post_from_repo)
-                            res = delete_post_from_repo(p, message=f"admin: delete post #{p.pk}", sync_local=True)
-                            logger.debug("delete result = %r", res)
-                            status = res.get("status")
-                            commit_sha = res.get("commit_sha")
-                            html_url = res.get("html_url")
-                            msg = res.get("message")
-                            local_sync_msg = res.get("local_sync_message")
-                            results.append((p.pk, "repo", status, commit_sha, html_url, msg, local_sync_msg))
-                            logger.debug("appended repo result = %r", results[-1])
-                            logger.debug("current results list = %r", results)
-                        except Exception as e:
-                            results.append((p.pk, "repo", "error", None, None, str(e), None))
+                        res = repo_results.get(p.pk) or {"status": "error", "message": "no result from batch delete"}
+                        results.append((p.pk, "repo", res.get("status"), res.get("commit_sha"), res.get("html_url"), res.get("message"), res.get("local_sync_message")))
 
                         # Only delete DB if repo deletion reported success or file already absent
                         last = results[-1]
@@ -629,52 +615,18 @@ class PostAdmin(admin.ModelAdmin):
             )
 
     def clusters_display(self, obj):
-        """Show cluster/subcluster information derived from front-matter or assigned categories."""
+        """Show cluster/subcluster information from the persisted front-matter or assigned categories."""
         try:
-            raw = obj.content or getattr(obj, 'body', '') or ''
-            m = re.search(r'^\s*---\s*\n([\s\S]*?)\n---\s*\n', raw, re.M)
+            fm = obj.frontmatter if isinstance(obj.frontmatter, dict) else {}
             clusters = []
             subclusters_map = {}
-            if m:
-                fm = m.group(1)
-                lines = [l.rstrip() for l in fm.splitlines()]
-                key = None
-                for i, line in enumerate(lines):
-                    s = line.strip()
-                    if not s:
-                        key = None
-                        continue
-                    kv = re.match(r'^([a-zA-Z0-9_\-]+):\s*(.*)$', s)
-                    if kv:
-                        key = kv.group(1)
-                        val = kv.group(2) or ''
-                        if val == '':
-                            arr = []
-                            j = i+1
-                            while j < len(lines) and re.match(r'^\s*-\s+', lines[j]):
-                                arr.append(re.sub(r'^\s*-\s+', '', lines[j]).strip())
-                                j += 1
-                            if key in ('cluster','clusters'):
-                                clusters.extend(arr)
-                            elif key in ('subcluster','subclusters'):
-                                clusters.extend(arr)
-                            elif key == 'categories':
-                                clusters.extend(arr)
-                        else:
-                            if key in ('cluster','clusters'):
-                                clusters.append(val)
-                            elif key in ('subcluster','subclusters'):
-                                clusters.append(val)
-                            elif key == 'categories':
-                                clusters.append(val)
-                    elif key and re.match(r'^\s*-\s+', line):
-                        v = re.sub(r'^\s*-\s+', '', line).strip()
-                        if key in ('cluster','clusters'):
-                            clusters.append(v)
-                        elif key in ('subcluster','subclusters'):
-                            clusters.append(v)
-                        elif key == 'categories':
-                            clusters.append(v)
+            for key, val in fm.items():
+                if key not in ('cluster', 'clusters', 'subcluster', 'subclusters', 'categories'):
+                    continue
+                if isinstance(val, (list, tuple)):
+                    clusters.extend(str(v) for v in val if v)
+                elif isinstance(val, str) and val:
+                    clusters.append(val)
 
             if not clusters:
                 try:
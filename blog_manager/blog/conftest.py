@@ -61,3 +61,64 @@ def open_read_and_control_write(monkeypatch):
             return WritePerm().has_permission(request, view)
 
     _ensure_permission_classes(monkeypatch, blog_views.PostViewSet, PostHybridPerm)
+
+
+@pytest.fixture(autouse=True)
+def reset_blog_caches():
+    """Empty the Django caches and the module-level caches of blog before and after each test.
+
+    Cached category ids, search backend probes and cached responses point at
+    rows of the test transaction: they must not outlive it.
+    """
+    from django.core.cache import caches
+
+    from blog import signals
+    from blog.services import search, snapshots
+
+    def reset():
+        caches["default"].clear()
+        caches["blog_responses"].clear()
+        signals.invalidate_category_cache()
+        search.reset_backend_cache()
+        with snapshots._queue_lock:
+            snapshots._queued.clear()
+            snapshots._running.clear()
+
+    reset()
+    yield
+    reset()
+
+
+@pytest.fixture
+def make_site(settings):
+    """Factory for a Site with one site author (repo export disabled): make_site(name, **fields) -> (site, author)."""
+    from django.utils.text import slugify
+
+    from blog.models import Site
+
+    settings.EXPORT_ENABLED = False
+
+    def make(name="BlogSite", **fields):
+        slug = slugify(name)
+        fields.setdefault("domain", f"https://{slug}.example")
+        site = Site.objects.create(name=name, **fields)
+        author = site.authors.create(name=f"{name} author", slug=f"{slug}-author")
+        return site, author
+
+    return make
+
+
+@pytest.fixture
+def blog_site(db, make_site):
+    """(site, author) for tests that need one site with content."""
+    return make_site()
+
+
+@pytest.fixture
+def admin_api_client(admin_user):
+    """DRF client authenticated as a superuser."""
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(admin_user)
+    return client
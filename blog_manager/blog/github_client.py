@@ -1,7 +1,7 @@
 import os
 from typing import Optional
 
-from github import Github, GithubException
+from github import Github, GithubException, InputGitTreeElement
 
 
 def _friendly_error(e: GithubException, context: str) -> GithubException:
@@ -101,6 +101,50 @@ class GitHubClient:
         html_url = getattr(commit, "html_url", None)
         return {"status": "deleted", "commit_sha": commit_sha, "html_url": html_url}
 
+    def delete_files(
+        self,
+        owner: str,
+        repo: str,
+        paths: list,
+        *,
+        branch: str = "main",
+        message: str = "delete files",
+    ) -> dict:
+        """
+        Delete several files on `branch` with a single commit (Git Data API).
+
+        Every path must exist in the branch tree (resolve them with `get_tree` first):
+        GitHub rejects tree deletions for entries that are not there.
+        Returns dict with `status` ("deleted"|"nothing_to_delete"), `commit_sha`, `html_url` and `paths`.
+        """
+        paths = sorted({p for p in (paths or []) if p})
+        if not paths:
+            return {"status": "nothing_to_delete", "commit_sha": None, "html_url": None, "paths": []}
+
+        r = self.gh.get_repo(f"{owner}/{repo}")
+        elements = [InputGitTreeElement(p, "100644", "blob", sha=None) for p in paths]
+        commit = None
+        # One retry if the branch moved between reading the ref and updating it
+        for attempt in range(2):
+            try:
+                ref = r.get_git_ref(f"heads/{branch}")
+                head = r.get_git_commit(ref.object.sha)
+                tree = r.create_git_tree(elements, head.tree)
+                commit = r.create_git_commit(message, tree, [head])
+                ref.edit(commit.sha)
+                break
+            except GithubException as e:
+                if attempt == 0 and getattr(e, "status", None) in (409, 422):
+                    continue
+                raise _friendly_error(e, f"GitHub delete_files error for {owner}/{repo}@{branch} ({len(paths)} paths)")
+
+        return {
+            "status": "deleted",
+            "commit_sha": getattr(commit, "sha", None),
+            "html_url": getattr(commit, "html_url", None),
+            "paths": paths,
+        }
+
     def get_file(self, owner: str, repo: str, path: str, branch: str = "main") -> dict:
         """Return the file content and metadata from repo. Raises GithubException for errors other than 404.
 
@@ -183,6 +227,35 @@ class GitHubClient:
             "message": result.message
         }
 
+    def get_tree(self, owner: str, repo: str, branch: str = "main", path: str = "") -> list:
+        """
+        List the whole tree of `branch` with a single recursive git-tree call.
+        Optionally keep only entries under `path`.
+        Returns a list of dicts: {"path": str, "type": "file"|"dir", "sha": str, "size": int|None}
+        where `sha` is the git blob sha for files.
+        """
+        r = self.gh.get_repo(f"{owner}/{repo}")
+        try:
+            tree = r.get_git_tree(branch, recursive=True)
+        except GithubException as e:
+            raise _friendly_error(e, f"Error reading tree for {owner}/{repo}@{branch}")
+
+        prefix = (path or "").strip("/")
+        results = []
+        for el in getattr(tree, "tree", None) or []:
+            p = getattr(el, "path", None)
+            if not p:
+                continue
+            if prefix and not (p == prefix or p.startswith(prefix + "/")):
+                continue
+            results.append({
+                "path": p,
+                "type": "dir" if getattr(el, "type", None) == "tree" else "file",
+                "sha": getattr(el, "sha", None),
+                "size": getattr(el, "size", None),
+            })
+        return results
+
     def list_files(self, owner: str, repo: str, path: str = "", branch: str = "main") -> list:
         """
         List repository files under `path` at `branch` recursively.
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from blog.models import Post, Site
+from blog.services.versions import bump_site_versions
+from blog.utils import frontmatter_fields
+
+
+class Command(BaseCommand):
+    help = "Backfill Post.frontmatter / cluster_slug / subcluster_slug from the content front-matter"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--site", type=str, help="Site slug to process (optional)")
+        parser.add_argument("--batch-size", type=int, default=500, help="Rows per bulk update (default: 500)")
+        parser.add_argument("--dry-run", action="store_true", help="Do not write changes")
+
+    def handle(self, *args, **options):
+        dry_run = options.get("dry_run", False)
+        batch_size = max(1, options.get("batch_size") or 500)
+        qs = Post.objects.only("id", "content", "frontmatter", "cluster_slug", "subcluster_slug").order_by("id")
+        site_id = None
+        if options.get("site"):
+            try:
+                site_id = Site.objects.get(slug=options["site"]).pk
+                qs = qs.filter(site_id=site_id)
+            except Site.DoesNotExist:
+                self.stderr.write(self.style.ERROR(f"Site with slug '{options['site']}' not found"))
+                return
+
+        scanned = updated = 0
+        pending = []
+        for p in qs.iterator(chunk_size=batch_size):
+            scanned += 1
+            fm, cluster, sub = frontmatter_fields(p.content)
+            if (p.frontmatter, p.cluster_slug, p.subcluster_slug) == (fm, cluster, sub):
+                continue
+            p.frontmatter, p.cluster_slug, p.subcluster_slug = fm, cluster, sub
+            pending.append(p)
+            updated += 1
+            if len(pending) >= batch_size:
+                if not dry_run:
+                    Post.objects.bulk_update(pending, ["frontmatter", "cluster_slug", "subcluster_slug"])
+                pending = []
+        if pending and not dry_run:
+            Post.objects.bulk_update(pending, ["frontmatter", "cluster_slug", "subcluster_slug"])
+        if updated and not dry_run:
+            bump_site_versions(None if site_id is None else [site_id])
+
+        self.stdout.write(self.style.SUCCESS(f"Scanned {scanned} posts, updated {updated} (dry_run={dry_run})"))
@@ -0,0 +1,61 @@
+"""
+Build the precomputed OpenAPI schema served at /api/schema/ (api.schema).
+
+Run it at deploy time so no worker pays for drf-spectacular introspection;
+--check (for CI) exits with an error when the built artifact or the committed
+schema file no longer matches what the code generates.
+
+Usage:
+    python manage.py build_schema                        # write BLOG_SCHEMA_DIR
+    python manage.py build_schema --file schema.yaml     # also refresh the committed YAML
+    python manage.py build_schema --check --file schema.yaml
+"""
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import schema
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema once (content-hashed, gzip variants) or check it is up to date"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", type=str, default=None, help="Output directory (default: BLOG_SCHEMA_DIR)")
+        parser.add_argument("--file", type=str, default=None, help="Committed YAML schema to write or check")
+        parser.add_argument("--check", action="store_true", help="Fail if the built artifact or --file is stale")
+
+    def handle(self, *args, **options):
+        directory = Path(options["dir"] or schema.schema_dir())
+        artifact = schema.build()
+        yaml_body = artifact.bodies[("yaml", False)]
+
+        if options["check"]:
+            stale = []
+            manifest = schema.read_manifest(directory)
+            if options["file"]:
+                try:
+                    if Path(options["file"]).read_bytes() != yaml_body:
+                        stale.append(options["file"])
+                except OSError as e:
+                    raise CommandError(f"Cannot read {options['file']}: {e}")
+            elif manifest is None:
+                raise CommandError(f"No built schema in {directory} (run build_schema)")
+            if manifest is not None and manifest.get("hash") != artifact.hash:
+                stale.append(str(directory))
+            if stale:
+                raise CommandError(
+                    f"OpenAPI schema is stale: {', '.join(stale)} (regenerate with build_schema --file ...)"
+                )
+            self.stdout.write(self.style.SUCCESS(f"OpenAPI schema up to date (hash {artifact.hash})"))
+            return
+
+        schema.save(artifact, directory)
+        if options["file"]:
+            Path(options["file"]).write_bytes(yaml_body)
+        schema.reset()
+        self.stdout.write(self.style.SUCCESS(
+            f"OpenAPI schema {artifact.hash} (code {artifact.fingerprint}) -> {directory}"
+            + (f", {options['file']}" if options["file"] else "")
+        ))
@@ -0,0 +1,44 @@
+"""
+Build the static JSON snapshots of one or all sites (blog.services.snapshots).
+
+Usage:
+    python manage.py build_snapshots                   # every site, only changed artifacts
+    python manage.py build_snapshots --site my-blog --artifact posts
+    python manage.py build_snapshots --force           # rewrite even if unchanged
+"""
+
+from django.core.management.base import BaseCommand
+
+from blog.models import Site
+from blog.services import snapshots
+
+
+class Command(BaseCommand):
+    help = "Write posts/taxonomy/authors JSON snapshots (gzip/brotli, content-hashed, manifest) for each site"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--site", type=str, help="Site slug to process (optional)")
+        parser.add_argument("--artifact", action="append", choices=snapshots.ARTIFACTS,
+                            help="Artifact to rebuild (repeatable; default: all)")
+        parser.add_argument("--force", action="store_true", help="Rewrite artifacts even when their hash is unchanged")
+
+    def handle(self, *args, **options):
+        sites = Site.objects.order_by("id")
+        if options.get("site"):
+            sites = sites.filter(slug=options["site"])
+            if not sites.exists():
+                self.stderr.write(self.style.ERROR(f"Site with slug '{options['site']}' not found"))
+                return
+        if snapshots.brotli is None:
+            self.stdout.write(self.style.WARNING("brotli not installed: only .json/.json.gz variants are written"))
+
+        artifacts = options.get("artifact") or snapshots.ARTIFACTS
+        for site in sites:
+            res = snapshots.write_site_snapshot(site, artifacts, force=options["force"])
+            if res["dir"] is None:
+                self.stdout.write(self.style.WARNING(f"{site.slug}: skipped (no BLOG_SNAPSHOT_DIR and no repo)"))
+                continue
+            self.stdout.write(
+                f"{site.slug}: written={','.join(res['written']) or '-'} "
+                f"unchanged={','.join(res['unchanged']) or '-'} -> {res['dir']}"
+            )
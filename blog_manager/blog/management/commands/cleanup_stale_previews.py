@@ -1,88 +1,79 @@
 """
-Management command to clean up stale preview sessions.
+Management command to clean up stale previews in the site repositories.
 
-Closes preview sessions that are in draft/ready/open state but haven't been
-updated in a specified number of days (default: 7).
+For every site, lists preview/ with a single tree call and removes the
+preview/<post_id>/ entries whose post was deleted, is published, or hasn't been
+updated in a specified number of days (default: 7). All removals of a site go in
+a single commit and Post.preview_url is cleared in bulk.
 
 Usage:
     python manage.py cleanup_stale_previews
     python manage.py cleanup_stale_previews --days 14
+    python manage.py cleanup_stale_previews --site my-site
     python manage.py cleanup_stale_previews --dry-run
 """
 
 from django.core.management.base import BaseCommand, CommandError
-from django.utils import timezone
-from datetime import timedelta
-from blog.models import PreviewSession
+from blog.models import Site
 
 
 class Command(BaseCommand):
-    help = 'Close stale preview sessions that are older than specified days'
+    help = 'Remove stale previews (deleted, published or old posts) with one commit per site'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--days',
             type=int,
             default=7,
-            help='Number of days to consider a session stale (default: 7)'
+            help='Number of days without updates to consider a preview stale (default: 7)'
+        )
+        parser.add_argument(
+            '--site',
+            help='Only clean the site with this slug'
         )
         parser.add_argument(
             '--dry-run',
             action='store_true',
-            help='Show what would be closed without actually closing'
+            help='Show what would be removed without committing'
         )
 
     def handle(self, *args, **options):
+        from blog.preview import gc_site_previews
+
         days = options['days']
         dry_run = options['dry_run']
-        
+
         if days < 1:
             raise CommandError('--days must be at least 1')
-        
-        cutoff = timezone.now() - timedelta(days=days)
-        
-        # Find stale sessions in non-terminal states
-        stale_sessions = PreviewSession.objects.filter(
-            updated_at__lt=cutoff,
-            status__in=['draft', 'ready', 'open']
-        ).select_related('site')
-        
-        count = stale_sessions.count()
-        
-        if count == 0:
-            self.stdout.write(self.style.SUCCESS(
-                f'No stale sessions found (older than {days} days)'
-            ))
-            return
-        
-        if dry_run:
-            self.stdout.write(self.style.WARNING(
-                f'DRY RUN: Would close {count} stale session(s):'
-            ))
-            for session in stale_sessions:
-                age_days = (timezone.now() - session.updated_at).days
-                self.stdout.write(
-                    f'  - {session.uuid} (Site: {session.site.slug}, '
-                    f'Status: {session.status}, Age: {age_days} days, '
-                    f'PR: {session.pr_number or "N/A"})'
-                )
-        else:
-            self.stdout.write(
-                f'Closing {count} stale session(s) older than {days} days...'
-            )
-            
-            closed_count = 0
-            for session in stale_sessions:
-                age_days = (timezone.now() - session.updated_at).days
-                self.stdout.write(
-                    f'  Closing {session.uuid} (Site: {session.site.slug}, '
-                    f'Status: {session.status}, Age: {age_days} days)'
-                )
-                
-                session.status = 'closed'
-                session.save(update_fields=['status', 'updated_at'])
-                closed_count += 1
-            
-            self.stdout.write(self.style.SUCCESS(
-                f'Successfully closed {closed_count} stale session(s)'
-            ))
+
+        sites = Site.objects.exclude(repo_owner__isnull=True).exclude(repo_owner='') \
+            .exclude(repo_name__isnull=True).exclude(repo_name='')
+        if options.get('site'):
+            sites = sites.filter(slug=options['site'])
+
+        total = 0
+        for site in sites:
+            try:
+                res = gc_site_previews(site, days=days, dry_run=dry_run)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'{site.slug}: preview cleanup failed: {e}'))
+                continue
+
+            stale = res['stale']
+            total += len(stale)
+            if not stale:
+                self.stdout.write(f'{site.slug}: no stale previews')
+                continue
+
+            prefix = 'DRY RUN: would remove' if dry_run else 'Removed'
+            self.stdout.write(self.style.WARNING(f'{site.slug}: {prefix} {len(stale)} preview(s):'))
+            for key, info in sorted(stale.items(), key=lambda kv: str(kv[0])):
+                self.stdout.write(f'  - preview/{key}/ ({info["reason"]}, {len(info["paths"])} file(s))')
+            if not dry_run:
+                self.stdout.write(self.style.SUCCESS(
+                    f'{site.slug}: commit {res["commit_sha"]}, cleared preview_url on {res["cleared"]} post(s)'
+                ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Found" if dry_run else "Removed"} {total} stale preview(s) older than {days} days or obsolete'
+        ))
@@ -0,0 +1,32 @@
+"""
+Compact the change log behind /api/blog/changes/ (blog.services.changes).
+
+Keeps only the newest entry of every post/category/site and drops tombstones
+older than --days; run it from cron (e.g. daily).
+
+Usage:
+    python manage.py compact_changes
+    python manage.py compact_changes --days 60
+    python manage.py compact_changes --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+
+from blog.services.changes import compact
+
+
+class Command(BaseCommand):
+    help = "Drop superseded change log entries and expired tombstones"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None,
+                            help="Tombstone retention in days (default: BLOG_CHANGES_TOMBSTONE_DAYS)")
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be removed")
+
+    def handle(self, *args, **options):
+        res = compact(options["days"], dry_run=options["dry_run"])
+        prefix = "Would remove" if options["dry_run"] else "Removed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {res['superseded']} superseded entries and {res['tombstones']} tombstones "
+            f"(log floor: {res['floor']})"
+        ))
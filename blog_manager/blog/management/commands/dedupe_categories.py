@@ -1,14 +1,106 @@
 from django.core.management.base import BaseCommand
-from django.db import transaction
-from django.db.models import Count, Min
+from django.db import connection, transaction
+from django.db.models import Count, Value
+from django.db.models.functions import Coalesce
 from blog.models import Category, Post
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _find(parent, x):
+    while parent.setdefault(x, x) != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def duplicate_groups(site_id=None):
+    """Return {canonical_id: [duplicate ids]} for categories sharing a key.
+
+    Two keys are considered: the legacy (site, slug) and the normalized
+    (site, cluster_slug, subcluster_slug) where NULL and '' subclusters match.
+    The normalized key only applies to rows with a cluster_slug: categories
+    created without cluster columns (import_categories_from_posts,
+    rebuild_taxonomy) are deduplicated by slug alone.
+    Groups overlapping on either key are merged; the lowest id is canonical.
+    """
+    qs = Category.objects.all()
+    if site_id:
+        qs = qs.filter(site=site_id)
+
+    rows = list(qs.values_list('id', 'site_id', 'slug', 'cluster_slug', 'subcluster_slug'))
+    dup_slug = {
+        (d['site'], d['slug'])
+        for d in qs.values('site', 'slug').annotate(n=Count('id')).filter(n__gt=1)
+    }
+    dup_norm = {
+        (d['site'], d['cluster_slug'], d['sub'])
+        for d in qs.exclude(cluster_slug__isnull=True).exclude(cluster_slug='')
+        .annotate(sub=Coalesce('subcluster_slug', Value('')))
+        .values('site', 'cluster_slug', 'sub').annotate(n=Count('id')).filter(n__gt=1)
+    }
+    if not dup_slug and not dup_norm:
+        return {}
+
+    parent = {}
+    first_by_key = {}
+    for cid, site, slug, cluster, sub in rows:
+        keys = []
+        if (site, slug) in dup_slug:
+            keys.append(('slug', site, slug))
+        if cluster and (site, cluster, sub or '') in dup_norm:
+            keys.append(('norm', site, cluster, sub or ''))
+        for key in keys:
+            if key in first_by_key:
+                a, b = _find(parent, cid), _find(parent, first_by_key[key])
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+            else:
+                first_by_key[key] = cid
+                _find(parent, cid)
+
+    groups = {}
+    for cid in parent:
+        groups.setdefault(_find(parent, cid), []).append(cid)
+    return {root: sorted(c for c in ids if c != root) for root, ids in groups.items() if len(ids) > 1}
+
+
+def _insert_ignore_prefix():
+    return {
+        'sqlite': 'INSERT OR IGNORE INTO',
+        'mysql': 'INSERT IGNORE INTO',
+    }.get(connection.vendor, 'INSERT INTO')
+
+
+def merge_group(canonical_id, dup_ids):
+    """Re-point every post of dup_ids to canonical_id with set-based SQL, then drop the duplicates.
+
+    Returns the number of post relations added to the canonical category.
+    """
+    through = Post.categories.through
+    table = connection.ops.quote_name(through._meta.db_table)
+    post_col = connection.ops.quote_name(through._meta.get_field('post').column)
+    cat_col = connection.ops.quote_name(through._meta.get_field('category').column)
+    placeholders = ', '.join(['%s'] * len(dup_ids))
+
+    with connection.cursor() as cursor:
+        # un solo INSERT ... SELECT: i post già legati al canonico sono esclusi (e i conflitti ignorati)
+        cursor.execute(
+            f"{_insert_ignore_prefix()} {table} ({post_col}, {cat_col}) "
+            f"SELECT DISTINCT t.{post_col}, %s FROM {table} t "
+            f"WHERE t.{cat_col} IN ({placeholders}) "
+            f"AND NOT EXISTS (SELECT 1 FROM {table} c WHERE c.{post_col} = t.{post_col} AND c.{cat_col} = %s)",
+            [canonical_id, *dup_ids, canonical_id],
+        )
+        added = max(cursor.rowcount or 0, 0)
+        cursor.execute(f"DELETE FROM {table} WHERE {cat_col} IN ({placeholders})", list(dup_ids))
+    Category.objects.filter(id__in=dup_ids).delete()
+    return added
+
+
 class Command(BaseCommand):
-    help = "Dedupe duplicate Category records, re-point M2M relations, and remove duplicates"
+    help = "Dedupe duplicate Category records (legacy slug and normalized cluster/subcluster key), re-point M2M relations with set-based SQL, and remove duplicates"
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -30,78 +122,38 @@ class Command(BaseCommand):
             self.style.WARNING(f"Starting category dedupe (dry_run={dry_run})")
         )
 
-        # Find duplicate categories grouped by (site, slug)
-        duplicates_query = Category.objects.values('site', 'slug').annotate(
-            count=Count('id'),
-            min_id=Min('id')
-        ).filter(count__gt=1)
-
-        if site_id:
-            duplicates_query = duplicates_query.filter(site=site_id)
-
-        duplicates = list(duplicates_query)
+        groups = duplicate_groups(site_id)
 
-        if not duplicates:
+        if not groups:
             self.stdout.write(self.style.SUCCESS("No duplicate categories found"))
             return
 
         self.stdout.write(
-            f"Found {len(duplicates)} sets of duplicate categories"
+            f"Found {len(groups)} sets of duplicate categories"
+        )
+
+        names = dict(Category.objects.filter(id__in=list(groups)).values_list('id', 'name'))
+        through = Post.categories.through
+        relations = dict(
+            through.objects.filter(category_id__in=[i for ids in groups.values() for i in ids])
+            .values('category_id').annotate(n=Count('id')).values_list('category_id', 'n')
         )
 
         total_merged = 0
         total_deleted = 0
 
-        for dup in duplicates:
-            site = dup['site']
-            slug = dup['slug']
-            count = dup['count']
-            canonical_id = dup['min_id']
-
-            # Get all categories with this (site, slug) combination
-            categories = Category.objects.filter(
-                site=site, slug=slug
-            ).order_by('id')
-
-            canonical = categories.filter(id=canonical_id).first()
-            duplicates_to_remove = categories.exclude(id=canonical_id)
-
-            self.stdout.write(
-                f"  Site {site}, slug '{slug}': {count} duplicates → "
-                f"keeping ID {canonical_id} ({canonical.name if canonical else 'MISSING'})"
-            )
-
-            if not canonical:
+        with transaction.atomic():
+            for canonical_id, dup_ids in sorted(groups.items()):
+                rel = sum(relations.get(i, 0) for i in dup_ids)
                 self.stdout.write(
-                    self.style.ERROR(f"    ERROR: Canonical category ID {canonical_id} not found")
+                    f"  {len(dup_ids) + 1} duplicates → keeping ID {canonical_id} ({names.get(canonical_id, 'MISSING')}), "
+                    f"removing {dup_ids}, {rel} post relations to re-point"
                 )
-                continue
-
-            # Re-point M2M relations from duplicates to canonical
-            for dup_cat in duplicates_to_remove:
-                posts_using_dup = Post.objects.filter(categories=dup_cat)
-                post_count = posts_using_dup.count()
-
-                if post_count > 0:
-                    self.stdout.write(
-                        f"    Re-pointing {post_count} posts from ID {dup_cat.id} to canonical ID {canonical_id}"
-                    )
-
-                    if not dry_run:
-                        with transaction.atomic():
-                            # Add canonical category to all posts that use the duplicate
-                            for post in posts_using_dup:
-                                post.categories.add(canonical)
-                                post.categories.remove(dup_cat)
-
-                    total_merged += post_count
-
-                # Delete the duplicate category
-                if not dry_run:
-                    dup_cat.delete()
-                    self.stdout.write(f"    Deleted duplicate category ID {dup_cat.id}")
-
-                total_deleted += 1
+                if dry_run:
+                    total_merged += rel
+                else:
+                    total_merged += merge_group(canonical_id, dup_ids)
+                total_deleted += len(dup_ids)
 
         if dry_run:
             self.stdout.write(
@@ -118,18 +170,11 @@ class Command(BaseCommand):
 
         # Verify no duplicates remain
         if not dry_run:
-            remaining_query = Category.objects.values('site', 'slug').annotate(
-                count=Count('id')
-            ).filter(count__gt=1)
-
-            if site_id:
-                remaining_query = remaining_query.filter(site=site_id)
-
-            remaining = remaining_query.count()
+            remaining = len(duplicate_groups(site_id))
 
             if remaining == 0:
                 self.stdout.write(self.style.SUCCESS("✓ No duplicate categories remain"))
             else:
                 self.stdout.write(
                     self.style.ERROR(f"✗ {remaining} duplicate category sets still exist")
-                )
\ No newline at end of file
+                )
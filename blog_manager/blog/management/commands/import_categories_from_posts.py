@@ -1,21 +1,23 @@
+import time
+from functools import partial
+
 from django.core.management.base import BaseCommand
-from django.utils.text import slugify
 from blog.models import Post, Category
-import re
-import yaml
+from blog.services.frontmatter_pool import (
+    DEFAULT_CHUNK_SIZE,
+    ProgressReporter,
+    default_jobs,
+    import_categories_chunk,
+    parallel_map,
+    parse_frontmatter,
+    stream_posts,
+)
+from blog.services.versions import bump_site_versions
 
 
 def extract_frontmatter(text: str):
-    if not text:
-        return None
-    # Allow optional leading whitespace/newlines before the front-matter block
-    m = re.search(r"^\s*---\s*\n(.*?)\n---\s*\n", text, flags=re.S | re.M)
-    if not m:
-        return None
-    try:
-        return yaml.safe_load(m.group(1)) or {}
-    except Exception:
-        return None
+    # kept for backwards compatibility: parsing now lives in blog.services.frontmatter_pool
+    return parse_frontmatter(text)
 
 
 class Command(BaseCommand):
@@ -47,6 +49,18 @@ class Command(BaseCommand):
             action="store_true",
             help="Do not persist changes, only report",
         )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=None,
+            help=f"Parser processes (default: {default_jobs()}, in-process for small corpora)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f"Posts per DB fetch / parser task (default: {DEFAULT_CHUNK_SIZE})",
+        )
 
     def handle(self, *args, **options):
         fields_arg = options["fields"] or "categories"
@@ -54,114 +68,64 @@ class Command(BaseCommand):
         hierarchy = options["hierarchy"]
         auto_hashtags = options["auto_hashtags"]
         dry = options["dry_run"]
+        chunk_size = max(1, options.get("chunk_size") or DEFAULT_CHUNK_SIZE)
+
+        posts = Post.objects.all()
+        total = posts.count()
+        jobs = options.get("jobs") or (1 if total <= chunk_size else default_jobs())
+        worker = partial(import_categories_chunk, fields=tuple(fields), hierarchy=hierarchy, auto_hashtags=auto_hashtags)
+
+        # Stream posts (id, site_id, content) and parse front-matter in the pool; only the
+        # small (slug, name) results are kept: desired categories per site + assignments
+        desired = {}      # site_id -> {slug: name} (first-wins, posts ordered by id)
+        assignments = []  # (post_id, site_id, slug)
+        started = time.monotonic()
+        for parsed in parallel_map(worker, stream_posts(posts, chunk_size), jobs=jobs, chunk_size=chunk_size,
+                                   progress=ProgressReporter(self.stdout.write, total=total)):
+            for post_id, site_id, pairs in parsed:
+                site_desired = desired.setdefault(site_id, {})
+                for slug, name in pairs:
+                    site_desired.setdefault(slug, name)
+                    assignments.append((post_id, site_id, slug))
+        elapsed = time.monotonic() - started
+        self.stdout.write(f"Parsed {total} posts in {elapsed:.1f}s ({(total / elapsed) if elapsed > 0 else 0:.0f} posts/s) with {jobs} job(s)")
 
-        # We'll process site-by-site to make import idempotent and avoid duplicates.
-        posts = Post.objects.select_related('site').all()
         total_created = 0
         total_assigned = 0
-
-        # Group posts per site for batch processing
-        posts_by_site = {}
-        for post in posts:
-            posts_by_site.setdefault(post.site_id, []).append(post)
-
-        for site_id, site_posts in posts_by_site.items():
-            # map slug -> desired display name (keep first encountered name)
-            desired = {}
-            # map post_id -> list of slugs to assign
-            assignments = {}
-
-            for post in site_posts:
-                fm = extract_frontmatter(post.content)
-                cats = []
-
-                if fm:
-                    vals = []
-                    for fld in fields:
-                        if fld in fm and fm[fld] is not None:
-                            v = fm[fld]
-                            if isinstance(v, (list, tuple)) and v:
-                                vals.extend([str(x).strip() for x in v if x])
-                            else:
-                                vals.append(str(v).strip())
-                    if vals:
-                        if len(vals) == 1:
-                            cats = [vals[0]]
-                        else:
-                            cats = ["/".join(vals)]
-
-                if not cats:
-                    m = re.search(r'(?mi)^categories:\s*(.+)$', post.content or '')
-                    if m:
-                        cats = [s.strip() for s in re.split(r"[,;]\s*", m.group(1)) if s.strip()]
-
-                if not cats and auto_hashtags:
-                    tags = re.findall(r"#([A-Za-z0-9_\-/]+)", post.content or "")
-                    cats = [t.replace('-', ' ').replace('_', ' ').strip() for t in tags]
-
-                if not cats:
-                    continue
-
-                slugs_for_post = []
-                for raw in cats:
-                    if hierarchy == 'slash':
-                        parts = [p.strip() for p in re.split(r"\s*/\s*", raw) if p.strip()]
-                    elif hierarchy == '>':
-                        parts = [p.strip() for p in re.split(r"\s*>\s*", raw) if p.strip()]
-                    else:
-                        parts = [raw.strip()]
-
-                    accum = []
-                    for i in range(len(parts)):
-                        accum.append(parts[i])
-                        name = "/".join(accum) if len(accum) > 1 else accum[0]
-                        slug = slugify(name.replace('/', '-').replace('>', '-')).strip()
-                        if not slug:
-                            continue
-                        # record desired name for this slug (first-wins)
-                        desired.setdefault(slug, name)
-                        slugs_for_post.append(slug)
-
-                if slugs_for_post:
-                    assignments.setdefault(post.pk, []).extend(slugs_for_post)
-
-            if not desired:
+        through = Post.categories.through
+
+        for site_id, site_desired in desired.items():
+            existing = set(
+                Category.objects.filter(site_id=site_id, slug__in=list(site_desired)).values_list('slug', flat=True)
+            )
+            to_create = [Category(site_id=site_id, slug=slug, name=name) for slug, name in site_desired.items() if slug not in existing]
+            if dry:
+                total_created += len(to_create)
                 continue
 
-            # Prefetch existing categories for the site
-            existing = Category.objects.filter(site_id=site_id, slug__in=list(desired.keys()))
-            existing_map = {c.slug: c for c in existing}
-
-            # Determine which slugs need to be created
-            to_create = []
-            for slug, name in desired.items():
-                if slug not in existing_map:
-                    to_create.append(Category(site_id=site_id, slug=slug, name=name))
-
             # Bulk create missing categories (ignore conflicts to be safe in concurrent runs)
-            if to_create and not dry:
-                Category.objects.bulk_create(to_create, ignore_conflicts=True)
+            if to_create:
+                Category.objects.bulk_create(to_create, batch_size=500, ignore_conflicts=True)
                 total_created += len(to_create)
 
-            # Re-fetch all categories for mapping
-            all_cats = Category.objects.filter(site_id=site_id, slug__in=list(desired.keys()))
-            slug_to_obj = {c.slug: c for c in all_cats}
-
-            # Assign categories to posts in batch
-            if not dry and assignments:
-                # collect mapping post_id -> category objects
-                for post in site_posts:
-                    slugs = assignments.get(post.pk)
-                    if not slugs:
-                        continue
-                    objs = []
-                    for s in slugs:
-                        obj = slug_to_obj.get(s)
-                        if obj:
-                            objs.append(obj)
-                    if objs:
-                        # avoid duplicates by using add with unique ids
-                        post.categories.add(*objs)
-                        total_assigned += len(objs)
-
-        self.stdout.write(self.style.SUCCESS(f"Categories created: {total_created}, assigned: {total_assigned}"))
\ No newline at end of file
+            # Re-fetch ids for mapping, then insert the through rows in bulk
+            slug_to_id = dict(Category.objects.filter(site_id=site_id, slug__in=list(site_desired)).values_list('slug', 'id'))
+            links = {
+                (post_id, slug_to_id[slug])
+                for post_id, sid, slug in assignments
+                if sid == site_id and slug in slug_to_id
+            }
+            already = set(
+                through.objects.filter(category_id__in=list(slug_to_id.values()), post_id__in={p for p, _c in links})
+                .values_list('post_id', 'category_id')
+            ) if links else set()
+            new_links = [through(post_id=p, category_id=c) for p, c in links - already]
+            through.objects.bulk_create(new_links, batch_size=1000, ignore_conflicts=True)
+            total_assigned += len(new_links)
+
+        if not dry and desired:
+            # bulk_create non emette signal: invalida a mano ETag/cache dei siti toccati
+            bump_site_versions(desired)
+
+        prefix = "DRY RUN: " if dry else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}Categories created: {total_created}, assigned: {total_assigned}"))
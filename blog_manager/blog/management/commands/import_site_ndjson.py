@@ -0,0 +1,88 @@
+"""
+Import posts from an NDJSON export (GET /api/blog/sites/<id>/export.ndjson).
+
+The file is read line by line (plain or gzip, detected from the magic bytes)
+and upserted by (site, slug) in batches, so memory stays flat on large
+exports. After each committed batch the last source id is printed: if the
+run stops, restart it with --after <that id>.
+
+Usage:
+    python manage.py import_site_ndjson export.ndjson              # site named in the header
+    python manage.py import_site_ndjson export.ndjson.gz --site my-blog
+    curl -s .../export.ndjson | python manage.py import_site_ndjson - --site my-blog
+    python manage.py import_site_ndjson export.ndjson --after 12345 --batch-size 1000
+    python manage.py import_site_ndjson export.ndjson --dry-run
+"""
+
+import gzip
+import io
+import itertools
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.models import Site
+from blog.services.ndjson import PAGE_SIZE, import_site_ndjson
+
+
+def _open(path):
+    raw = sys.stdin.buffer if path == "-" else open(path, "rb")
+    stream = io.BufferedReader(raw) if not hasattr(raw, "peek") else raw
+    if stream.peek(2)[:2] == b"\x1f\x8b":
+        stream = gzip.GzipFile(fileobj=stream)
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+
+class Command(BaseCommand):
+    help = "Stream an NDJSON site export into the database (upsert by site+slug)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Export file (.ndjson or .ndjson.gz), '-' for stdin")
+        parser.add_argument("--site", type=str, help="Target site slug (default: the site named in the export)")
+        parser.add_argument("--after", type=int, default=0, help="Skip records with source id <= AFTER (resume)")
+        parser.add_argument("--batch-size", type=int, default=PAGE_SIZE, help="Posts per transaction")
+        parser.add_argument("--dry-run", action="store_true", help="Only parse and count the records")
+
+    def handle(self, *args, **options):
+        try:
+            lines = _open(options["path"])
+        except OSError as e:
+            raise CommandError(f"Cannot open {options['path']}: {e}")
+
+        first = next((ln for ln in lines if ln.strip()), None)
+        if first is None:
+            raise CommandError("Empty export")
+        try:
+            head = json.loads(first)
+        except ValueError as e:
+            raise CommandError(f"line 1: invalid JSON ({e})")
+        lines = itertools.chain([first], lines)
+
+        site_slug = options.get("site") or (head.get("site") if "export" in head else None)
+        if not site_slug:
+            raise CommandError("No export header with the site slug: pass --site <slug>")
+        site = Site.objects.filter(slug=site_slug).first()
+        if site is None:
+            raise CommandError(f"Site with slug '{site_slug}' not found")
+
+        def progress(created, updated, last_id):
+            self.stdout.write(f"{site.slug}: created={created} updated={updated} last_id={last_id}")
+
+        try:
+            res = import_site_ndjson(
+                lines, site, batch_size=max(1, options["batch_size"]), after=options["after"],
+                dry_run=options["dry_run"], progress=progress,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not res["complete"]:
+            self.stdout.write(self.style.WARNING(
+                f"No end marker: the export looks truncated, resume with --after {res['last_id']}"
+            ))
+        prefix = "Parsed" if options["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {res['records']} posts into {site.slug} "
+            f"(created={res['created']} updated={res['updated']} skipped={res['skipped']})"
+        ))
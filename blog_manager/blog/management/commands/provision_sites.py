@@ -0,0 +1,52 @@
+"""
+Provision the git working copy of sites waiting for it (blog.services.provisioning).
+
+Runs what the after-commit thread does when BLOG_PROVISION_THREAD is off: from
+cron, or as a worker process with --watch.
+
+Usage:
+    python manage.py provision_sites
+    python manage.py provision_sites --sites my-blog --retry-failed
+    python manage.py provision_sites --watch 10 --stale-minutes 30
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.models import Site
+from blog.services.provisioning import pending_site_ids, provision_site
+
+
+class Command(BaseCommand):
+    help = "Clone/initialize the working copy of pending sites"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sites", nargs="*", help="Only these site slugs")
+        parser.add_argument("--retry-failed", action="store_true", help="Also retry sites in 'failed'")
+        parser.add_argument("--stale-minutes", type=int, default=0,
+                            help="Reclaim sites stuck in 'cloning' for longer than this (dead worker)")
+        parser.add_argument("--watch", type=int, default=0, metavar="SECONDS",
+                            help="Keep polling for pending sites every SECONDS")
+
+    def handle(self, *args, **options):
+        slugs = options["sites"]
+        only = None
+        if slugs:
+            only = set(Site.objects.filter(slug__in=slugs).values_list("id", flat=True))
+            if len(only) != len(set(slugs)):
+                raise CommandError(f"Unknown site slug in {slugs}")
+        kwargs = {
+            "retry_failed": options["retry_failed"],
+            "stale_after": options["stale_minutes"] * 60 or None,
+        }
+        while True:
+            ids = [i for i in pending_site_ids(**kwargs) if only is None or i in only]
+            for site_id in ids:
+                res = provision_site(site_id, **kwargs)
+                style = self.style.SUCCESS if res["status"] == Site.PROVISION_READY else self.style.WARNING
+                self.stdout.write(style(f"site={site_id} {res['status']}: {res['message']}"))
+            if not options["watch"]:
+                if not ids:
+                    self.stdout.write("No sites waiting for provisioning")
+                return
+            time.sleep(options["watch"])
@@ -1,23 +1,33 @@
+import time
+
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
-import re
-from django.core.management.base import BaseCommand
-import re
-import yaml
 from blog.models import Post, Category, Site
-
-fm_re = re.compile(r'^\s*---\s*\n([\s\S]*?)\n---\s*\n', re.M)
+from blog.services.frontmatter_pool import (
+    DEFAULT_CHUNK_SIZE,
+    ProgressReporter,
+    default_jobs,
+    parallel_map,
+    stream_posts,
+    taxonomy_chunk,
+)
 
 
 class Command(BaseCommand):
-    help = 'Rebuild Category objects from posts front-matter (clusters and subclusters)'
+    help = 'Rebuild Category objects and the materialized taxonomy (TaxonomyEntry) from posts front-matter'
 
     def add_arguments(self, parser):
         parser.add_argument('--site', type=str, help='Site slug to process (optional)')
         parser.add_argument('--dry-run', action='store_true', dest='dry_run', help='Show what would be created without saving')
+        parser.add_argument('--table-only', action='store_true', dest='table_only', help='Only rebuild the materialized taxonomy table, skip Category rows')
+        parser.add_argument('--backfill', action='store_true', help='Run backfill_frontmatter_fields first (posts saved before the front-matter columns existed)')
+        parser.add_argument('--jobs', type=int, default=None, help=f'Parser processes (default: {default_jobs()}; 1 = in-process)')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help=f'Posts per DB fetch / parser task (default: {DEFAULT_CHUNK_SIZE})')
 
     def handle(self, *args, **options):
         site_slug = options.get('site')
         dry = options.get('dry_run')
+        table_only = options.get('table_only')
 
         posts = Post.objects.all()
         site_obj = None
@@ -29,89 +39,77 @@ class Command(BaseCommand):
                 self.stderr.write(self.style.ERROR(f"Site with slug '{site_slug}' not found"))
                 return
 
+        if options.get('backfill') and not dry:
+            call_command('backfill_frontmatter_fields', *(['--site', site_slug] if site_slug else []), stdout=self.stdout)
+
         created = []
-        missing = set()
-
-        for p in posts:
-            raw = p.content or getattr(p, 'body', '') or ''
-            m = fm_re.search(raw)
-            if not m:
-                continue
-            fm_text = m.group(1)
-            try:
-                fm = yaml.safe_load(fm_text) or {}
-            except Exception:
-                fm = {}
-                for line in fm_text.splitlines():
-                    if ':' in line:
-                        k, v = line.split(':', 1)
-                        fm[k.strip()] = v.strip()
-
-            category_vals = []
-            sub_vals = []
-
-            # categories keys (primary)
-            for key in ('categories', 'category'):
-                if key in fm and fm[key]:
-                    c = fm[key]
-                    if isinstance(c, list):
-                        category_vals.extend([str(x).strip() for x in c if x])
-                    else:
-                        category_vals.append(str(c).strip())
-
-            # subcluster keys
-            for key in ('subcluster', 'subclusters'):
-                if key in fm and fm[key]:
-                    s = fm[key]
-                    if isinstance(s, list):
-                        sub_vals.extend([str(x).strip() for x in s if x])
-                    else:
-                        sub_vals.append(str(s).strip())
-
-            # fallback to post.categories M2M
-            if not category_vals and hasattr(p, 'categories'):
-                try:
-                    for cat in p.categories.all():
-                        name = cat.name or ''
-                        if '/' in name:
-                            category_vals.append(name.split('/')[0].strip())
-                        else:
-                            category_vals.append(name.strip())
-                except Exception:
-                    pass
-
-            if not category_vals and not sub_vals:
-                continue
-
-            if not category_vals:
-                category_vals = ['(no-category)']
-            if not sub_vals:
-                sub_vals = ['(no-subcluster)']
-
-            for cval in category_vals:
-                name_cl = cval
-                slug_cl = name_cl.replace(' ', '-').lower()
-                site_id = site_obj.id if site_obj is not None else p.site_id
-                if dry:
-                    missing.add((site_id, name_cl))
-                else:
-                    obj, created_flag = Category.objects.get_or_create(site_id=site_id, slug=slug_cl, defaults={'name': name_cl})
-                    if created_flag:
-                        created.append(obj)
-
-                for su in sub_vals:
-                    name = f"{name_cl}/{su}" if su and su != '(no-subcluster)' else name_cl
-                    slug = name.replace(' ', '-').lower()
-                    if dry:
-                        missing.add((site_id, name))
-                    else:
-                        obj, created_flag = Category.objects.get_or_create(site_id=site_id, slug=slug, defaults={'name': name})
-                        if created_flag:
-                            created.append(obj)
+        # (site_id, slug) -> name, first-wins
+        desired = {}
+
+        if not table_only:
+            started = time.monotonic()
+            total = posts.count()
+            progress = ProgressReporter(self.stdout.write, total=total)
+            chunk_size = max(1, options.get('chunk_size') or DEFAULT_CHUNK_SIZE)
+            through = Post.categories.through
+
+            for parsed in parallel_map(taxonomy_chunk, stream_posts(posts, chunk_size),
+                                       jobs=options.get('jobs'), chunk_size=chunk_size, progress=progress):
+                # fallback to post.categories M2M: one query per chunk for posts without categories
+                need_m2m = [pid for pid, _site, cats, _subs in parsed if cats is None]
+                m2m_names = {}
+                if need_m2m:
+                    for pid, name in through.objects.filter(post_id__in=need_m2m).values_list('post_id', 'category__name'):
+                        name = name or ''
+                        m2m_names.setdefault(pid, []).append(name.split('/')[0].strip() if '/' in name else name.strip())
+
+                for pid, site_id, category_vals, sub_vals in parsed:
+                    category_vals = category_vals or m2m_names.get(pid, [])
+                    if not category_vals and not sub_vals:
+                        continue
+
+                    if not category_vals:
+                        category_vals = ['(no-category)']
+                    if not sub_vals:
+                        sub_vals = ['(no-subcluster)']
+
+                    for cval in category_vals:
+                        name_cl = cval
+                        desired.setdefault((site_id, name_cl.replace(' ', '-').lower()), name_cl)
+                        for su in sub_vals:
+                            name = f"{name_cl}/{su}" if su and su != '(no-subcluster)' else name_cl
+                            desired.setdefault((site_id, name.replace(' ', '-').lower()), name)
+
+            elapsed = time.monotonic() - started
+            rate = total / elapsed if elapsed > 0 else 0.0
+            self.stdout.write(f"Parsed {total} posts in {elapsed:.1f}s ({rate:.0f} posts/s)")
+
+            if not dry and desired:
+                # bulk insert of the missing (site, slug) rows
+                existing = set()
+                for site_id in {s for s, _slug in desired}:
+                    slugs = [slug for s, slug in desired if s == site_id]
+                    existing.update(
+                        (site_id, slug) for slug in
+                        Category.objects.filter(site_id=site_id, slug__in=slugs).values_list('slug', flat=True)
+                    )
+                created = [
+                    Category(site_id=site_id, slug=slug, name=name)
+                    for (site_id, slug), name in desired.items() if (site_id, slug) not in existing
+                ]
+                Category.objects.bulk_create(created, batch_size=500, ignore_conflicts=True)
 
         if dry:
-            self.stdout.write(self.style.WARNING(f"Would create {len(missing)} categories (dry-run):"))
-            for s, n in sorted(missing):
+            self.stdout.write(self.style.WARNING(f"Would create {len(desired)} categories (dry-run):"))
+            for (s, _slug), n in sorted(desired.items()):
                 self.stdout.write(f" site={s} name={n}")
         else:
-            self.stdout.write(self.style.SUCCESS(f"Created {len(created)} new categories"))
\ No newline at end of file
+            if not table_only:
+                self.stdout.write(self.style.SUCCESS(f"Created {len(created)} new categories"))
+            from blog.services.taxonomy import rebuild_site_taxonomy
+            started = time.monotonic()
+            res = rebuild_site_taxonomy(site_obj.id if site_obj is not None else None)
+            self.stdout.write(self.style.SUCCESS(
+                f"Taxonomy table rebuilt: {res['entries']} entries, {res['memberships']} memberships "
+                f"from {res['posts']} posts in {time.monotonic() - started:.1f}s"
+            ))
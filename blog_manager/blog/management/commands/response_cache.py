@@ -0,0 +1,42 @@
+"""
+Inspect the anonymous response cache (api.response_cache).
+
+Usage:
+    python manage.py response_cache              # hit/miss counters and hit rate
+    python manage.py response_cache --reset-stats
+    python manage.py response_cache --clear      # drop every cached response
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import response_cache
+
+
+class Command(BaseCommand):
+    help = "Show hit rate of the anonymous post response cache, reset its counters or clear it"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset-stats", action="store_true", help="Reset hit/miss counters")
+        parser.add_argument("--clear", action="store_true", help="Clear the whole response cache (counters included)")
+
+    def handle(self, *args, **options):
+        backend = getattr(settings, "BLOG_RESPONSE_CACHE", "locmem")
+        if not response_cache.enabled():
+            self.stdout.write(self.style.WARNING(f"Response cache disabled (BLOG_RESPONSE_CACHE={backend})"))
+            return
+
+        if options["clear"]:
+            response_cache.get_cache().clear()
+            self.stdout.write(self.style.SUCCESS("Response cache cleared"))
+            return
+
+        s = response_cache.stats()
+        self.stdout.write(
+            f"backend={backend} hits={s['hits']} misses={s['misses']} hit_rate={s['hit_rate']:.1%}"
+        )
+        if backend == "locmem":
+            self.stdout.write("  (locmem: counters of this process only)")
+        if options["reset_stats"]:
+            response_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset"))
@@ -11,10 +11,10 @@ import os
 import logging
 from blog.utils import create_categories_from_frontmatter
 import re
-import subprocess
 import shutil
 from django.core.management import call_command
 from blog.models import ExportAudit
+from blog.services.versions import bump_site_versions
 
 logger = logging.getLogger(__name__)
 
@@ -253,6 +253,8 @@ class Command(BaseCommand):
         # Ensure we restore stdout/handlers and close file at the end of the command
         cleanup_required = bool(fh)
 
+        # siti sincronizzati: gli update via queryset non passano dai signal che bumpano la versione
+        synced_site_ids = set()
         for site in qs:
             self.stdout.write(self.style.NOTICE(f"Processing site {site.slug} (mode={mode_text})"))
             posts_dir = (site.posts_dir or "_posts").strip()
@@ -506,7 +508,8 @@ class Command(BaseCommand):
                                 pass
                             token = _SKIP_EXPORT.set(True)
                             try:
-                                p.save()
+                                # import dal repo: niente full_clean (repo già presente, dati dal working copy)
+                                p.save(validate=False)
                             finally:
                                 _SKIP_EXPORT.reset(token)
                             try:
@@ -638,6 +641,7 @@ class Command(BaseCommand):
                 site_report["_meta"] = site_report_meta
 
                 report["sites"][site.slug] = site_report
+                synced_site_ids.add(site.pk)
                 self.stdout.write(self.style.SUCCESS(f"Site {site.slug}: created={len(site_report['created'])} updated={len(site_report['updated'])} unchanged={len(site_report['unchanged'])} (from GitHub). github_files={unique_github_files} db_repo_paths={db_repo_paths}"))
                 continue
 
@@ -740,7 +744,7 @@ class Command(BaseCommand):
                         # Avoid triggering post_save export/publish hooks while importing
                         token = _SKIP_EXPORT.set(True)
                         try:
-                            p.save()
+                            p.save(validate=False)
                         finally:
                             _SKIP_EXPORT.reset(token)
                         self.stdout.write(self.style.SUCCESS(f"  Created: {rel_path} (id={p.pk})"))
@@ -765,9 +769,14 @@ class Command(BaseCommand):
                                 logger.exception("Failed to associate repo_path for post %s", post.pk)
 
             report["sites"][site.slug] = site_report
+            synced_site_ids.add(site.pk)
             # simple output summary per site
             self.stdout.write(self.style.SUCCESS(f"Site {site.slug}: created={len(site_report['created'])} updated={len(site_report['updated'])} unchanged={len(site_report['unchanged'])}"))
 
+        if apply_changes and synced_site_ids:
+            # ETag/Last-Modified e cache delle risposte (blog.services.versions) dei siti toccati
+            bump_site_versions(synced_site_ids)
+
         out_file = os.path.join(report_path, f"sync-report-{run_id}.json")
         with open(out_file, "w", encoding="utf-8") as fh:
             json.dump(report, fh, indent=2, ensure_ascii=False)
@@ -808,37 +817,52 @@ class Command(BaseCommand):
             except Exception:
                 logger.exception("Failed to dump posts")
 
-            # For each post, optionally archive file in repo then delete DB row
+            posts_to_delete = list(Post.objects.filter(pk__in=pks).select_related("site"))
+            found = {p.pk for p in posts_to_delete}
             for pk in pks:
-                try:
-                    post = Post.objects.get(pk=pk)
-                except Post.DoesNotExist:
+                if pk not in found:
                     self.stdout.write(self.style.WARNING(f"Post {pk} does not exist, skipping"))
-                    continue
-                site = post.site
-                repo = (site.repo_path or "").strip()
-                repo_file = post.repo_path or post.last_export_path or None
-                if repo_file and repo and os.path.isdir(repo):
-                    full_path = os.path.join(repo, repo_file)
-                else:
-                    full_path = None
 
-                if delete_mode == "repo-and-db" and full_path and os.path.exists(full_path):
-                    # archive file inside repo
-                    archive_dir = os.path.join(repo, "archive", run_id)
-                    os.makedirs(archive_dir, exist_ok=True)
-                    dest = os.path.join(archive_dir, os.path.basename(full_path))
-                    try:
-                        shutil.move(full_path, dest)
-                        # commit the change
+            repo_results = {}
+            if delete_mode == "repo-and-db" and posts_to_delete:
+                # keep a copy of the local files next to the DB dump before they disappear
+                files_backup = os.path.join(backups_dir, "files")
+                for post in posts_to_delete:
+                    repo = (post.site.repo_path or "").strip()
+                    repo_file = post.repo_path or post.last_export_path or None
+                    if repo_file and repo and os.path.isfile(os.path.join(repo, repo_file)):
                         try:
-                            subprocess.run(["git", "add", "--all"], cwd=repo, check=False)
-                            subprocess.run(["git", "commit", "-m", f"chore(blog): archive deleted post {post.slug} ({run_id})"], cwd=repo, check=False)
+                            os.makedirs(files_backup, exist_ok=True)
+                            shutil.copy2(os.path.join(repo, repo_file), os.path.join(files_backup, f"{post.pk}-{os.path.basename(repo_file)}"))
                         except Exception:
-                            logger.exception("Git operations failed for archiving %s", full_path)
-                        self.stdout.write(self.style.SUCCESS(f"Archived {full_path} -> {dest}"))
-                    except Exception:
-                        logger.exception("Failed to archive %s", full_path)
+                            logger.exception("Failed to backup %s", repo_file)
+
+                # remove every file from the repo with one commit per repo and one local pull
+                from blog.services.github_ops import delete_posts_from_repo
+
+                try:
+                    repo_results = delete_posts_from_repo(
+                        posts_to_delete,
+                        message=f"chore(blog): delete {len(posts_to_delete)} posts ({run_id})",
+                        sync_local=True,
+                    )
+                except Exception as e:
+                    logger.exception("Batch repo deletion failed")
+                    repo_results = {p.pk: {"status": "error", "message": str(e)} for p in posts_to_delete}
+
+            for post in posts_to_delete:
+                pk = post.pk
+                if delete_mode == "repo-and-db":
+                    res = repo_results.get(pk) or {}
+                    status = res.get("status")
+                    if status in ("no_repo_path", "no_owner_repo"):
+                        # nessun file nel repo da rimuovere: si cancella solo la riga
+                        self.stdout.write(self.style.WARNING(f"Post {pk} has nothing in the repo ({status}), deleting from DB only"))
+                    elif status not in ("deleted", "already_absent"):
+                        self.stdout.write(self.style.ERROR(f"Post {pk} not deleted from repo ({status}): {res.get('message') or ''}"))
+                        continue
+                    else:
+                        self.stdout.write(self.style.SUCCESS(f"Post {pk} repo status: {status} {res.get('path') or ''}"))
 
                 # finally delete from DB
                 try:
@@ -849,7 +873,7 @@ class Command(BaseCommand):
 
             # record audit for deletion
             try:
-                ExportAudit.objects.create(run_id=run_id, action=f"delete:{delete_mode}", site=None, summary={"pks": pks})
+                ExportAudit.objects.create(run_id=run_id, action=f"delete:{delete_mode}", site=None, summary={"pks": pks, "repo": {str(k): v.get("status") for k, v in repo_results.items()}})
             except Exception:
                 logger.exception("Unable to write ExportAudit record for delete")
 
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0039_add_preview_url"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="preview_hash",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="sha256 dell'ultimo contenuto esportato in preview",
+                max_length=64,
+            ),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="preview_blob_sha",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="Git blob SHA dell'ultimo file di preview (preview/<id>/index.md)",
+                max_length=40,
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0040_post_preview_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="frontmatter_hash",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="sha256 di sito + front-matter dell'ultima derivazione delle categorie",
+                max_length=64,
+            ),
+        ),
+    ]
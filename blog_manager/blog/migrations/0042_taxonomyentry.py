@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0041_post_frontmatter_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaxonomyEntry",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("cluster", models.CharField(max_length=200)),
+                ("subcluster", models.CharField(max_length=200)),
+                ("post_count", models.PositiveIntegerField(default=0)),
+                ("examples", models.JSONField(blank=True, default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("posts", models.ManyToManyField(blank=True, related_name="taxonomy_entries", to="blog.post")),
+                (
+                    "site",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="taxonomy_entries", to="blog.site"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["cluster", "subcluster"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("site", "cluster", "subcluster"), name="unique_taxonomy_site_cluster_sub"
+                    )
+                ],
+            },
+        ),
+    ]
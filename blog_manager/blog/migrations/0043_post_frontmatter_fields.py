@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0042_taxonomyentry"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="cluster_slug",
+            field=models.SlugField(
+                blank=True, default="", help_text="Cluster primario (primo valore di 'categories')", max_length=200
+            ),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="frontmatter",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="subcluster_slug",
+            field=models.SlugField(
+                blank=True, default="", help_text="Subcluster primario dal front-matter", max_length=200
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(fields=["site", "cluster_slug", "subcluster_slug"], name="idx_post_site_cluster_sub"),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.6 on 2026-10-19 11:40
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+
+FTS_SQL = [
+    # external-content FTS5 table: il testo resta in blog_post, l'indice è mantenuto dai trigger
+    "CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts USING fts5("
+    "title, content, content='blog_post', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS blog_post_fts_ai AFTER INSERT ON blog_post BEGIN "
+    "INSERT INTO blog_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS blog_post_fts_ad AFTER DELETE ON blog_post BEGIN "
+    "INSERT INTO blog_post_fts(blog_post_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS blog_post_fts_au AFTER UPDATE OF title, content ON blog_post BEGIN "
+    "INSERT INTO blog_post_fts(blog_post_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content); "
+    "INSERT INTO blog_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content); END",
+    "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('rebuild')",
+]
+
+FTS_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS blog_post_fts_ai",
+    "DROP TRIGGER IF EXISTS blog_post_fts_ad",
+    "DROP TRIGGER IF EXISTS blog_post_fts_au",
+    "DROP TABLE IF EXISTS blog_post_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor == "sqlite":
+        with conn.cursor() as c:
+            try:
+                c.execute(FTS_SQL[0])
+            except OperationalError:
+                # SQLite compilato senza FTS5: la ricerca usa il fallback LIKE
+                return
+            for sql in FTS_SQL[1:]:
+                c.execute(sql)
+    elif conn.vendor == "mysql":
+        with conn.cursor() as c:
+            c.execute("ALTER TABLE blog_post ADD FULLTEXT INDEX ft_post_title_content (title, content)")
+
+
+def drop_search_index(apps, schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor == "sqlite":
+        with conn.cursor() as c:
+            for sql in FTS_DROP_SQL:
+                c.execute(sql)
+    elif conn.vendor == "mysql":
+        with conn.cursor() as c:
+            c.execute("ALTER TABLE blog_post DROP INDEX ft_post_title_content")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0043_post_frontmatter_fields"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0044_post_search_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(fields=["published_at", "id"], name="idx_post_published_id"),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(fields=["site", "published_at", "id"], name="idx_post_site_published_id"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0045_post_published_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="site",
+            name="content_version",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
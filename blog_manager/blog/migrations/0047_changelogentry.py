@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0046_site_content_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChangeLogEntry",
+            fields=[
+                ("seq", models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("post", "Post"), ("category", "Category"), ("site", "Site"), ("log", "Log")],
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "op",
+                    models.CharField(
+                        choices=[("upsert", "Upsert"), ("delete", "Delete"), ("truncate", "Truncate")], max_length=16
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("site_id", models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ("data", models.JSONField(blank=True, default=dict)),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                "ordering": ["seq"],
+                "indexes": [models.Index(fields=["kind", "object_id", "seq"], name="idx_changelog_object")],
+            },
+        ),
+    ]
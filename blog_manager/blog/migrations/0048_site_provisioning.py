@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:40
+
+from django.db import migrations, models
+
+
+def mark_existing_ready(apps, schema_editor):
+    # i siti esistenti hanno già avuto la working copy dal vecchio Site.save() sincrono
+    Site = apps.get_model("blog", "Site")
+    Site.objects.update(provision_status="ready", provision_progress=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0047_changelogentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="site",
+            name="provision_message",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.AddField(
+            model_name="site",
+            name="provision_progress",
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text="0-100"),
+        ),
+        migrations.AddField(
+            model_name="site",
+            name="provision_status",
+            field=models.CharField(
+                choices=[("pending", "Pending"), ("cloning", "Cloning"), ("ready", "Ready"), ("failed", "Failed")],
+                db_index=True,
+                default="pending",
+                editable=False,
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="site",
+            name="provision_updated_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="site",
+            name="provisioned_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(mark_existing_ready, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 
+import copy
 import re
 import unicodedata
 import uuid as uuid_lib
@@ -16,7 +17,6 @@ from django.utils.text import slugify as dj_slugify, slugify
 import os
 
 from .utils.seo import slugify_title
-import subprocess
 
 
 def upload_to_post_image(instance, filename):
@@ -74,6 +74,29 @@ class Site(models.Model):
         default="external",
         help_text="How to handle post images: external URLs or commit assets in repo.",
     )
+    # Marker di versione dei contenuti (post/categorie) del sito, bumpato dai signal:
+    # base di ETag/Last-Modified delle API di lettura (blog.services.versions)
+    content_version = models.BigIntegerField(default=0, editable=False)
+
+    # Provisioning della working copy (blog.services.provisioning), fuori dalla request:
+    # pending -> cloning -> ready | failed
+    PROVISION_PENDING = "pending"
+    PROVISION_CLONING = "cloning"
+    PROVISION_READY = "ready"
+    PROVISION_FAILED = "failed"
+    PROVISION_STATUS_CHOICES = [
+        (PROVISION_PENDING, "Pending"),
+        (PROVISION_CLONING, "Cloning"),
+        (PROVISION_READY, "Ready"),
+        (PROVISION_FAILED, "Failed"),
+    ]
+    provision_status = models.CharField(
+        max_length=10, choices=PROVISION_STATUS_CHOICES, default=PROVISION_PENDING, db_index=True, editable=False
+    )
+    provision_progress = models.PositiveSmallIntegerField(default=0, editable=False, help_text="0-100")
+    provision_message = models.TextField(blank=True, default="", editable=False)
+    provision_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+    provisioned_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     def clean(self):
         from django.core.exceptions import ValidationError
@@ -84,133 +107,61 @@ class Site(models.Model):
             self.posts_dir = self.posts_dir.strip().strip("/")
         if self.media_dir:
             self.media_dir = self.media_dir.strip().strip("/")
+        # percorsi relativi alla working copy: niente assoluti né risalite
+        for name in ("posts_dir", "media_dir"):
+            value = getattr(self, name) or ""
+            if value.startswith("~") or "\\" in value or ".." in value.split("/"):
+                raise ValidationError({name: f"{name} deve essere un percorso relativo al repo: {value!r}"})
         if self.repo_path:
             self.repo_path = self.repo_path.strip()
         if not self.slug:
             self.slug = slugify(self.name) or slugify(self.domain) or "site"
 
+    # campi che determinano la working copy: se cambiano il sito torna "pending"
+    REPO_FIELDS = ("repo_path", "repo_owner", "repo_name", "default_branch", "posts_dir", "media_dir")
+    # scritti solo dal worker (UPDATE condizionali) o quando il sito torna "pending"
+    PROVISION_FIELDS = ("provision_status", "provision_progress", "provision_message",
+                        "provision_updated_at", "provisioned_at")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_repo = {f: instance.__dict__.get(f) for f in cls.REPO_FIELDS}
+        return instance
+
+    def _repo_changed(self):
+        loaded = getattr(self, "_loaded_repo", None)
+        if self._state.adding or loaded is None:
+            return True
+        return any(self.__dict__.get(f) != loaded[f] for f in self.REPO_FIELDS if f in loaded)
+
     def save(self, *a, **kw):
+        """Write the row only: the git working copy is prepared by blog.services.provisioning.
+
+        A new site, or one whose repository settings changed, goes back to
+        "pending"; the post_save receiver hands it to the provisioning worker
+        once the transaction commits.
+        """
         if not self.slug:
             self.slug = slugify(self.name) or slugify(self.domain) or "site"
-        if not self.slug:
-            base = slugify(self.name) or slugify(self.domain) or f"site{getattr(self,'pk','') or ''}"
-            self.slug = base
-
-    # If repo_path not set, attempt to use BLOG_REPO_BASE/<slug> as fallback.
-    # If the directory exists we set repo_path. Try to create the fallback
-    # directory as a best-effort even in non-DEBUG environments so that
-    # automated import/sync operations can proceed on managed hosts.
-        try:
-            from django.conf import settings
-
-            if not (self.repo_path and str(self.repo_path).strip()):
-                blog_base = getattr(settings, "BLOG_REPO_BASE", None)
-                if blog_base:
-                    candidate = os.path.join(blog_base, self.slug)
-                    # If it already exists, use it
-                    if os.path.isdir(candidate):
-                        self.repo_path = candidate
-                    else:
-                        # Best-effort create fallback path so imports can write
-                        # into a managed location. Do not raise on failure.
-                        try:
-                            os.makedirs(candidate, exist_ok=True)
-                            self.repo_path = candidate
-                        except Exception:
-                            # ignore creation failures (might be permission issues)
-                            pass
-        except Exception:
-            # if settings not available or any error, continue without setting repo_path
-            pass
-
+        update_fields = kw.get("update_fields")
+        self._provision_requested = False
+        if (update_fields is None or set(update_fields) & set(self.REPO_FIELDS)) and self._repo_changed():
+            self.provision_status = self.PROVISION_PENDING
+            self.provision_progress = 0
+            self.provision_message = ""
+            self._provision_requested = True
+            if update_fields is not None:
+                kw["update_fields"] = set(update_fields) | {"provision_status", "provision_progress", "provision_message"}
+        elif update_fields is None and not self._state.adding and not kw.get("force_insert"):
+            # istanza letta prima che il worker finisse (es. form admin aperto): i suoi
+            # provision_* sono vecchi e riscriverli riporterebbe il sito indietro
+            kw["update_fields"] = [
+                f.attname for f in self._meta.concrete_fields
+                if not f.primary_key and f.attname not in self.PROVISION_FIELDS
+            ]
         super().save(*a, **kw)
-
-        # Ensure a local git working copy exists and origin is configured.
-        # If the directory is empty and repo_owner/repo_name are set, try to clone.
-        # Otherwise, initialize a git repo and add origin if missing.
-        try:
-            repo = (self.repo_path or "").strip()
-            # If an explicit repo_path is provided, do NOT auto-create it here.
-            # Only operate on the working copy if the directory already exists.
-            if repo and os.path.isdir(repo):
-                git_dir = os.path.join(repo, ".git")
-                remote = None
-                if getattr(self, "repo_owner", None) and getattr(self, "repo_name", None):
-                    remote = f"https://github.com/{self.repo_owner}/{self.repo_name}.git"
-                if not os.path.isdir(git_dir):
-                    # If directory appears empty and we have a remote, try to clone
-                    try:
-                        entries = os.listdir(repo)
-                    except Exception:
-                        entries = []
-                    if (not entries) and remote:
-                        try:
-                            subprocess.run(["git", "clone", remote, repo], check=True)
-                        except Exception:
-                            # fallback: init and add origin
-                            try:
-                                subprocess.run(["git", "init"], cwd=repo, check=True)
-                                if remote:
-                                    subprocess.run(["git", "remote", "add", "origin", remote], cwd=repo, check=False)
-                            except Exception:
-                                pass
-                    else:
-                        # non-empty or no remote: ensure git init and origin present if possible
-                        try:
-                            subprocess.run(["git", "init"], cwd=repo, check=True)
-                            if remote:
-                                # add origin only if not present
-                                rc = subprocess.run(["git", "remote", "get-url", "origin"], cwd=repo, capture_output=True, text=True)
-                                if rc.returncode != 0:
-                                    subprocess.run(["git", "remote", "add", "origin", remote], cwd=repo, check=False)
-                            # If repository has no commits yet, create an initial commit and attempt to push
-                            try:
-                                rc = subprocess.run(["git", "rev-parse", "HEAD"], cwd=repo, capture_output=True, text=True)
-                                if rc.returncode != 0:
-                                    # create a README if the directory is empty, otherwise add existing files
-                                    try:
-                                        entries = os.listdir(repo)
-                                    except Exception:
-                                        entries = []
-                                    if not entries:
-                                        with open(os.path.join(repo, "README.md"), "w", encoding="utf-8") as fh:
-                                            fh.write(f"# {self.slug}\n")
-                                        subprocess.run(["git", "add", "README.md"], cwd=repo, check=False)
-                                    else:
-                                        subprocess.run(["git", "add", "--all"], cwd=repo, check=False)
-                                    # commit (allow failure)
-                                    try:
-                                                # ensure minimal git config so commit can succeed
-                                                subprocess.run(["git", "config", "user.name", os.environ.get('GIT_COMMIT_NAME','blog-manager')], cwd=repo, check=False)
-                                                subprocess.run(["git", "config", "user.email", os.environ.get('GIT_COMMIT_EMAIL','blog-manager@example.com')], cwd=repo, check=False)
-                                                # set initial branch name to configured branch
-                                                initial_branch = os.environ.get('GIT_BRANCH', 'main')
-                                                subprocess.run(["git", "checkout", "-b", initial_branch], cwd=repo, check=False)
-                                                subprocess.run(["git", "commit", "-m", "chore(blog): initial commit"], cwd=repo, check=True)
-                                    except Exception:
-                                        # commit may fail if user identity is not configured; ignore
-                                        pass
-                                    # attempt push: prefer HTTPS push URL with token if available
-                                    try:
-                                                if remote and remote.startswith("https://"):
-                                                    token = os.environ.get("GIT_TOKEN")
-                                                    user = os.environ.get("GIT_USERNAME", "x-access-token")
-                                                    if token:
-                                                        push_url = remote.replace("https://", f"https://{user}:{token}@")
-                                                        subprocess.run(["git", "push", push_url, f"HEAD:{initial_branch}"], cwd=repo, check=False)
-                                                    else:
-                                                        subprocess.run(["git", "push", "origin", f"HEAD:{initial_branch}"] , cwd=repo, check=False)
-                                                else:
-                                                    subprocess.run(["git", "push", "origin", f"HEAD:{initial_branch}"], cwd=repo, check=False)
-                                    except Exception:
-                                        pass
-                            except Exception:
-                                pass
-                        except Exception:
-                            pass
-        except Exception:
-            # best-effort only; don't block save on git failures
-            pass
+        self._loaded_repo = {f: self.__dict__.get(f) for f in self.REPO_FIELDS}
 
     def __str__(self):
         return self.name
@@ -419,6 +370,30 @@ class Post(models.Model):
         null=True,
         help_text="URL permanente della preview del post (es. https://owner.github.io/repo/preview/625/)",
     )
+    # Hash + git blob sha dell'ultimo contenuto inviato in preview (skip commit se invariato)
+    preview_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        help_text="sha256 dell'ultimo contenuto esportato in preview",
+    )
+    preview_blob_sha = models.CharField(
+        max_length=40,
+        blank=True,
+        default="",
+        help_text="Git blob SHA dell'ultimo file di preview (preview/<id>/index.md)",
+    )
+    # Fingerprint del blocco front-matter già derivato in categorie (skip se invariato)
+    frontmatter_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        help_text="sha256 di sito + front-matter dell'ultima derivazione delle categorie",
+    )
+    # Front-matter parsato e persistito al save (niente YAML in lettura)
+    frontmatter = models.JSONField(default=dict, blank=True)
+    cluster_slug = models.SlugField(max_length=200, blank=True, default="", help_text="Cluster primario (primo valore di 'categories')")
+    subcluster_slug = models.SlugField(max_length=200, blank=True, default="", help_text="Subcluster primario dal front-matter")
 
     # Compat alias: exporter usa export_hash ma il campo DB si chiama exported_hash
     @property
@@ -429,74 +404,134 @@ class Post(models.Model):
     def export_hash(self, value):  # pragma: no cover
         self.exported_hash = value
 
-    def clean(self):
+    # --- dirty tracking: valori persistiti dei campi, base di changed_fields() ---------
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._remember_loaded(None if fields is None else self._attnames(fields), refresh=True)
+
+    @classmethod
+    def _attnames(cls, names):
+        return {cls._meta.get_field(n).attname for n in names}
+
+    def _remember_loaded(self, attnames=None, refresh=False):
+        loaded = getattr(self, "_loaded_values", None)
+        if attnames is not None and loaded is None and not refresh:
+            return  # istanza mai letta dal DB: un save parziale non la rende tracciabile
+        loaded = dict(loaded or {})
+        for f in self._meta.concrete_fields:
+            if f.attname not in self.__dict__ or (attnames is not None and f.attname not in attnames):
+                continue  # campo deferred o non salvato
+            value = self.__dict__[f.attname]
+            loaded[f.attname] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+        self._loaded_values = loaded
+
+    def changed_fields(self):
+        """Attnames of the concrete fields changed since the row was loaded or saved.
+
+        None when the post is new or wasn't loaded from the DB: everything counts as changed.
+        """
+        loaded = getattr(self, "_loaded_values", None)
+        if self._state.adding or loaded is None:
+            return None
+        return {name for name, old in loaded.items() if name in self.__dict__ and self.__dict__[name] != old}
+
+    # --- validazione: invarianti sempre, controlli costosi solo sui campi cambiati ------
+
+    def check_invariants(self):
+        """Cheap checks with no I/O, run on every save (also with validate=False)."""
         from django.core.exceptions import ValidationError
 
         if self.status == "published" and (not self.published_at):
             raise ValidationError("published_at is required when status is published.")
         if self.status == "published" and not self.is_published:
             raise ValidationError("is_published must be True when status is published.")
-        if self.status == "review" and not self.reviewed_by:
+        if self.status == "review" and not self.reviewed_by_id:
             raise ValidationError("reviewed_by is required when status is review.")
-        # Export safety: require working copy present (direct or fallback) when published
-        if self.status == "published":
-            site = getattr(self, "site", None)
-            if not site:
-                raise ValidationError({"site": "Site richiesto per pubblicare."})
-            repo_path = (site.repo_path or "").strip()
-            from django.conf import settings
-            fallback = None
-            if not repo_path and getattr(settings, "BLOG_REPO_BASE", None):
-                fallback = os.path.join(settings.BLOG_REPO_BASE, site.slug)
-            if repo_path and not os.path.isdir(repo_path):
-                # If the user explicitly configured a repo_path that does not exist,
-                # consider this a configuration error and fail validation. Do not
-                # attempt to create arbitrary paths on behalf of the user here.
-                raise ValidationError({"site": f"repo_path inesistente: {repo_path}"})
-            if (not repo_path) and fallback and not os.path.isdir(fallback):
-                # Best-effort: try to create the fallback directory so sync can proceed.
-                try:
-                    os.makedirs(fallback, exist_ok=True)
-                except Exception as e:
-                    import logging
-
-                    logging.getLogger(__name__).warning(
-                        "Could not create fallback repo path %s: %s", fallback, e
-                    )
-                    raise ValidationError({
-                        "site": "Configura repo_path o crea directory fallback BLOG_REPO_BASE/<slug>."
-                    })
-
-                # If creation succeeded, persist it on the site (best-effort)
-                try:
-                    site.repo_path = fallback
-                    site.save()
-                except Exception:
-                    # ignore persistence failures; directory exists and that's sufficient
-                    pass
-
-                # final check: if still not a directory, raise
-                if not os.path.isdir(fallback):
-                    raise ValidationError({
-                        "site": "Configura repo_path o crea directory fallback BLOG_REPO_BASE/<slug>."
-                    })
 
+    def clean(self):
+        self.check_invariants()
+        changed = self.changed_fields()
+        # Export safety (filesystem): solo quando il post diventa published o cambia sito
+        if self.status == "published" and (changed is None or {"status", "site_id"} & changed):
+            self._check_repo_available()
+        # Slug immutabile una volta pubblicato: solo se lo slug cambia
+        if getattr(self, 'pk', None) and getattr(self, 'slug_locked', False) and (changed is None or "slug" in changed):
+            self._check_slug_lock()
+
+    def _check_repo_available(self):
+        """Require the site's working copy (repo_path or BLOG_REPO_BASE/<slug>) to publish."""
+        from django.core.exceptions import ValidationError
+
+        site = getattr(self, "site", None)
+        if not site:
+            raise ValidationError({"site": "Site richiesto per pubblicare."})
+        repo_path = (site.repo_path or "").strip()
+        from django.conf import settings
+        fallback = None
+        if not repo_path and getattr(settings, "BLOG_REPO_BASE", None):
+            fallback = os.path.join(settings.BLOG_REPO_BASE, site.slug)
+        if repo_path and not os.path.isdir(repo_path):
+            # If the user explicitly configured a repo_path that does not exist,
+            # consider this a configuration error and fail validation. Do not
+            # attempt to create arbitrary paths on behalf of the user here.
+            raise ValidationError({"site": f"repo_path inesistente: {repo_path}"})
+        if (not repo_path) and fallback and not os.path.isdir(fallback):
+            # Best-effort: try to create the fallback directory so sync can proceed.
+            try:
+                os.makedirs(fallback, exist_ok=True)
+            except Exception as e:
+                import logging
+
+                logging.getLogger(__name__).warning(
+                    "Could not create fallback repo path %s: %s", fallback, e
+                )
+                raise ValidationError({
+                    "site": "Configura repo_path o crea directory fallback BLOG_REPO_BASE/<slug>."
+                })
+
+            # If creation succeeded, persist it on the site (best-effort)
+            try:
+                site.repo_path = fallback
+                site.save()
+            except Exception:
+                # ignore persistence failures; directory exists and that's sufficient
+                pass
+
+            # final check: if still not a directory, raise
+            if not os.path.isdir(fallback):
+                raise ValidationError({
+                    "site": "Configura repo_path o crea directory fallback BLOG_REPO_BASE/<slug>."
+                })
+
+    def _check_slug_lock(self):
         # Enforce slug immutability when locked: if this instance exists in DB
         # and slug_locked is True, disallow changing the slug value.
-        if getattr(self, 'pk', None) and getattr(self, 'slug_locked', False):
+        from django.core.exceptions import ValidationError
+
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is not None and "slug" in loaded:
+            old_slug = loaded["slug"]  # nessuna query: valore letto dal DB
+        else:
             try:
-                old = type(self).objects.get(pk=self.pk)
-                old_slug = getattr(old, 'slug', None)
+                old_slug = type(self).objects.values_list("slug", flat=True).get(pk=self.pk)
             except Exception:
                 old_slug = None
-            new_slug = getattr(self, 'slug', None)
-            if old_slug and new_slug and old_slug != new_slug:
-                raise ValidationError({
-                    'slug': (
-                        'Slug immutabile: questo post è stato pubblicato. '
-                        'Per rinominarlo crea una nuova bozza o usa lo strumento di rename+redirect.'
-                    )
-                })
+        new_slug = getattr(self, 'slug', None)
+        if old_slug and new_slug and old_slug != new_slug:
+            raise ValidationError({
+                'slug': (
+                    'Slug immutabile: questo post è stato pubblicato. '
+                    'Per rinominarlo crea una nuova bozza o usa lo strumento di rename+redirect.'
+                )
+            })
+
     # imports now at top-level
 
     @staticmethod
@@ -511,26 +546,39 @@ class Post(models.Model):
         return s
 
     @classmethod
-    def safe_slugify(cls, site_id: int, title: str, base_slug: str = None, max_len: int = 200) -> str:
+    def safe_slugify(cls, site_id: int, title: str, base_slug: str = None, max_len: int = 200,
+                     *, exclude_pk=None, reserved=()) -> str:
+        from .services.slugs import allocate_slug
         base = base_slug or dj_slugify(cls._normalize(title)) or "post"
-        base = base[:max_len].strip("-")
-        candidate = base
-        i = 2
-        while cls.objects.filter(site_id=site_id, slug=candidate).exists():
-            suffix = f"-{i}"
-            cut = max_len - len(suffix)
-            candidate = f"{base[:cut].rstrip('-')}{suffix}"
-            i += 1
-        return candidate
-
-    def save(self, *args, **kwargs):
+        return allocate_slug(site_id, base, exclude_pk=exclude_pk, reserved=reserved, max_len=max_len)
+
+    def refresh_frontmatter_fields(self):
+        """Fill frontmatter/cluster_slug/subcluster_slug from the content's front-matter."""
+        from .utils import frontmatter_fields
+        self.frontmatter, self.cluster_slug, self.subcluster_slug = frontmatter_fields(self.content)
+
+    def save(self, *args, validate=True, **kwargs):
+        """Normalize, validate and save.
+
+        Validation is proportional to what changed (see changed_fields()): the
+        invariants always run, the filesystem/slug-lock checks of clean(), the
+        relation lookups and the (site, slug) uniqueness query only when the
+        fields they depend on change. validate=False (bulk/sync paths that
+        already checked their input) skips full_clean() and keeps only
+        check_invariants().
+        """
         # Autogenerazione slug se mancante o vuoto
-        site_id = self.site.pk
+        from .services.slugs import auto_slug_base
+        site_id = self.site_id or self.site.pk
+        slug_base = None  # valorizzato se lo slug è allocato: riallocabile in caso di corsa
         if not self.slug:
-            self.slug = self.safe_slugify(site_id=site_id, title=self.title)
+            slug_base = dj_slugify(self._normalize(self.title)) or "post"
+            self.slug = self.safe_slugify(site_id=site_id, title=self.title, base_slug=slug_base)
         else:
             self.slug = self._normalize(self.slug)
             self.slug = dj_slugify(self.slug)[:200].strip("-") or "post"
+            if self._state.adding:
+                slug_base = auto_slug_base(site_id, self.slug)
         # Normalizza campi di pubblicazione prima della validazione
         if self.status == "published":
             # Se manca published_at lo settiamo ora
@@ -546,10 +594,46 @@ class Post(models.Model):
             if self.is_published and self.status != "published":
                 # Evita incoerenze silenziose: lasciamo is_published così com'è solo se user l'ha impostato.
                 pass
-        self.full_clean()
-        from django.db import transaction
-        with transaction.atomic():
-            super().save(*args, **kwargs)
+        changed = self.changed_fields()
+        # Front-matter persistito: riparsato solo quando il contenuto è cambiato
+        update_fields = kwargs.get("update_fields")
+        if (update_fields is None or "content" in update_fields) and (changed is None or "content" in changed):
+            self.refresh_frontmatter_fields()
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | {"frontmatter", "cluster_slug", "subcluster_slug"}
+        if validate:
+            # unicità (site, slug) solo se cambiano; slug allocato: la garantisce l'insert (con retry)
+            check_slug = slug_base is None and (changed is None or bool({"slug", "site_id"} & changed))
+            self.full_clean(exclude=self._unchanged_relations(changed, keep_site=check_slug),
+                            validate_constraints=check_slug)
+        else:
+            self.check_invariants()
+        from django.db import IntegrityError, transaction
+        from .services.slugs import SLUG_RETRIES, is_slug_conflict
+        reserved = set()
+        for attempt in range(SLUG_RETRIES):
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                break
+            except IntegrityError as e:
+                # create concorrente con lo stesso slug: riallocazione escludendo quelli falliti
+                if slug_base is None or attempt == SLUG_RETRIES - 1 or not is_slug_conflict(e):
+                    raise
+                reserved.add(self.slug)
+                self.slug = self.safe_slugify(site_id=site_id, title=self.title, base_slug=slug_base, reserved=reserved)
+
+        update_fields = kwargs.get("update_fields")
+        self._remember_loaded(None if update_fields is None else self._attnames(update_fields))
+
+    def _unchanged_relations(self, changed, keep_site=False):
+        # ForeignKey.validate() fa una query per ogni relazione: solo se l'id è cambiato
+        if changed is None:
+            return None
+        return [
+            f.name for f in self._meta.concrete_fields
+            if f.is_relation and f.attname not in changed and not (keep_site and f.name == "site")
+        ] or None
 
     class Meta:
         constraints = [
@@ -557,6 +641,10 @@ class Post(models.Model):
         ]
         indexes = [
             models.Index(fields=["site", "slug"]),
+            models.Index(fields=["site", "cluster_slug", "subcluster_slug"], name="idx_post_site_cluster_sub"),
+            # keyset/cursor pagination on the default ordering
+            models.Index(fields=["published_at", "id"], name="idx_post_published_id"),
+            models.Index(fields=["site", "published_at", "id"], name="idx_post_site_published_id"),
         ]
         ordering = ["-published_at", "-id"]
 
@@ -695,6 +783,71 @@ class Tag(models.Model):
         ordering = ["slug"]
 
 
+class TaxonomyEntry(models.Model):
+    """Tassonomia materializzata (sito -> cluster -> subcluster) servita da TaxonomyView.
+
+    Mantenuta incrementalmente dai signal di Post (vedi blog/services/taxonomy.py)
+    e ricostruibile in blocco con `manage.py rebuild_taxonomy`.
+    """
+    site = models.ForeignKey(Site, on_delete=models.CASCADE, related_name="taxonomy_entries")
+    cluster = models.CharField(max_length=200)
+    subcluster = models.CharField(max_length=200)
+    post_count = models.PositiveIntegerField(default=0)
+    # [[post_id, title], ...] dei primi post (per id), usati come esempi
+    examples = models.JSONField(default=list, blank=True)
+    posts = models.ManyToManyField("Post", related_name="taxonomy_entries", blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.cluster}/{self.subcluster} ({self.post_count})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["site", "cluster", "subcluster"],
+                name="unique_taxonomy_site_cluster_sub",
+            ),
+        ]
+        ordering = ["cluster", "subcluster"]
+
+
+class ChangeLogEntry(models.Model):
+    """Log append-only delle modifiche a post, categorie e siti (feed /api/blog/changes/).
+
+    `seq` è la sequenza monotona usata come cursore; le righe sono scritte dai
+    signal (vedi blog/services/changes.py) e compattate con `manage.py compact_changes`.
+    `site_id` e `object_id` non sono FK: il log sopravvive alla cancellazione (tombstone).
+    """
+    KIND_CHOICES = [
+        ("post", "Post"),
+        ("category", "Category"),
+        ("site", "Site"),
+        ("log", "Log"),
+    ]
+    OP_CHOICES = [
+        ("upsert", "Upsert"),
+        ("delete", "Delete"),
+        ("truncate", "Truncate"),
+    ]
+    seq = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    op = models.CharField(max_length=16, choices=OP_CHOICES)
+    object_id = models.BigIntegerField()
+    site_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+    # delta compatto (upsert) o tombstone con gli identificativi (delete)
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["seq"]
+        indexes = [
+            models.Index(fields=["kind", "object_id", "seq"], name="idx_changelog_object"),
+        ]
+
+    def __str__(self):
+        return f"#{self.seq} {self.kind}:{self.object_id} {self.op}"
+
+
 @receiver(pre_save, sender=Post)
 def post_autofill(sender, instance, **kwargs):
     # Mantieni solo logica minima: genera slug se mancante.
@@ -12,10 +12,16 @@ Key differences from production export:
 - Simplified front-matter (minimal required fields only)
 """
 
+import hashlib
 import logging
 import os
+import re
+import threading
+from concurrent.futures import Future
 from typing import Optional
 
+import markdown
+import nh3
 from django.conf import settings
 from django.utils import timezone
 
@@ -31,6 +37,11 @@ from .exporter import (
 
 logger = logging.getLogger(__name__)
 
+# In-flight preview exports keyed by post id: concurrent requests for the same post
+# wait on the first one and receive its result instead of committing again.
+_INFLIGHT = {}
+_INFLIGHT_LOCK = threading.Lock()
+
 
 def build_preview_path(site, post) -> str:
     """
@@ -210,6 +221,76 @@ def render_preview_content(post, site) -> str:
     return fm + "\n" + body
 
 
+# Cache timeout for locally rendered previews (keyed by content hash, so entries never go stale)
+LOCAL_PREVIEW_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Tag/attributi ammessi nell'HTML dell'anteprima: default di nh3 più titoli di link/immagini,
+# classe del linguaggio sui blocchi di codice e id delle note (estensione "extra")
+_PREVIEW_ATTRIBUTES = {tag: set(attrs) for tag, attrs in nh3.ALLOWED_ATTRIBUTES.items()}
+_PREVIEW_ATTRIBUTES["a"] = _PREVIEW_ATTRIBUTES.get("a", set()) | {"title"}
+_PREVIEW_ATTRIBUTES["img"] = _PREVIEW_ATTRIBUTES.get("img", set()) | {"title"}
+_PREVIEW_ATTRIBUTES.update({"code": {"class"}, "sup": {"id"}, "li": {"id"}})
+
+
+def markdown_to_html(text: str) -> str:
+    """Convert markdown to HTML in-process with Python-Markdown and sanitize it with nh3.
+
+    Raw HTML in the source is kept as far as the sanitizer allows: scripts,
+    event handlers and javascript:/data: URLs never reach the output.
+    """
+    out = markdown.markdown(text or "", extensions=["extra", "sane_lists"])
+    return nh3.clean(out, attributes=_PREVIEW_ATTRIBUTES)
+
+
+def render_local_preview(post, site=None) -> dict:
+    """
+    Render a post preview locally: preview markdown (with link resolution) -> HTML.
+    
+    No GitHub access is needed. The HTML is cached by the hash of the rendered
+    markdown, so repeated previews of unchanged content are served from cache.
+    
+    Returns:
+        dict with keys: post_id, title, front_matter, html, content_hash, cached
+        
+    Raises:
+        FrontMatterValidationError: If validation or link resolution fails
+    """
+    import yaml
+    from django.core.cache import cache
+
+    if site is None:
+        site = getattr(post, 'site', None)
+    content = render_preview_content(post, site)
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    cache_key = f"preview:local:{content_hash}"
+
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return dict(cached, post_id=getattr(post, 'id', None), cached=True)
+
+    fm = {}
+    m = re.match(r"^---\n(.*?)\n?---\n", content, re.S)
+    body = content
+    if m:
+        try:
+            fm = yaml.safe_load(m.group(1)) or {}
+        except Exception:
+            fm = {}
+        body = content[m.end():]
+    title = fm.get("title") if isinstance(fm, dict) else None
+    data = {
+        "title": title or getattr(post, 'title', ''),
+        "front_matter": fm if isinstance(fm, dict) else {},
+        "html": markdown_to_html(body),
+        "content_hash": content_hash,
+    }
+    try:
+        cache.set(cache_key, data, LOCAL_PREVIEW_CACHE_TIMEOUT)
+    except Exception:
+        logger.warning("[preview.local] cache set failed for post_id=%s", getattr(post, 'id', None))
+    return dict(data, post_id=getattr(post, 'id', None), cached=False)
+
+
 def build_preview_url(post, site) -> str:
     """
     Build the full preview URL for a post.
@@ -244,6 +325,10 @@ def export_post_to_preview(post, site=None) -> dict:
     This exports to the site's own Jekyll repository (Site.repo_owner/repo_name)
     in a dedicated preview/<post_id>/ directory, maintaining the site's theme.
     
+    If the rendered content matches the last preview (Post.preview_hash) no commit
+    is made. Concurrent calls for the same post are coalesced: only the first one
+    talks to GitHub, the others wait and get the same result (or exception).
+    
     Args:
         post: Post instance to export
         site: Site instance (optional, will use post.site if not provided)
@@ -252,13 +337,43 @@ def export_post_to_preview(post, site=None) -> dict:
         dict with keys:
             - preview_url: Full URL to preview the post
             - preview_path: Relative path in site's repo
-            - commit_sha: Git commit SHA
+            - commit_sha: Git commit SHA (None when unchanged)
             - content_sha: GitHub content SHA
+            - unchanged: True if the commit was skipped
             
     Raises:
         ValueError: If preview is disabled or configuration is missing
         FrontMatterValidationError: If content validation fails
     """
+    post_id = getattr(post, 'id', None)
+    if post_id is None:
+        return _export_post_to_preview(post, site)
+
+    with _INFLIGHT_LOCK:
+        future = _INFLIGHT.get(post_id)
+        leader = future is None
+        if leader:
+            future = Future()
+            _INFLIGHT[post_id] = future
+
+    if not leader:
+        logger.info("[preview.export] coalesced: post_id=%s waiting for in-flight export", post_id)
+        return dict(future.result())
+
+    try:
+        result = _export_post_to_preview(post, site)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(post_id, None)
+
+
+def _export_post_to_preview(post, site=None) -> dict:
     # Check if preview is enabled
     if not getattr(settings, 'PREVIEW_ENABLED', True):
         raise ValueError("Preview functionality is disabled (PREVIEW_ENABLED=False)")
@@ -307,6 +422,24 @@ def export_post_to_preview(post, site=None) -> dict:
             post_id, preview_path
         )
         
+        # Skip the commit (and the Pages build) if the content is byte-identical
+        from .services.drift import git_blob_sha
+
+        new_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        if (
+            new_hash == (getattr(post, 'preview_hash', '') or '')
+            and getattr(post, 'preview_blob_sha', '')
+            and getattr(post, 'preview_url', None)
+        ):
+            logger.info("[preview.export] unchanged: post_id=%s, skipping commit", post_id)
+            return {
+                'preview_url': post.preview_url,
+                'preview_path': preview_path,
+                'commit_sha': None,
+                'content_sha': post.preview_blob_sha,
+                'unchanged': True,
+            }
+        
         # Export to GitHub
         gh_client = GitHubClient(token=git_token)
         commit_msg = f"preview: post {post_id} ({timezone.now().date()})"
@@ -323,6 +456,13 @@ def export_post_to_preview(post, site=None) -> dict:
         # Build preview URL
         preview_url = build_preview_url(post, site)
         
+        # Remember what is in preview now (queryset update: no signals, no updated_at bump)
+        blob_sha = result.get('content_sha') or git_blob_sha(content)
+        if post_id is not None:
+            type(post).objects.filter(pk=post_id).update(preview_hash=new_hash, preview_blob_sha=blob_sha)
+        post.preview_hash = new_hash
+        post.preview_blob_sha = blob_sha
+        
         logger.info(
             "[preview.export] success: post_id=%s commit_sha=%s preview_url=%s",
             post_id, result.get('commit_sha'), preview_url
@@ -333,6 +473,7 @@ def export_post_to_preview(post, site=None) -> dict:
             'preview_path': preview_path,
             'commit_sha': result.get('commit_sha'),
             'content_sha': result.get('content_sha'),
+            'unchanged': False,
         }
         
     except FrontMatterValidationError as e:
@@ -418,6 +559,12 @@ def delete_post_from_preview(post, site=None) -> dict:
             message=commit_msg
         )
         
+        # Forget the last preview content so the next export commits again
+        if post_id is not None:
+            type(post).objects.filter(pk=post_id).update(preview_hash="", preview_blob_sha="")
+        post.preview_hash = ""
+        post.preview_blob_sha = ""
+        
         logger.info(
             "[preview.delete] %s: post_id=%s preview_path=%s commit_sha=%s",
             result.get('status'), post_id, preview_path, result.get('commit_sha')
@@ -435,3 +582,100 @@ def delete_post_from_preview(post, site=None) -> dict:
             post_id, site_slug
         )
         raise
+
+
+def collect_stale_previews(site, entries, *, days: int = 7, now=None) -> dict:
+    """
+    Classify preview files of a site from a tree listing.
+    
+    Args:
+        site: Site instance
+        entries: tree entries (dicts with "path" and "type") under preview/
+        days: previews of posts not updated for more than `days` days are stale
+        
+    Returns:
+        dict {post_id_or_dirname: {"reason": "deleted"|"published"|"stale", "paths": [...]}}
+    """
+    from datetime import timedelta
+    from .models import Post
+
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=days)
+
+    by_dir = {}
+    for it in entries:
+        if it.get("type") != "file":
+            continue
+        parts = (it.get("path") or "").split("/")
+        if len(parts) < 3 or parts[0] != "preview":
+            continue
+        # preview/<post_id>/... ; "new" is the placeholder used for unsaved posts
+        if parts[1].isdigit() or parts[1] == "new":
+            by_dir.setdefault(parts[1], []).append(it["path"])
+
+    ids = [int(d) for d in by_dir if d.isdigit()]
+    posts = {
+        row["id"]: row
+        for row in Post.objects.filter(pk__in=ids, site=site).values("id", "status", "updated_at")
+    }
+
+    stale = {}
+    for d, paths in by_dir.items():
+        row = posts.get(int(d)) if d.isdigit() else None
+        if row is None:
+            reason = "deleted"
+        elif row["status"] == "published":
+            reason = "published"
+        elif row["updated_at"] and row["updated_at"] < cutoff:
+            reason = "stale"
+        else:
+            continue
+        stale[int(d) if d.isdigit() else d] = {"reason": reason, "paths": sorted(paths)}
+    return stale
+
+
+def gc_site_previews(site, *, days: int = 7, dry_run: bool = False, client: Optional[GitHubClient] = None) -> dict:
+    """
+    Remove stale preview/<post_id>/ entries of a site with a single commit.
+    
+    One tree call lists preview/, entries whose post is deleted, published or not
+    updated for `days` days are deleted together, then Post.preview_url (and the
+    stored preview hashes) are cleared with one UPDATE.
+    
+    Returns:
+        dict with keys: site, stale (see collect_stale_previews), commit_sha, cleared
+    """
+    from .models import Post
+
+    repo_owner = (getattr(site, 'repo_owner', '') or '').strip()
+    repo_name = (getattr(site, 'repo_name', '') or '').strip()
+    repo_branch = (getattr(site, 'default_branch', '') or 'main').strip()
+    if not repo_owner or not repo_name:
+        raise ValueError(f"Site {getattr(site, 'slug', 'unknown')} missing repo_owner or repo_name")
+
+    client = client or GitHubClient()
+    entries = client.get_tree(repo_owner, repo_name, branch=repo_branch, path="preview")
+    stale = collect_stale_previews(site, entries, days=days)
+    result = {"site": getattr(site, 'slug', None), "stale": stale, "commit_sha": None, "cleared": 0}
+    if not stale or dry_run:
+        return result
+
+    paths = [p for info in stale.values() for p in info["paths"]]
+    res = client.delete_files(
+        repo_owner, repo_name, paths,
+        branch=repo_branch,
+        message=f"preview: gc {len(stale)} stale preview(s)",
+    )
+    result["commit_sha"] = res.get("commit_sha")
+
+    post_ids = [k for k in stale if isinstance(k, int)]
+    if post_ids:
+        result["cleared"] = Post.objects.filter(pk__in=post_ids, site=site).update(
+            preview_url=None, preview_hash="", preview_blob_sha=""
+        )
+    logger.info(
+        "[preview.gc] site=%s removed=%s files=%s commit_sha=%s",
+        result["site"], len(stale), len(paths), result["commit_sha"]
+    )
+    return result
+
@@ -61,17 +61,9 @@ class PostWriteSerializer(serializers.ModelSerializer):
                 pass
         return attrs
 
-    def _unique_slug_for_site(self, site, base_slug: str) -> str:
-        slug = base_slug or ""
-        if not slug:
-            slug = "post"
-        candidate = slug
-        idx = 2
-        from .models import Post
-        while Post.objects.filter(site=site, slug=candidate).exists():
-            candidate = f"{slug}-{idx}"
-            idx += 1
-        return candidate
+    def _unique_slug_for_site(self, site, base_slug: str, exclude_pk=None) -> str:
+        from .services.slugs import allocate_slug
+        return allocate_slug(site.pk, base_slug or "post", exclude_pk=exclude_pk)
 
     def slugify(self, text: str) -> str:
         # Normalise and slugify text like other parts of the app
@@ -95,11 +87,14 @@ class PostWriteSerializer(serializers.ModelSerializer):
         site = validated_data.get("site")
         provided_slug = validated_data.get("slug")
         base_slug = self.slugify(provided_slug or title) if (provided_slug or title) else None
-        if site:
-            validated_data["slug"] = self._unique_slug_for_site(site, base_slug or "")
-        else:
-            validated_data["slug"] = base_slug or "post"
         try:
+            if site:
+                from .services.slugs import auto_slug
+                # Post.save rialloca lo slug se una create concorrente lo prende prima
+                with auto_slug(site.pk, base_slug or "post") as slug:
+                    validated_data["slug"] = slug
+                    return super().create(validated_data)
+            validated_data["slug"] = base_slug or "post"
             return super().create(validated_data)
         except Exception as e:
             # Convert Django model ValidationError into DRF ValidationError
@@ -118,7 +113,7 @@ class PostWriteSerializer(serializers.ModelSerializer):
         if new_slug is not None:
             base_slug = self.slugify(new_slug) if new_slug else self.slugify(validated_data.get("title") or instance.title or "")
             if site:
-                validated_data["slug"] = self._unique_slug_for_site(site, base_slug)
+                validated_data["slug"] = self._unique_slug_for_site(site, base_slug, exclude_pk=instance.pk)
             else:
                 validated_data["slug"] = base_slug or instance.slug
         try:
@@ -163,7 +158,12 @@ class SiteSerializer(serializers.ModelSerializer):
             "media_dir",
             "base_url",
             "media_strategy",
+            # stato della working copy (sola lettura, aggiornato dal worker di provisioning)
+            "provision_status",
+            "provision_progress",
+            "provision_message",
         ]
+        read_only_fields = ["provision_status", "provision_progress", "provision_message"]
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -200,7 +200,29 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ["id", "post", "author_name", "author_email", "text", "created_at"]
 
 
-class PostSerializer(serializers.ModelSerializer):
+class SearchResultMixin:
+    """Adds `search_rank` / `search_snippet` to rows coming from ?search= (FullTextSearchFilter)."""
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        rank = getattr(instance, "search_rank", None)
+        if rank is not None:
+            data["search_rank"] = rank
+            snippet = getattr(instance, "search_snippet", None)
+            if snippet is not None:
+                from .services.search import snippet_html
+                snippet = snippet_html(snippet)
+            else:
+                from .services.search import make_snippet, search_terms
+                request = self.context.get("request")
+                query = request.query_params.get("search", "") if request is not None else ""
+                text = getattr(instance, "content_head", None)
+                snippet = make_snippet(instance.content if text is None else text, search_terms(query))
+            data["search_snippet"] = snippet
+        return data
+
+
+class PostSerializer(SearchResultMixin, serializers.ModelSerializer):
     body = serializers.CharField(source="content", required=True)
     categories = serializers.PrimaryKeyRelatedField(many=True, queryset=Category.objects.all(), required=False, allow_empty=True)
     class Meta:
@@ -276,8 +298,7 @@ class PostSerializer(serializers.ModelSerializer):
         # Autogenerazione server-side se slug mancante
         if not validated_data.get("slug"):
             post = Post(**validated_data)
-            post.slug = Post.safe_slugify(site_id=post.site.pk, title=post.title)
-            post.save()
+            post.save()  # slug vuoto: allocato da Post.save (con retry sulle create concorrenti)
             return post
             # fields = ("id", "site", "title", "slug", "body", "status", "categories", "tags", "author")
 
@@ -321,6 +342,62 @@ class PostSerializer(serializers.ModelSerializer):
         return getattr(obj, "repo_path", None)
 
 
+
+EXCERPT_CHARS = 200
+# prefisso di `content` letto dal DB per l'estratto delle liste (front-matter incluso)
+EXCERPT_SOURCE_CHARS = 2000
+
+
+def post_excerpt(text, frontmatter=None, length=EXCERPT_CHARS):
+    """Short plain-text excerpt: front-matter `excerpt`/`description`, else the start of the body."""
+    import re
+
+    fm = frontmatter if isinstance(frontmatter, dict) else {}
+    for key in ("excerpt", "description"):
+        if fm.get(key):
+            text = str(fm[key])
+            break
+    else:
+        text = re.sub(r"^\s*---\s*\n[\s\S]*?\n---\s*\n", "", text or "", count=1)
+        text = re.sub(r"[#*_`>]+", "", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    if len(text) <= length:
+        return text
+    return text[:length].rsplit(" ", 1)[0] + "…"
+
+
+class PostListSerializer(SearchResultMixin, serializers.ModelSerializer):
+    """
+    Rappresentazione compatta per le liste (niente markdown, commenti, immagini).
+    Il corpo completo resta sul dettaglio o con `?include=content`.
+    """
+    excerpt = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Post
+        fields = [
+            "id",
+            "site",
+            "title",
+            "slug",
+            "status",
+            "is_published",
+            "published_at",
+            "updated_at",
+            "categories",
+            "canonical_url",
+            "repo_path",
+            "excerpt",
+        ]
+        read_only_fields = fields
+
+    def get_excerpt(self, obj):
+        if obj.description:
+            return post_excerpt(obj.description)
+        head = getattr(obj, "content_head", None)
+        return post_excerpt(obj.content if head is None else head, obj.frontmatter)
+
+
 class TagSerializer(serializers.ModelSerializer):
     class Meta:
         model = Tag
@@ -0,0 +1,344 @@
+"""
+Bulk create/update of posts behind POST /api/blog/posts/bulk/.
+
+All items are validated first (PostWriteSerializer + the invariants of
+Post.save/clean), then written with bulk_create/bulk_update in one
+transaction. The side effects normally run by the Post signals are applied
+once per batch: slugs allocated per site with one query (services.slugs),
+categories derived from the front-matter resolved per site and linked with
+one through-table insert, taxonomy, cached counts, content versions,
+change log entries and static snapshots, and a single export job per site
+scheduled after commit.
+
+Items carrying an `id` update that post (partial update), the others are
+created. Invalid items are reported and skipped; they never block the others.
+"""
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.text import slugify as dj_slugify
+from rest_framework import serializers
+
+from .changes import record_changes
+from .counts import invalidate_post_count
+from .slugs import allocate_slugs
+from .snapshots import schedule_site_snapshot
+from .versions import bump_site_versions
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 200
+# campi derivati da save()/signals, sempre riscritti dal bulk_update
+DERIVED_FIELDS = [
+    "published_at", "is_published", "slug_locked",
+    "frontmatter", "cluster_slug", "subcluster_slug", "frontmatter_hash", "updated_at",
+]
+
+
+def max_items():
+    return getattr(settings, "BLOG_BULK_MAX_ITEMS", 200)
+
+
+def _errors(exc):
+    return getattr(exc, "message_dict", None) or {"non_field_errors": list(getattr(exc, "messages", [str(exc)]))}
+
+
+class _Item:
+    __slots__ = ("index", "post", "created", "fields", "fingerprint", "errors", "rederive", "original_site_id")
+
+    def __init__(self, index):
+        self.index = index
+        self.post = None
+        self.created = False
+        self.fields = set()
+        self.fingerprint = ""
+        self.errors = None
+        self.rederive = False
+        self.original_site_id = None
+
+    def result(self):
+        if self.errors is not None:
+            return {"index": self.index, "status": "error", "errors": self.errors}
+        return {
+            "index": self.index,
+            "status": "created" if self.created else "updated",
+            "id": self.post.pk,
+            "slug": self.post.slug,
+        }
+
+
+def _prepare(post, now):
+    """Invariants of Post.save() (slug aside), applied in memory."""
+    from blog.utils import frontmatter_fingerprint
+
+    if post.status == "published":
+        if not post.published_at:
+            post.published_at = now
+        post.is_published = True
+        post.slug_locked = True
+    post.refresh_frontmatter_fields()
+    post.updated_at = now
+    return frontmatter_fingerprint(post)
+
+
+class _PreloadedField(serializers.PrimaryKeyRelatedField):
+    """PrimaryKeyRelatedField resolved against rows loaded once for the whole batch."""
+
+    def __init__(self, rows, **kwargs):
+        self.rows = rows
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        try:
+            return self.rows[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+def _ids(items, key):
+    ids = set()
+    for data in items:
+        if isinstance(data, dict) and data.get(key) not in (None, ""):
+            try:
+                ids.add(int(data[key]))
+            except (TypeError, ValueError):
+                pass
+    return ids
+
+
+def _preload(serializer, related):
+    fields = serializer.fields
+    for name, rows in related.items():
+        field = fields[name]
+        fields[name] = _PreloadedField(
+            rows, queryset=field.queryset, required=field.required, allow_null=field.allow_null,
+        )
+
+
+def _validate(items, now):
+    from blog.models import Author, Post, Site
+    from blog.serializers import PostWriteSerializer
+
+    ids = _ids(items, "id")
+    existing = Post.objects.select_related("site").in_bulk(ids) if ids else {}
+    # FK del payload risolte con una query per modello invece che una per item
+    related = {
+        "site": Site.objects.in_bulk(_ids(items, "site")),
+        "author": Author.objects.in_bulk(_ids(items, "author")),
+    }
+
+    out, seen = [], set()
+    for index, data in enumerate(items):
+        item = _Item(index)
+        out.append(item)
+        if not isinstance(data, dict):
+            item.errors = {"non_field_errors": ["Expected an object."]}
+            continue
+
+        if data.get("id") not in (None, ""):
+            try:
+                instance = existing.get(int(data["id"]))
+            except (TypeError, ValueError):
+                instance = None
+            if instance is None:
+                item.errors = {"id": ["Post not found."]}
+                continue
+            if instance.pk in seen:
+                item.errors = {"id": ["Duplicate id in the same request."]}
+                continue
+            seen.add(instance.pk)
+            serializer = PostWriteSerializer(instance, data=data, partial=True)
+        else:
+            serializer = PostWriteSerializer(data=data)
+        _preload(serializer, related)
+        try:
+            valid = serializer.is_valid()
+        except Exception as exc:  # to_internal_value solleva anche fuori da is_valid (es. categories)
+            item.errors = getattr(exc, "detail", None) or {"non_field_errors": [str(exc)]}
+            continue
+        if not valid:
+            item.errors = serializer.errors
+            continue
+
+        attrs = dict(serializer.validated_data)
+        attrs.pop("slug", None)
+        if serializer.instance is None:
+            post = Post(**attrs)
+            item.created = True
+        else:
+            post = serializer.instance
+            item.original_site_id = post.site_id
+            for name, value in attrs.items():
+                setattr(post, name, value)
+            item.fields = set(attrs)
+        item.post = post
+        previous_fp = getattr(post, "frontmatter_hash", "") or ""
+        item.fingerprint = _prepare(post, now)
+        item.rederive = bool(item.fingerprint) and item.fingerprint != previous_fp
+
+        try:
+            # unicità (site, slug) garantita da _allocate; le FK le ha già validate il serializer
+            post.clean_fields(exclude=["slug", *related])
+            post.clean()
+        except DjangoValidationError as exc:
+            item.errors = _errors(exc)
+    return out
+
+
+def _allocate(items):
+    """Slugs for new posts (from the title) and for posts moved to another site."""
+    from blog.models import Post
+
+    wanted = defaultdict(list)
+    for item in items:
+        post = item.post
+        if item.created:
+            wanted[post.site_id].append((item, dj_slugify(Post._normalize(post.title or "")) or "post"))
+        elif "site" in item.fields and post.site_id != item.original_site_id:
+            wanted[post.site_id].append((item, post.slug))
+    for site_id, rows in wanted.items():
+        slugs = allocate_slugs(site_id, [base for _item, base in rows])
+        for (item, _base), slug in zip(rows, slugs):
+            item.post.slug = slug
+
+
+def _attach_categories(items):
+    """Categories from the front-matter of every (re)derived post: one resolve per site, one insert."""
+    from blog.models import Post
+    from blog.signals import _extract_values_from_fm, category_specs_from_values, fm_re, resolve_category_map
+
+    per_site = defaultdict(dict)
+    wanted = {}
+    for item in items:
+        if not item.rederive:
+            continue
+        m = fm_re.search(item.post.content or "")
+        cats, subs = _extract_values_from_fm(m.group(1)) if m else ([], [])
+        if not cats and not subs:
+            continue
+        specs = category_specs_from_values(cats, subs)
+        per_site[item.post.site_id].update(specs)
+        wanted[item.post.pk] = (item.post.site_id, list(specs))
+    if not wanted:
+        return 0
+
+    mappings = {sid: resolve_category_map(sid, list(specs.values())) for sid, specs in per_site.items()}
+    through = Post.categories.through
+    current = set(through.objects.filter(post_id__in=list(wanted)).values_list("post_id", "category_id"))
+    links = []
+    for post_id, (site_id, keys) in wanted.items():
+        for key in keys:
+            cid = mappings[site_id].get(key)
+            if cid is not None and (post_id, cid) not in current:
+                current.add((post_id, cid))
+                links.append(through(post_id=post_id, category_id=cid))
+    through.objects.bulk_create(links, ignore_conflicts=True, batch_size=1000)
+    return len(links)
+
+
+def _write(items):
+    from blog.models import Post
+    from blog.services.taxonomy import add_posts_to_taxonomy, sync_post_taxonomy
+
+    new = [item.post for item in items if item.created]
+    changed = [item for item in items if not item.created]
+    for item in items:
+        if item.rederive:
+            item.post.frontmatter_hash = item.fingerprint
+
+    with transaction.atomic():
+        created = Post.objects.bulk_create(new, batch_size=BATCH_SIZE)
+        if created and created[0].pk is None:
+            # backend senza RETURNING (MySQL): rileggi gli id da (site, slug)
+            ids = {
+                (sid, slug): pk for pk, sid, slug in Post.objects.filter(
+                    site_id__in={p.site_id for p in created}, slug__in=[p.slug for p in created],
+                ).values_list("pk", "site_id", "slug")
+            }
+            for p in created:
+                p.pk = ids.get((p.site_id, p.slug))
+        if changed:
+            fields = set(DERIVED_FIELDS).union(*(item.fields for item in changed))
+            Post.objects.bulk_update([item.post for item in changed], sorted(fields), batch_size=BATCH_SIZE)
+
+        _attach_categories(items)
+        add_posts_to_taxonomy(created)
+        for item in changed:
+            if item.rederive or item.fields & {"title", "site"}:
+                sync_post_taxonomy(item.post)
+        if created:
+            invalidate_post_count()
+        site_ids = {item.post.site_id for item in items} | {item.original_site_id for item in changed}
+        bump_site_versions(site_ids)
+        for site_id in {item.post.site_id for item in items if item.post.status == "published" or item.post.slug_locked}:
+            schedule_site_snapshot(site_id)
+        record_changes("post", [item.post for item in items])
+    return site_ids
+
+
+def _schedule_exports(items):
+    """One export job per site (after commit) instead of one per saved post."""
+    if not getattr(settings, "EXPORT_ENABLED", True):
+        return 0
+    per_site = defaultdict(list)
+    for item in items:
+        if item.post.status == "published":
+            per_site[item.post.site_id].append(item.post.pk)
+    for site_id, post_ids in per_site.items():
+        transaction.on_commit(lambda s=site_id, ids=post_ids: export_site_posts(s, ids))
+    return len(per_site)
+
+
+def export_site_posts(site_id, post_ids):
+    """Export the given published posts of one site in a single pass (same repo, in publication order)."""
+    from blog.exporter import export_post
+    from blog.models import Post
+
+    done = 0
+    qs = Post.objects.select_related("site").filter(site_id=site_id, pk__in=post_ids, status="published")
+    for post in qs.order_by("published_at", "id"):
+        try:
+            export_post(post)
+            done += 1
+        except Exception:
+            logger.exception("bulk export failed for post id=%s site=%s", post.pk, site_id)
+    logger.info("bulk export site=%s posts=%s/%s", site_id, done, len(post_ids))
+    return done
+
+
+def bulk_upsert_posts(items):
+    """Validate and write `items` (list of PostWriteSerializer payloads); return per-item results."""
+    now = timezone.now()
+    validated = _validate(items, now)
+    ok = [item for item in validated if item.errors is None]
+
+    if ok:
+        for attempt in (1, 2):
+            _allocate(ok)
+            try:
+                _write(ok)
+                break
+            except IntegrityError as exc:
+                # slug preso nel frattempo da un'altra richiesta: rialloca una volta
+                logger.warning("bulk write conflict (attempt %s): %s", attempt, exc)
+                for item in ok:
+                    if item.created:
+                        item.post.pk = None
+                        item.post._state.adding = True
+                if attempt == 2:
+                    for item in ok:
+                        item.errors = {"slug": ["Slug conflict, retry the request."]}
+                    ok = []
+        _schedule_exports(ok)
+
+    results = [item.result() for item in validated]
+    counts = {"created": 0, "updated": 0, "error": 0}
+    for r in results:
+        counts[r["status"]] += 1
+    return {"results": results, "created": counts["created"], "updated": counts["updated"], "errors": counts["error"]}
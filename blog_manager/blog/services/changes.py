@@ -0,0 +1,239 @@
+"""
+Append-only change log behind GET /api/blog/changes/?since=<cursor>.
+
+Post, Category and Site saves/deletes append a ChangeLogEntry from the model
+signals (bulk paths call record_changes directly). Entries carry a compact
+delta: the fields a client needs to refresh its copy or, for deletes, a
+tombstone with the identifiers. The cursor is the entry `seq`.
+
+Entries are built when the write happens but inserted by a transaction.on_commit
+callback, so `seq` is assigned after the write committed: a long transaction
+can't commit an entry behind a cursor a client has already passed. Pages only
+contain entries older than BLOG_CHANGES_SETTLE_SECONDS, which now only has to
+cover concurrent inserts into the log itself. Limit: a process dying between
+the commit and the callback loses those entries; clients still converge with
+a full resync.
+
+compact() (`manage.py compact_changes`, meant for cron) drops entries
+superseded by a newer one for the same object, and tombstones older than
+BLOG_CHANGES_TOMBSTONE_DAYS. Dropping tombstones raises the log floor:
+clients whose cursor is older get 410 and must resync from the full listings.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE = 1000
+
+_pending = threading.local()
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def post_delta(post):
+    return {
+        "id": post.pk,
+        "site": post.site_id,
+        "slug": post.slug,
+        "title": post.title,
+        "status": post.status,
+        "published_at": _iso(post.published_at),
+        "updated_at": _iso(post.updated_at),
+    }
+
+
+def category_delta(cat):
+    return {
+        "id": cat.pk,
+        "site": cat.site_id,
+        "name": cat.name,
+        "slug": cat.slug,
+        "cluster_slug": cat.cluster_slug,
+        "subcluster_slug": cat.subcluster_slug,
+    }
+
+
+def site_delta(site):
+    return {"id": site.pk, "name": site.name, "slug": site.slug, "domain": site.domain}
+
+
+def _tombstone(kind, obj, site_id):
+    data = {"id": obj.pk, "slug": getattr(obj, "slug", None)}
+    if kind != "site":
+        data["site"] = site_id
+    return data
+
+
+DELTAS = {"post": post_delta, "category": category_delta, "site": site_delta}
+
+
+def _entry(kind, obj, op, site_id=None):
+    from blog.models import ChangeLogEntry
+
+    if site_id is None:
+        site_id = obj.pk if kind == "site" else obj.site_id
+    data = DELTAS[kind](obj) if op == "upsert" else _tombstone(kind, obj, site_id)
+    return ChangeLogEntry(kind=kind, op=op, object_id=obj.pk, site_id=site_id, data=data)
+
+
+class _ChangeBatch:
+    """on_commit callback inserting the entries of one transaction; later writes of the same transaction join it."""
+
+    def __init__(self):
+        self.rows = []
+
+    def __call__(self):
+        from blog.models import ChangeLogEntry
+
+        if getattr(_pending, "batch", None) is self:
+            _pending.batch = None
+        try:
+            ChangeLogEntry.objects.bulk_create(self.rows, batch_size=500)
+        except Exception as e:
+            logger.warning("change log write failed (%d entries): %s", len(self.rows), e)
+
+
+def _enqueue(rows):
+    batch = getattr(_pending, "batch", None)
+    conn = transaction.get_connection()
+    # si accoda solo a un batch registrato allo stesso livello di savepoint:
+    # un rollback parziale deve scartare anche le sue entry
+    current = set(conn.savepoint_ids)
+    if batch is not None and any(entry[1] is batch and entry[0] == current for entry in conn.run_on_commit):
+        batch.rows.extend(rows)
+        return
+    batch = _pending.batch = _ChangeBatch()
+    batch.rows.extend(rows)
+    transaction.on_commit(batch)
+
+
+def record_change(kind, obj, op="upsert", *, site_id=None):
+    """Append one entry once the current transaction commits (called from the model signals).
+
+    `site_id` overrides the object's site, e.g. the tombstone a post moved to
+    another site leaves in the feed of its old site.
+    """
+    if getattr(obj, "pk", None) is None:
+        return
+    try:
+        _enqueue([_entry(kind, obj, op, site_id)])
+    except Exception as e:
+        logger.warning("change log write failed (%s %s:%s): %s", op, kind, obj.pk, e)
+
+
+def record_changes(kind, objs, op="upsert"):
+    """Bulk variant for paths that bypass the signals (bulk_create/bulk_update)."""
+    rows = [_entry(kind, obj, op) for obj in objs if getattr(obj, "pk", None) is not None]
+    if rows:
+        _enqueue(rows)
+    return len(rows)
+
+
+# --- reading ------------------------------------------------------------------
+
+class CursorExpired(Exception):
+    """The cursor predates the compacted part of the log: the client must resync."""
+
+    def __init__(self, floor):
+        super().__init__(f"cursor older than the change log floor {floor}")
+        self.floor = floor
+
+
+def log_floor():
+    """Highest seq whose tombstones may have been dropped by compaction (0 = full history)."""
+    from blog.models import ChangeLogEntry
+
+    data = (
+        ChangeLogEntry.objects.filter(kind="log", op="truncate")
+        .order_by("-seq").values_list("data", flat=True).first()
+    )
+    return int((data or {}).get("floor") or 0)
+
+
+def latest_cursor():
+    from blog.models import ChangeLogEntry
+
+    return ChangeLogEntry.objects.aggregate(m=Max("seq"))["m"] or 0
+
+
+def changes_since(since, *, limit=None, site_id=None):
+    """Deltas after `since`, collapsed to the last entry per object within the page.
+
+    Returns {"changes": [...], "cursor": next cursor, "has_more": bool}.
+    Raises CursorExpired when `since` is older than the log floor.
+    """
+    from blog.models import ChangeLogEntry
+
+    limit = max(1, min(limit or getattr(settings, "BLOG_CHANGES_PAGE_SIZE", 500), MAX_PAGE))
+    floor = log_floor()
+    if since < floor:
+        raise CursorExpired(floor)
+
+    qs = ChangeLogEntry.objects.filter(seq__gt=since).exclude(kind="log")
+    settle = getattr(settings, "BLOG_CHANGES_SETTLE_SECONDS", 2)
+    if settle:
+        qs = qs.filter(created_at__lte=timezone.now() - timedelta(seconds=settle))
+    if site_id is not None:
+        qs = qs.filter(site_id=site_id)
+    rows = list(
+        qs.order_by("seq").values_list("seq", "kind", "op", "object_id", "data", "created_at")[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest = {}
+    for seq, kind, op, object_id, data, created_at in rows:
+        latest[(kind, object_id)] = {
+            "seq": seq, "kind": kind, "op": op, "id": object_id,
+            "at": _iso(created_at), "data": data,
+        }
+    changes = sorted(latest.values(), key=lambda c: c["seq"])
+    cursor = rows[-1][0] if rows else since
+    return {"changes": changes, "cursor": str(cursor), "has_more": has_more}
+
+
+# --- compaction ---------------------------------------------------------------
+
+def _chunks(ids, size=1000):
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def compact(tombstone_days=None, *, dry_run=False):
+    """Drop superseded entries and old tombstones. Returns counters."""
+    from blog.models import ChangeLogEntry
+
+    if tombstone_days is None:
+        tombstone_days = getattr(settings, "BLOG_CHANGES_TOMBSTONE_DAYS", 30)
+    cutoff = timezone.now() - timedelta(days=tombstone_days)
+    entries = ChangeLogEntry.objects.exclude(kind="log")
+    # id da cancellare calcolati in Python e cancellati a blocchi per pk:
+    # niente subquery sulla stessa tabella (MySQL) né liste IN oltre i limiti di SQLite
+    newest = set(entries.values("kind", "object_id").annotate(last=Max("seq")).values_list("last", flat=True))
+    superseded = [seq for seq in entries.values_list("seq", flat=True).iterator() if seq not in newest]
+    tombstones = [
+        seq for seq in entries.filter(op="delete", created_at__lt=cutoff).values_list("seq", flat=True).iterator()
+        if seq in newest
+    ]
+    result = {"superseded": len(superseded), "tombstones": len(tombstones), "floor": log_floor()}
+    if dry_run:
+        return result
+
+    with transaction.atomic():
+        for chunk in _chunks(superseded + tombstones):
+            ChangeLogEntry.objects.filter(seq__in=chunk).delete()
+        if tombstones:
+            result["floor"] = max(result["floor"], max(tombstones))
+            ChangeLogEntry.objects.filter(kind="log", op="truncate").delete()
+            ChangeLogEntry.objects.create(kind="log", op="truncate", object_id=0, data={"floor": result["floor"]})
+    logger.info("change log compacted: %s", result)
+    return result
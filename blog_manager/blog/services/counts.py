@@ -0,0 +1,54 @@
+"""
+Cached / estimated row counts for unfiltered post listings.
+
+COUNT(*) on blog_post grows linearly with the table on InnoDB; unfiltered
+API listings only need an approximate total, so it is cached for
+BLOG_POST_COUNT_TTL seconds and invalidated when posts are created or deleted
+(see signals). On MySQL, above BLOG_POST_COUNT_ESTIMATE_ABOVE rows the
+information_schema statistic is used instead of a full count.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+POST_COUNT_CACHE_KEY = "blog:post_count"
+
+
+def _mysql_estimate(table):
+    with connection.cursor() as c:
+        c.execute(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [table],
+        )
+        row = c.fetchone()
+    return int(row[0]) if row and row[0] is not None else None
+
+
+def cached_post_count():
+    """Total number of posts, cached (exact below the estimate threshold)."""
+    from blog.models import Post
+
+    value = cache.get(POST_COUNT_CACHE_KEY)
+    if value is not None:
+        return value
+
+    value = None
+    if connection.vendor == "mysql":
+        try:
+            estimate = _mysql_estimate(Post._meta.db_table)
+            if estimate is not None and estimate >= getattr(settings, "BLOG_POST_COUNT_ESTIMATE_ABOVE", 100_000):
+                value = estimate
+        except Exception as e:
+            logger.debug("post count estimate unavailable: %s", e)
+    if value is None:
+        value = Post.objects.count()
+    cache.set(POST_COUNT_CACHE_KEY, value, getattr(settings, "BLOG_POST_COUNT_TTL", 300))
+    return value
+
+
+def invalidate_post_count():
+    cache.delete(POST_COUNT_CACHE_KEY)
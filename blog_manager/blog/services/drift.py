@@ -0,0 +1,139 @@
+"""Drift detection between DB posts and their files in the GitHub repo.
+
+Instead of downloading every file, the locally rendered markdown is hashed as a git blob
+and compared with the blob sha returned by a single recursive tree listing per repo.
+Content is fetched only for files whose sha differs, to build a diff for the admin.
+"""
+from typing import Optional
+import difflib
+import hashlib
+import logging
+
+from blog.github_client import GitHubClient
+from blog.services.github_ops import _candidate_paths, _repo_coords, _resolve_post_path
+
+logger = logging.getLogger(__name__)
+
+# Max diff lines kept per drifted post (the admin only shows a preview)
+DIFF_MAX_LINES = 40
+
+
+def git_blob_sha(text: str) -> str:
+    """Return the git blob sha1 of `text` (same value GitHub exposes in tree listings)."""
+    data = (text or "").encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _error_code(e: Exception) -> str:
+    emsg = None
+    try:
+        arg0 = e.args[0]
+        if isinstance(arg0, dict) and "message" in arg0:
+            emsg = arg0["message"]
+    except Exception:
+        pass
+    emsg = emsg or str(e)
+    if "Token mancante" in emsg or "permessi" in emsg:
+        return "permission_denied"
+    if "Rate limit" in emsg or "rate limit" in emsg or "429" in emsg:
+        return "rate_limited"
+    return "error"
+
+
+def _unified_diff(remote: str, local: str, path: str) -> str:
+    lines = list(difflib.unified_diff(
+        (remote or "").splitlines(), (local or "").splitlines(),
+        fromfile=f"repo/{path}", tofile=f"db/{path}", lineterm="",
+    ))
+    if len(lines) > DIFF_MAX_LINES:
+        lines = lines[:DIFF_MAX_LINES] + [f"... ({len(lines) - DIFF_MAX_LINES} more lines)"]
+    return "\n".join(lines)
+
+
+def detect_drift(posts, *, client: Optional[GitHubClient] = None, with_diff: bool = True, record: bool = True) -> list:
+    """Compare each post's rendered markdown with the repo tree.
+
+    Returns a list of dicts (one per post, input order):
+    {"post": Post, "path": str|None, "status": "ok"|"drift_content"|"drift_absent"|<error code>,
+     "local_sha": str|None, "remote_sha": str|None, "diff": str|None, "message": str|None}
+
+    API usage: one tree call per (owner, repo, branch) plus one get_file per drifted file
+    (only when `with_diff`). With `record`, results are stored as ExportJob(action="refresh")
+    rows in a single bulk insert.
+    """
+    from blog.exporter import render_markdown
+
+    client = client or GitHubClient()
+    results = []
+    groups = {}
+
+    for post in posts:
+        owner, repo, branch = _repo_coords(post)
+        entry = {"post": post, "path": _resolve_post_path(post), "status": None, "local_sha": None,
+                 "remote_sha": None, "diff": None, "message": None,
+                 "owner": owner, "repo": repo, "branch": branch}
+        results.append(entry)
+        if not owner or not repo:
+            entry.update(status="error", message="Missing repo owner or name on Post or Site")
+            continue
+        if not entry["path"]:
+            entry.update(status="drift_absent", message="Post has no repo path")
+            continue
+        groups.setdefault((owner, repo, branch), []).append(entry)
+
+    for (owner, repo, branch), entries in groups.items():
+        try:
+            tree = {it["path"]: it.get("sha") for it in client.get_tree(owner, repo, branch=branch) if it.get("type") == "file"}
+        except Exception as e:
+            logger.exception("detect_drift: tree listing failed for %s/%s@%s", owner, repo, branch)
+            code = _error_code(e)
+            for entry in entries:
+                entry.update(status=code, message=str(e))
+            continue
+
+        for entry in entries:
+            post = entry["post"]
+            match = next((c for c in _candidate_paths(post, entry["path"]) if c in tree), None)
+            if not match:
+                entry.update(status="drift_absent")
+                continue
+            entry["path"] = match
+            entry["remote_sha"] = tree[match]
+            try:
+                local = render_markdown(post, post.site)
+            except Exception as e:
+                entry.update(status="error", message=f"render failed: {e}")
+                continue
+            entry["local_sha"] = git_blob_sha(local)
+            if entry["local_sha"] == entry["remote_sha"]:
+                entry["status"] = "ok"
+                continue
+            entry["status"] = "drift_content"
+            if with_diff:
+                try:
+                    remote = client.get_file(owner, repo, match, branch=branch).get("content") or ""
+                    entry["diff"] = _unified_diff(remote, local, match)
+                except Exception as e:
+                    entry["message"] = f"diff unavailable: {e}"
+
+    if record:
+        try:
+            from blog.models import ExportJob
+
+            ExportJob.objects.bulk_create([
+                ExportJob(
+                    post=e["post"],
+                    commit_sha=e["remote_sha"],
+                    repo_url=(f"https://github.com/{e['owner']}/{e['repo']}" if e["owner"] and e["repo"] else None),
+                    branch=e["branch"],
+                    path=e["path"],
+                    export_status=("success" if e["status"] == "ok" else "failed"),
+                    action="refresh",
+                    message=(e["status"] if e["status"] in ("ok", "drift_content", "drift_absent") else (e["message"] or e["status"])),
+                )
+                for e in results
+            ])
+        except Exception:
+            logger.exception("detect_drift: unable to write ExportJob rows")
+
+    return results
@@ -0,0 +1,209 @@
+"""
+Streaming + parallel front-matter parsing for bulk commands.
+
+Posts are streamed as (id, site_id, content) tuples in chunks and each chunk is
+handed to a worker function in a process pool; results come back in order.
+Workers must be module-level functions that do not touch the database (they
+run in child processes). At most `2 * jobs` chunks are in flight, so memory
+stays flat whatever the corpus size.
+"""
+import logging
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import yaml
+from django.utils.text import slugify
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+FM_RE = re.compile(r"^\s*---\s*\n(.*?)\n---\s*\n", flags=re.S | re.M)
+
+# libyaml (C) quando disponibile: ~10x più veloce del loader puro Python
+_Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def default_jobs():
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def parse_frontmatter(text):
+    """Parsed front-matter dict, or None when absent/invalid."""
+    if not text:
+        return None
+    m = FM_RE.search(text)
+    if not m:
+        return None
+    try:
+        fm = yaml.load(m.group(1), Loader=_Loader) or {}
+    except Exception:
+        return None
+    return fm if isinstance(fm, dict) else None
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_posts(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """(id, site_id, content) tuples streamed from the DB, ordered by id.
+
+    Keyset pagination (id > last) instead of a single server-side cursor: MySQL
+    drivers buffer whole result sets, and no cursor stays open while the caller
+    writes between chunks.
+    """
+    # tuple invece di istanze: niente campi extra in memoria e pickling leggero verso i worker
+    qs = queryset.order_by('id').values_list('id', 'site_id', 'content')
+    last = None
+    while True:
+        page = qs.filter(id__gt=last)[:chunk_size] if last is not None else qs[:chunk_size]
+        rows = list(page)
+        if not rows:
+            return
+        yield from rows
+        last = rows[-1][0]
+        if len(rows) < chunk_size:
+            return
+
+
+def parallel_map(worker, rows, *, jobs=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Yield worker(chunk) results, in input order, for chunks of `rows`.
+
+    `progress(done_rows, elapsed_seconds)` is called after every chunk.
+    With jobs <= 1 everything runs in-process.
+    """
+    jobs = default_jobs() if jobs is None else max(1, int(jobs))
+    started = time.monotonic()
+    done = 0
+
+    if jobs == 1:
+        for chunk in _chunks(rows, chunk_size):
+            yield worker(chunk)
+            done += len(chunk)
+            if progress:
+                progress(done, time.monotonic() - started)
+        return
+
+    # spawn: i worker non ereditano connessioni DB/thread del processo Django
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=get_context('spawn')) as pool:
+        inflight = deque()
+        for chunk in _chunks(rows, chunk_size):
+            inflight.append((len(chunk), pool.submit(worker, chunk)))
+            if len(inflight) >= 2 * jobs:
+                n, fut = inflight.popleft()
+                yield fut.result()
+                done += n
+                if progress:
+                    progress(done, time.monotonic() - started)
+        while inflight:
+            n, fut = inflight.popleft()
+            yield fut.result()
+            done += n
+            if progress:
+                progress(done, time.monotonic() - started)
+
+
+# --- workers -----------------------------------------------------------------
+
+def _as_list(value):
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(x).strip() for x in value if x]
+    return [str(value).strip()]
+
+
+def taxonomy_chunk(chunk):
+    """rebuild_taxonomy worker: [(post_id, site_id, category_vals, sub_vals), ...].
+
+    category_vals is None when the front-matter has no categories, so the caller
+    can fall back to the post's M2M categories.
+    """
+    out = []
+    for pid, site_id, content in chunk:
+        fm = parse_frontmatter(content)
+        if fm is None:
+            continue
+        cats = _as_list(fm.get('categories')) + _as_list(fm.get('category'))
+        subs = _as_list(fm.get('subcluster')) + _as_list(fm.get('subclusters'))
+        out.append((pid, site_id, cats or None, subs))
+    return out
+
+
+def import_categories_chunk(chunk, fields=('categories',), hierarchy='slash', auto_hashtags=False):
+    """import_categories_from_posts worker: [(post_id, site_id, [(slug, name), ...]), ...]."""
+    out = []
+    for pid, site_id, content in chunk:
+        fm = parse_frontmatter(content)
+        cats = []
+
+        if fm:
+            vals = []
+            for fld in fields:
+                if fld in fm and fm[fld] is not None:
+                    v = fm[fld]
+                    if isinstance(v, (list, tuple)) and v:
+                        vals.extend([str(x).strip() for x in v if x])
+                    else:
+                        vals.append(str(v).strip())
+            if vals:
+                cats = [vals[0]] if len(vals) == 1 else ["/".join(vals)]
+
+        if not cats:
+            m = re.search(r'(?mi)^categories:\s*(.+)$', content or '')
+            if m:
+                cats = [s.strip() for s in re.split(r"[,;]\s*", m.group(1)) if s.strip()]
+
+        if not cats and auto_hashtags:
+            tags = re.findall(r"#([A-Za-z0-9_\-/]+)", content or "")
+            cats = [t.replace('-', ' ').replace('_', ' ').strip() for t in tags]
+
+        pairs = []
+        for raw in cats:
+            if hierarchy == 'slash':
+                parts = [p.strip() for p in re.split(r"\s*/\s*", raw) if p.strip()]
+            elif hierarchy == '>':
+                parts = [p.strip() for p in re.split(r"\s*>\s*", raw) if p.strip()]
+            else:
+                parts = [raw.strip()]
+
+            accum = []
+            for part in parts:
+                accum.append(part)
+                name = "/".join(accum) if len(accum) > 1 else accum[0]
+                slug = slugify(name.replace('/', '-').replace('>', '-')).strip()
+                if slug:
+                    pairs.append((slug, name))
+        if pairs:
+            out.append((pid, site_id, pairs))
+    return out
+
+
+class ProgressReporter:
+    """Throttled "N posts (X posts/s)" lines for management commands."""
+
+    def __init__(self, write, total=None, every=2.0):
+        self.write = write
+        self.total = total
+        self.every = every
+        self._last = 0.0
+
+    def __call__(self, done, elapsed):
+        if elapsed - self._last < self.every and (self.total is None or done < self.total):
+            return
+        self._last = elapsed
+        rate = done / elapsed if elapsed > 0 else 0.0
+        of = f"/{self.total}" if self.total is not None else ""
+        self.write(f"  processed {done}{of} posts ({rate:.0f} posts/s)")
@@ -1,17 +1,15 @@
 from typing import Optional
+import logging
 import os
 import subprocess
 
 from blog.github_client import GitHubClient
 
+logger = logging.getLogger(__name__)
 
-def delete_post_from_repo(post, *, message: str, client: Optional[GitHubClient] = None, sync_local: bool = False):
-    """Minimal wrapper to delete a post file from its repo, audit the result via ExportJob, and return the client response.
 
-    Expects `post` to have attributes: `repo_owner`, `repo_name`, `repo_path`, `repo_branch`.
-    """
-    client = client or GitHubClient()
-    # repo_path usually stored on the Post; if missing, try last_export_path or construct via exporter
+def _resolve_post_path(post) -> Optional[str]:
+    """Repo path for a post: repo_path, then last_export_path, then the exporter layout."""
     path = getattr(post, "repo_path", None)
     if not path:
         path = getattr(post, "last_export_path", None)
@@ -25,17 +23,85 @@ def delete_post_from_repo(post, *, message: str, client: Optional[GitHubClient]
                 path = build_post_relpath(post, site)
         except Exception:
             path = None
+    return path or None
 
-    if not path:
-        return {"status": "no_repo_path", "message": "Post has no repo_path and no last_export_path or computed path"}
 
-    # owner/repo/branch may be on the Post or on the related Site
+def _repo_coords(post):
+    """Return (owner, repo, branch); owner/repo/branch may be on the Post or on the related Site."""
     site = getattr(post, "site", None)
     owner = getattr(post, "repo_owner", None) or (getattr(site, "repo_owner", None) if site else None)
     repo = getattr(post, "repo_name", None) or (getattr(site, "repo_name", None) if site else None)
     branch = getattr(post, "repo_branch", None) or (getattr(site, "default_branch", None) if site else "main")
-    if not branch:
-        branch = "main"
+    return owner, repo, (branch or "main")
+
+
+def _candidate_paths(post, path: str) -> list:
+    """Alternative paths to try when the stored path is slightly different from the repo layout."""
+    candidates = [path]
+    # try last_export_path if present and different
+    lep = getattr(post, 'last_export_path', None)
+    if lep and lep != path:
+        candidates.append(lep)
+    # try with/without posts_dir prefix
+    site = getattr(post, 'site', None)
+    posts_dir = getattr(site, 'posts_dir', None) if site else None
+    if posts_dir:
+        norm_posts = posts_dir.strip('/\\')
+        if not path.startswith(norm_posts + '/'):
+            candidates.append(f"{norm_posts}/{path}")
+        else:
+            # also try stripping prefix
+            candidates.append(path.split('/', 1)[-1])
+    # basename only
+    candidates.append(os.path.basename(path))
+    out = []
+    for c in candidates:
+        if c and c not in out:
+            out.append(c)
+    return out
+
+
+def _export_job_fields(res: dict, branch: str, path: str) -> dict:
+    status = res.get("status")
+    return dict(
+        commit_sha=res.get("commit_sha"),
+        repo_url=None,
+        branch=branch,
+        path=path,
+        export_status=("success" if status in ("deleted", "already_absent") else "failed"),
+        action=("delete_repo_and_db" if status == "deleted" else "delete_db_only" if status == "already_absent" else "delete_failed"),
+        message=(None if status in ("deleted", "already_absent") else str(res.get("message") or res)),
+    )
+
+
+def _sync_local_copy(repo_dir: Optional[str], branch: str) -> str:
+    """git fetch + pull of the local working copy so local files reflect remote deletions."""
+    try:
+        if repo_dir and os.path.isdir(repo_dir):
+            # perform a git pull for the branch to reflect remote changes
+            try:
+                subprocess.run(["git", "fetch", "origin"], cwd=repo_dir, check=False)
+                pull = subprocess.run(["git", "pull", "origin", str(branch or "main")], cwd=repo_dir, capture_output=True, text=True, check=False)
+                return pull.stdout + "\n" + pull.stderr
+            except Exception as e:
+                return f"local sync failed: {e}"
+        return "no local repo_path to sync"
+    except Exception as e:
+        return f"local sync error: {e}"
+
+
+def delete_post_from_repo(post, *, message: str, client: Optional[GitHubClient] = None, sync_local: bool = False):
+    """Minimal wrapper to delete a post file from its repo, audit the result via ExportJob, and return the client response.
+
+    Expects `post` to have attributes: `repo_owner`, `repo_name`, `repo_path`, `repo_branch`.
+    """
+    client = client or GitHubClient()
+    path = _resolve_post_path(post)
+
+    if not path:
+        return {"status": "no_repo_path", "message": "Post has no repo_path and no last_export_path or computed path"}
+
+    owner, repo, branch = _repo_coords(post)
 
     # Validate required params
     if not owner or not repo:
@@ -59,16 +125,7 @@ def delete_post_from_repo(post, *, message: str, client: Optional[GitHubClient]
     try:
         from blog.models import ExportJob
 
-        ExportJob.objects.create(
-            post=post,
-            commit_sha=res.get("commit_sha"),
-            repo_url=None,
-            branch=branch,
-            path=path,
-            export_status=("success" if res.get("status") in ("deleted", "already_absent") else "failed"),
-            action=("delete_repo_and_db" if res.get("status") == "deleted" else "delete_db_only" if res.get("status") == "already_absent" else "delete_failed"),
-            message=(None if res.get("status") in ("deleted", "already_absent") else str(res.get("message") or res)),
-        )
+        ExportJob.objects.create(post=post, **_export_job_fields(res, branch, path))
     except Exception:
         # In environments without Django ORM available (e.g., unit tests without DB), skip audit creation.
         pass
@@ -76,22 +133,8 @@ def delete_post_from_repo(post, *, message: str, client: Optional[GitHubClient]
     # Optionally sync local working copy (pull updates) so local files reflect remote deletion
     local_sync_msg = None
     if sync_local:
-        try:
-            site = getattr(post, "site", None)
-            repo_dir = getattr(site, "repo_path", None) if site else None
-            if repo_dir and os.path.isdir(repo_dir):
-                # perform a git pull for the branch to reflect remote changes
-                try:
-                    subprocess.run(["git", "fetch", "origin"], cwd=repo_dir, check=False)
-                    _branch = branch or "main"
-                    pull = subprocess.run(["git", "pull", "origin", str(_branch)], cwd=repo_dir, capture_output=True, text=True, check=False)
-                    local_sync_msg = pull.stdout + "\n" + pull.stderr
-                except Exception as e:
-                    local_sync_msg = f"local sync failed: {e}"
-            else:
-                local_sync_msg = "no local repo_path to sync"
-        except Exception as e:
-            local_sync_msg = f"local sync error: {e}"
+        site = getattr(post, "site", None)
+        local_sync_msg = _sync_local_copy(getattr(site, "repo_path", None) if site else None, branch)
 
     # Include local sync info in returned dict
     if local_sync_msg:
@@ -114,25 +157,7 @@ def delete_post_from_repo(post, *, message: str, client: Optional[GitHubClient]
                 listing = ["<listing_failed>"]
 
             # Try alternative candidate paths in case stored path is slightly different
-            candidates = []
-            # original
-            candidates.append(path)
-            # try last_export_path if present and different
-            lep = getattr(post, 'last_export_path', None)
-            if lep and lep != path:
-                candidates.append(lep)
-            # try with/without posts_dir prefix
-            site = getattr(post, 'site', None)
-            posts_dir = getattr(site, 'posts_dir', None) if site else None
-            if posts_dir:
-                norm_posts = posts_dir.strip('/\\')
-                if not path.startswith(norm_posts + '/'):
-                    candidates.append(f"{norm_posts}/{path}")
-                else:
-                    # also try stripping prefix
-                    candidates.append(path.split('/', 1)[-1])
-            # basename only
-            candidates.append(os.path.basename(path))
+            candidates = _candidate_paths(post, path)
 
             tried = []
             deleted_response = None
@@ -160,3 +185,91 @@ def delete_post_from_repo(post, *, message: str, client: Optional[GitHubClient]
         pass
 
     return res
+
+
+def delete_posts_from_repo(posts, *, message: str, client: Optional[GitHubClient] = None, sync_local: bool = False) -> dict:
+    """Batch variant of `delete_post_from_repo`.
+
+    Posts are grouped by (owner, repo, branch); for each group the branch tree is listed once,
+    every post path is resolved against that listing (same candidates as the single delete) and
+    all files found are removed with a single commit. The local working copy is pulled once per
+    repo dir at the end and one ExportJob per post is written with `bulk_create`.
+
+    Returns a dict {post_pk: result} where result has the same keys as `delete_post_from_repo`
+    (`status`, `commit_sha`, `html_url`, `message`, `local_sync_message`) plus `path`.
+    """
+    client = client or GitHubClient()
+    results = {}
+    groups = {}
+    resolved = {}
+
+    for post in posts:
+        path = _resolve_post_path(post)
+        if not path:
+            results[post.pk] = {"status": "no_repo_path", "message": "Post has no repo_path and no last_export_path or computed path"}
+            continue
+        owner, repo, branch = _repo_coords(post)
+        if not owner or not repo:
+            results[post.pk] = {"status": "no_owner_repo", "message": "Missing repo owner or name on Post or Site"}
+            continue
+        resolved[post.pk] = (post, path, branch)
+        groups.setdefault((owner, repo, branch), []).append(post)
+
+    for (owner, repo, branch), group in groups.items():
+        logger.debug("delete_posts_from_repo: owner=%s repo=%s branch=%s posts=%s", owner, repo, branch, [p.pk for p in group])
+        try:
+            existing = {it["path"] for it in client.get_tree(owner, repo, branch=branch) if it.get("type") == "file"}
+        except Exception as e:
+            for p in group:
+                results[p.pk] = {"status": "error", "message": str(e)}
+            continue
+
+        to_delete = {}
+        for p in group:
+            path = resolved[p.pk][1]
+            match = next((c for c in _candidate_paths(p, path) if c in existing), None)
+            if match:
+                to_delete[p.pk] = match
+                # keep the resolved path for the audit trail
+                resolved[p.pk] = (p, match, branch)
+            else:
+                results[p.pk] = {"status": "already_absent", "commit_sha": None, "html_url": None}
+
+        if not to_delete:
+            continue
+        try:
+            res = client.delete_files(owner, repo, list(to_delete.values()), branch=branch, message=message)
+        except Exception as e:
+            for pk in to_delete:
+                results[pk] = {"status": "error", "message": str(e)}
+            continue
+        for pk in to_delete:
+            results[pk] = {"status": "deleted", "commit_sha": res.get("commit_sha"), "html_url": res.get("html_url")}
+
+    # Audit: one ExportJob per post, single insert
+    try:
+        from blog.models import ExportJob
+
+        ExportJob.objects.bulk_create([
+            ExportJob(post=post, **_export_job_fields(results[pk], branch, path))
+            for pk, (post, path, branch) in resolved.items()
+        ])
+    except Exception:
+        logger.exception("delete_posts_from_repo: unable to write ExportJob audit")
+
+    # Pull each local working copy once, after all remote commits
+    if sync_local:
+        synced = {}
+        for pk, (post, path, branch) in resolved.items():
+            if results[pk].get("status") != "deleted":
+                continue
+            site = getattr(post, "site", None)
+            repo_dir = getattr(site, "repo_path", None) if site else None
+            key = (repo_dir, branch)
+            if key not in synced:
+                synced[key] = _sync_local_copy(repo_dir, branch)
+            results[pk] = dict(results[pk], local_sync_message=synced[key])
+
+    for pk, (post, path, branch) in resolved.items():
+        results[pk].setdefault("path", path)
+    return results
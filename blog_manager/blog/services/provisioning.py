@@ -0,0 +1,344 @@
+"""
+Provisioning of a site's git working copy, outside the request that saved it.
+
+Site.save() only writes the row: a new site, or one whose repository
+settings changed, is left in "pending" and handed to a worker after commit
+(a daemon thread when BLOG_PROVISION_THREAD is on, otherwise
+`manage.py provision_sites`, e.g. from cron or as a long-running --watch
+process). The worker claims the site with a conditional UPDATE
+(pending -> cloning, so two workers never clone the same site), then:
+
+- reuses an existing working copy (and adds the origin remote if missing);
+- clones into an empty or missing directory with BLOG_PROVISION_CLONE_ARGS
+  (default: partial clone of the default branch only), reporting the git
+  progress in provision_progress/provision_message;
+- otherwise runs `git init`, adds origin and makes the initial commit/push
+  the old Site.save() used to do inline;
+- checks posts_dir/media_dir against the working copy
+
+and ends in "ready" or "failed" (with the reason in provision_message).
+"""
+import logging
+import os
+import re
+import subprocess
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CLONE_ARGS = ("--filter=blob:none", "--single-branch")
+PROGRESS_EVERY = 1.0  # secondi tra due scritture del progresso sul DB
+
+# fasi di `git clone --progress` -> intervallo di provision_progress
+_PHASES = {
+    "Receiving objects": (10, 75),
+    "Resolving deltas": (75, 85),
+    "Updating files": (85, 95),
+}
+_PROGRESS_RE = re.compile(r"(%s):\s+(\d+)%%" % "|".join(_PHASES))
+
+_site_locks = {}
+_site_locks_guard = threading.Lock()
+
+
+class ProvisionError(Exception):
+    """Provisioning can't complete: the message ends up in Site.provision_message."""
+
+
+def _site_lock(site_id):
+    with _site_locks_guard:
+        return _site_locks.setdefault(site_id, threading.Lock())
+
+
+def _mask(text):
+    token = os.environ.get("GIT_TOKEN")
+    return text.replace(token, "***") if token else text
+
+
+def remote_url(site):
+    if site.repo_owner and site.repo_name:
+        return f"https://github.com/{site.repo_owner}/{site.repo_name}.git"
+    return None
+
+
+def working_copy_path(site):
+    """repo_path, or BLOG_REPO_BASE/<slug> when it's empty; None if neither is configured."""
+    repo = (site.repo_path or "").strip()
+    if repo:
+        return repo
+    base = getattr(settings, "BLOG_REPO_BASE", "") or ""
+    return os.path.join(base, site.slug) if base else None
+
+
+# --- state machine ------------------------------------------------------------
+
+def claim(site_id, *, retry_failed=False, stale_after=None):
+    """Move a site to "cloning" if it's waiting; True when this worker owns it."""
+    from blog.models import Site
+
+    statuses = [Site.PROVISION_PENDING] + ([Site.PROVISION_FAILED] if retry_failed else [])
+    waiting = Q(provision_status__in=statuses)
+    if stale_after:
+        # worker morto a metà: "cloning" senza notizie da troppo tempo
+        waiting |= Q(provision_status=Site.PROVISION_CLONING,
+                     provision_updated_at__lt=timezone.now() - timedelta(seconds=stale_after))
+    return Site.objects.filter(waiting, pk=site_id).update(
+        provision_status=Site.PROVISION_CLONING,
+        provision_progress=0,
+        provision_message="avvio provisioning",
+        provision_updated_at=timezone.now(),
+    ) == 1
+
+
+def _update(site_id, **fields):
+    """Write progress/outcome while the site is still ours (a newer save resets it to pending)."""
+    from blog.models import Site
+
+    fields["provision_updated_at"] = timezone.now()
+    return Site.objects.filter(pk=site_id, provision_status=Site.PROVISION_CLONING).update(**fields)
+
+
+class _Progress:
+    def __init__(self, site_id):
+        self.site_id = site_id
+        self.value = 0
+        self.written_at = 0.0
+
+    def __call__(self, value, message, force=False):
+        value = max(self.value, min(int(value), 99))
+        now = time.monotonic()
+        if force or now - self.written_at >= PROGRESS_EVERY:
+            _update(self.site_id, provision_progress=value, provision_message=message[:500])
+            self.written_at = now
+        self.value = value
+
+
+# --- git ----------------------------------------------------------------------
+
+def _git(cwd, *args, check=True):
+    r = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True,
+                       timeout=getattr(settings, "BLOG_PROVISION_TIMEOUT", 600))
+    if check and r.returncode != 0:
+        raise ProvisionError(f"git {args[0]} fallito: {_mask((r.stderr or r.stdout or '').strip())[-500:]}")
+    return r
+
+
+def _auth_url(remote):
+    token = os.environ.get("GIT_TOKEN")
+    if not token or not remote.startswith("https://"):
+        return remote
+    user = os.environ.get("GIT_USERNAME", "x-access-token")
+    return remote.replace("https://", f"https://{user}:{token}@", 1)
+
+
+def _ensure_origin(repo, remote):
+    if remote and _git(repo, "remote", "get-url", "origin", check=False).returncode != 0:
+        _git(repo, "remote", "add", "origin", remote, check=False)
+
+
+def _clone(site, remote, repo, progress):
+    """Clone with progress parsing; the token never lands in .git/config."""
+    args = list(getattr(settings, "BLOG_PROVISION_CLONE_ARGS", None) or DEFAULT_CLONE_ARGS)
+    cmd = ["git", "clone", "--progress", *args]
+    if site.default_branch:
+        cmd += ["--branch", site.default_branch]
+    cmd += [_auth_url(remote), repo]
+    progress(5, f"git clone {remote}", force=True)
+
+    timeout = getattr(settings, "BLOG_PROVISION_TIMEOUT", 600)
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    killed = []
+
+    def kill():  # remote bloccato: nessun output da leggere, il loop non si sveglia da solo
+        killed.append(True)
+        proc.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    tail = []
+    buf = b""
+    try:
+        while True:
+            chunk = proc.stderr.read1(4096)
+            if not chunk:
+                break
+            buf += chunk
+            # git riscrive la riga di progresso con \r
+            *lines, buf = re.split(rb"[\r\n]", buf)
+            for raw in lines:
+                line = raw.decode("utf-8", "replace").strip()
+                if not line:
+                    continue
+                tail = (tail + [line])[-5:]
+                m = _PROGRESS_RE.search(line)
+                if m:
+                    lo, hi = _PHASES[m.group(1)]
+                    progress(lo + (hi - lo) * int(m.group(2)) / 100, line)
+        proc.wait()
+    finally:
+        timer.cancel()
+    if killed:
+        raise ProvisionError(f"git clone oltre {timeout}s, interrotto")
+    if proc.returncode != 0:
+        raise ProvisionError(f"git clone fallito: {_mask(' | '.join(tail))[-500:]}")
+    _git(repo, "remote", "set-url", "origin", remote, check=False)
+
+
+def _init(site, repo, remote, progress):
+    """No remote to clone (or a non-empty directory): init, origin, initial commit and push."""
+    branch = site.default_branch or "main"
+    progress(20, "git init", force=True)
+    _git(repo, "init")
+    _git(repo, "symbolic-ref", "HEAD", f"refs/heads/{branch}", check=False)
+    _ensure_origin(repo, remote)
+    if _git(repo, "rev-parse", "HEAD", check=False).returncode == 0:
+        return "working copy inizializzata"
+    if not [e for e in os.listdir(repo) if e != ".git"]:
+        with open(os.path.join(repo, "README.md"), "w", encoding="utf-8") as fh:
+            fh.write(f"# {site.slug}\n")
+    _git(repo, "add", "--all")
+    _git(repo, "config", "user.name", os.environ.get("GIT_COMMIT_NAME", "blog-manager"), check=False)
+    _git(repo, "config", "user.email", os.environ.get("GIT_COMMIT_EMAIL", "blog-manager@example.com"), check=False)
+    _git(repo, "commit", "-m", "chore(blog): initial commit")
+    if not remote:
+        return "working copy inizializzata (nessun remote)"
+    progress(60, f"git push {remote}", force=True)
+    r = _git(repo, "push", _auth_url(remote), f"HEAD:{branch}", check=False)
+    if r.returncode != 0:
+        # il commit iniziale resta locale: l'export lo spingerà al primo publish
+        return f"working copy inizializzata, push non riuscito: {_mask((r.stderr or '').strip())[-200:]}"
+    return "working copy inizializzata e pubblicata"
+
+
+def prepare_working_copy(site, progress):
+    """Make sure a git working copy exists for `site`. Returns (path, mode, note)."""
+    repo = working_copy_path(site)
+    if not repo:
+        raise ProvisionError("repo_path vuoto e BLOG_REPO_BASE non configurato")
+    remote = remote_url(site)
+
+    if os.path.isdir(os.path.join(repo, ".git")):
+        _ensure_origin(repo, remote)
+        return repo, "existing", "working copy esistente"
+    empty = not os.path.isdir(repo) or not os.listdir(repo)
+    if empty and remote:
+        _clone(site, remote, repo, progress)
+        return repo, "cloned", f"clonato {remote} ({site.default_branch})"
+    if not os.path.isdir(repo):
+        if (site.repo_path or "").strip():
+            # percorso esplicito senza remote da clonare: errore di configurazione, non lo creiamo
+            raise ProvisionError(f"repo_path inesistente: {repo}")
+        os.makedirs(repo, exist_ok=True)
+    return repo, "initialized", _init(site, repo, remote, progress)
+
+
+def validate_dirs(site, repo, create=False):
+    """posts_dir/media_dir must be directories inside the working copy.
+
+    A posts_dir missing from a cloned/existing repository means the wrong
+    repo or branch: that's an error. Missing media dirs (and, with
+    create=True, a posts_dir in a fresh repository) are created.
+    """
+    root = os.path.realpath(repo)
+    notes = []
+    for name in ("posts_dir", "media_dir"):
+        rel = (getattr(site, name) or "").strip().strip("/")
+        if not rel:
+            if name == "posts_dir":
+                raise ProvisionError("posts_dir vuoto")
+            continue
+        path = os.path.realpath(os.path.join(root, rel))
+        if os.path.commonpath([root, path]) != root:
+            raise ProvisionError(f"{name} fuori dalla working copy: {rel}")
+        if os.path.isdir(path):
+            continue
+        if os.path.exists(path):
+            raise ProvisionError(f"{name} non è una directory: {rel}")
+        if name == "posts_dir" and not create:
+            raise ProvisionError(f"posts_dir '{rel}' non trovato nel repo (branch {site.default_branch})")
+        os.makedirs(path, exist_ok=True)
+        notes.append(f"creata {rel}/")
+    return notes
+
+
+def provision_site(site_id, *, retry_failed=False, stale_after=None):
+    """Claim and provision one site. Returns {"site", "status", "message"}."""
+    from blog.models import Site
+
+    with _site_lock(site_id):
+        if not claim(site_id, retry_failed=retry_failed, stale_after=stale_after):
+            return {"site": site_id, "status": "skipped", "message": "non in attesa di provisioning"}
+        site = Site.objects.get(pk=site_id)
+        progress = _Progress(site_id)
+        started = time.monotonic()
+        try:
+            repo, mode, note = prepare_working_copy(site, progress)
+            progress(96, f"verifica {site.posts_dir}/{site.media_dir}", force=True)
+            notes = validate_dirs(site, repo, create=(mode == "initialized"))
+        except ProvisionError as e:
+            return _finish(site, Site.PROVISION_FAILED, str(e))
+        except Exception as e:
+            logger.exception("provisioning site=%s failed", site.slug)
+            return _finish(site, Site.PROVISION_FAILED, _mask(f"{type(e).__name__}: {e}"))
+
+        extra = {"provisioned_at": timezone.now()}
+        if not (site.repo_path or "").strip():
+            extra["repo_path"] = repo  # fallback BLOG_REPO_BASE/<slug> reso esplicito
+        message = "; ".join([note, *notes]) + f" in {time.monotonic() - started:.1f}s"
+        return _finish(site, Site.PROVISION_READY, message, **extra)
+
+
+def _finish(site, status, message, **extra):
+    from blog.models import Site
+
+    written = _update(site.pk, provision_status=status, provision_message=message[:2000],
+                      provision_progress=100 if status == Site.PROVISION_READY else 0, **extra)
+    if not written:
+        # il sito è stato modificato durante il provisioning: il nuovo giro è già in coda
+        status, message = "superseded", "impostazioni cambiate durante il provisioning"
+    log = logger.info if status != Site.PROVISION_FAILED else logger.warning
+    log("provisioning site=%s %s: %s", site.slug, status, message)
+    return {"site": site.pk, "status": status, "message": message}
+
+
+def pending_site_ids(*, retry_failed=False, stale_after=None):
+    from blog.models import Site
+
+    statuses = [Site.PROVISION_PENDING] + ([Site.PROVISION_FAILED] if retry_failed else [])
+    waiting = Q(provision_status__in=statuses)
+    if stale_after:
+        waiting |= Q(provision_status=Site.PROVISION_CLONING,
+                     provision_updated_at__lt=timezone.now() - timedelta(seconds=stale_after))
+    return list(Site.objects.filter(waiting).order_by("id").values_list("id", flat=True))
+
+
+# --- scheduling ---------------------------------------------------------------
+
+def _run_in_thread(site_id):
+    from django.db import connection
+
+    try:
+        provision_site(site_id)
+    except Exception:
+        logger.exception("provisioning thread failed for site=%s", site_id)
+    finally:
+        connection.close()  # connessione propria del thread
+
+
+def schedule_provisioning(site_id):
+    """Start the worker for `site_id` once the current transaction commits."""
+    if not getattr(settings, "BLOG_PROVISION_THREAD", True):
+        return  # ci pensa `manage.py provision_sites`
+
+    def start():
+        threading.Thread(target=_run_in_thread, args=(site_id,), daemon=True,
+                         name=f"provision-site-{site_id}").start()
+
+    transaction.on_commit(start)
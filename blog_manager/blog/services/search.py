@@ -0,0 +1,177 @@
+"""
+Full-text search over posts (title + content) behind the API `?search=` parameter.
+
+Backends:
+  - fts5:  SQLite FTS5 external-content table `blog_post_fts` (dev / PythonAnywhere),
+           kept in sync by triggers created in migration 0044; bm25 ranking (title weighted 10x),
+           native snippets, prefix match on the last term.
+  - mysql: FULLTEXT index `ft_post_title_content` (prod); MATCH ... AGAINST relevance.
+  - basic: icontains fallback for databases without full-text support.
+
+`settings.BLOG_SEARCH_BACKEND` forces a backend ("fts5", "mysql", "basic");
+the default "auto" picks the best one available on the current connection.
+Every backend returns the queryset annotated with `search_rank` (higher is better);
+`search_snippet` is filled natively by fts5 (raw content with sentinel markers,
+turned into escaped HTML by snippet_html()), otherwise built in Python by
+make_snippet(): either way the API returns escaped text with <mark> around matches.
+"""
+import html
+import logging
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "blog_post_fts"
+MYSQL_INDEX = "ft_post_title_content"
+SNIPPET_TOKENS = 16
+SNIPPET_CHARS = 160
+MARK_OPEN, MARK_CLOSE = "<mark>", "</mark>"
+# marcatori privati emessi da snippet() di FTS5: il contenuto è grezzo, va escapato prima dei <mark>
+SENTINEL_OPEN, SENTINEL_CLOSE = "\x02", "\x03"
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+_available = {}
+
+
+def search_terms(query):
+    """Word tokens of the user query (operators and quotes are never passed through)."""
+    return _TERM_RE.findall(query or "")[:16]
+
+
+def make_snippet(text, terms, width=SNIPPET_CHARS):
+    """Plain-text excerpt around the first matched term, HTML-escaped, matches wrapped in <mark>."""
+    text = re.sub(r"^\s*---\s*\n[\s\S]*?\n---\s*\n", "", text or "", count=1)
+    text = re.sub(r"\s+", " ", text).strip()
+    if not text:
+        return ""
+    lowered = text.lower()
+    hits = [lowered.find(t.lower()) for t in terms if t]
+    hits = [h for h in hits if h >= 0]
+    start = max(0, min(hits) - width // 3) if hits else 0
+    excerpt = text[start:start + width]
+    out = html.escape(excerpt)
+    for t in sorted({t for t in terms if t}, key=len, reverse=True):
+        out = re.sub(
+            f"({re.escape(html.escape(t))})", f"{MARK_OPEN}\\1{MARK_CLOSE}", out, flags=re.IGNORECASE
+        )
+    return ("…" if start > 0 else "") + out + ("…" if start + width < len(text) else "")
+
+
+def snippet_html(raw):
+    """Escape a native FTS5 snippet and turn its sentinel markers into <mark>."""
+    text = html.escape(re.sub(r"\s+", " ", raw or "").strip())
+    return text.replace(SENTINEL_OPEN, MARK_OPEN).replace(SENTINEL_CLOSE, MARK_CLOSE)
+
+
+class BasicSearchBackend:
+    """LIKE-based fallback: every term must appear in title, slug or content."""
+    name = "basic"
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        for t in terms:
+            queryset = queryset.filter(Q(title__icontains=t) | Q(slug__icontains=t) | Q(content__icontains=t))
+        # title matches first
+        return queryset.annotate(search_rank=Case(
+            When(title__icontains=terms[0], then=Value(2)), default=Value(1), output_field=IntegerField(),
+        ))
+
+
+class SQLiteFTS5Backend:
+    name = "fts5"
+
+    @staticmethod
+    def match_expression(terms):
+        # ogni termine quotato (niente sintassi FTS dall'utente), prefisso sull'ultimo
+        # (mai su un solo carattere: espanderebbe a mezzo vocabolario; 2-3 usano l'indice prefix)
+        quoted = ['"%s"' % t.replace('"', '') for t in terms]
+        if len(terms[-1]) >= 2:
+            quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        post_table = queryset.model._meta.db_table
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f"{FTS_TABLE}.rowid = {post_table}.id", f"{FTS_TABLE} MATCH %s"],
+            params=[self.match_expression(terms)],
+            select={
+                "search_rank": f"-bm25({FTS_TABLE}, 10.0, 1.0)",
+                "search_snippet": f"snippet({FTS_TABLE}, 1, %s, %s, %s, %s)",
+            },
+            select_params=[SENTINEL_OPEN, SENTINEL_CLOSE, "…", SNIPPET_TOKENS],
+        )
+
+
+class MySQLFulltextBackend:
+    name = "mysql"
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+        post_table = queryset.model._meta.db_table
+        against = " ".join(terms)
+        match = f"MATCH({post_table}.title, {post_table}.content) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+        return queryset.extra(
+            where=[match], params=[against],
+            select={"search_rank": match}, select_params=[against],
+        )
+
+
+BACKENDS = {b.name: b for b in (SQLiteFTS5Backend, MySQLFulltextBackend, BasicSearchBackend)}
+
+
+def _fts5_ready(conn):
+    with conn.cursor() as c:
+        c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return c.fetchone() is not None
+
+
+def _mysql_ready(conn):
+    with conn.cursor() as c:
+        c.execute(
+            "SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE() "
+            "AND table_name = 'blog_post' AND index_name = %s LIMIT 1",
+            [MYSQL_INDEX],
+        )
+        return c.fetchone() is not None
+
+
+def get_search_backend(conn=None):
+    conn = conn or connection
+    choice = getattr(settings, "BLOG_SEARCH_BACKEND", "auto") or "auto"
+    if choice != "auto":
+        return BACKENDS.get(choice, BasicSearchBackend)()
+
+    key = (conn.alias, str(conn.settings_dict.get("NAME")))
+    name = _available.get(key)
+    if name is None:
+        name = "basic"
+        try:
+            if conn.vendor == "sqlite" and _fts5_ready(conn):
+                name = "fts5"
+            elif conn.vendor == "mysql" and _mysql_ready(conn):
+                name = "mysql"
+        except Exception as e:
+            logger.warning("search backend detection failed, using fallback: %s", e)
+        _available[key] = name
+    return BACKENDS[name]()
+
+
+def reset_backend_cache():
+    _available.clear()
+
+
+def search_posts(queryset, query):
+    """Filter + annotate `queryset` with the configured backend (ranked, highest first)."""
+    return get_search_backend().search(queryset, query)
@@ -0,0 +1,98 @@
+"""
+Slug allocation for posts: every call site (Post.safe_slugify, the post write
+serializer, the post viewsets, bulk upsert) goes through allocate_slugs().
+
+The taken slugs sharing a prefix with the requested bases are read with one
+query, the suffixes (-2, -3, ...) are then picked in memory, so duplicates
+inside the same batch are resolved too. The base is truncated to keep the
+slug within max_len.
+
+Two concurrent creates can still pick the same free slug: the loser gets an
+IntegrityError on uniq_site_slug. Post.save retries the insert with a new
+slug when the slug was allocated here (empty slug, or allocated inside
+auto_slug()), reserving the slugs that already failed: under REPEATABLE READ
+(MySQL) the re-read may not see the row that won the race.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models import Q
+
+MAX_SLUG = 200
+# spazio riservato al suffisso (-2 ... -9999999) quando la base è al limite
+_SUFFIX_ROOM = 8
+# tentativi di insert in Post.save quando lo slug allocato viene preso da una create concorrente
+SLUG_RETRIES = 5
+
+# (site_id, slug) -> base degli slug allocati da auto_slug() nel contesto corrente
+_AUTO_SLUGS = ContextVar("blog_auto_slugs", default=None)
+
+
+def _with_suffix(base, i, max_len):
+    suffix = f"-{i}"
+    return f"{base[:max_len - len(suffix)].rstrip('-')}{suffix}"
+
+
+def allocate_slugs(site_id, bases, *, exclude_pks=(), reserved=(), max_len=MAX_SLUG):
+    """Return one unique slug per entry of `bases` (same order) for posts of `site_id`.
+
+    `reserved` slugs are treated as taken even if the query doesn't see them.
+    """
+    from blog.models import Post
+
+    bases = [(b or "post")[:max_len].strip("-") or "post" for b in bases]
+    if not bases:
+        return []
+    prefixes = {b[:max_len - _SUFFIX_ROOM] if len(b) > max_len - _SUFFIX_ROOM else b for b in bases}
+    query = Q()
+    for prefix in prefixes:
+        query |= Q(slug__startswith=prefix)
+    taken = set(
+        Post.objects.filter(site_id=site_id).filter(query)
+        .exclude(pk__in=list(exclude_pks))
+        .values_list("slug", flat=True)
+    )
+    taken.update(reserved)
+
+    slugs = []
+    for base in bases:
+        candidate, i = base, 2
+        while candidate in taken:
+            candidate = _with_suffix(base, i, max_len)
+            i += 1
+        taken.add(candidate)
+        slugs.append(candidate)
+    return slugs
+
+
+def allocate_slug(site_id, base, *, exclude_pk=None, reserved=(), max_len=MAX_SLUG):
+    """Single-base allocate_slugs(): still one query, whatever the number of collisions."""
+    exclude = () if exclude_pk is None else (exclude_pk,)
+    return allocate_slugs(site_id, [base], exclude_pks=exclude, reserved=reserved, max_len=max_len)[0]
+
+
+@contextmanager
+def auto_slug(site_id, base):
+    """Allocate a slug for a post created inside the block.
+
+    If a concurrent create takes the slug first, Post.save re-allocates it from
+    `base` instead of failing on the unique constraint.
+    """
+    slug = allocate_slug(site_id, base)
+    token = _AUTO_SLUGS.set({**(_AUTO_SLUGS.get() or {}), (site_id, slug): base})
+    try:
+        yield slug
+    finally:
+        _AUTO_SLUGS.reset(token)
+
+
+def auto_slug_base(site_id, slug):
+    """Base of a slug allocated by auto_slug() in the current context, else None."""
+    return (_AUTO_SLUGS.get() or {}).get((site_id, slug))
+
+
+def is_slug_conflict(exc):
+    """True if an IntegrityError comes from the (site, slug) unique constraint."""
+    msg = str(exc).lower()
+    # MySQL/PostgreSQL riportano il nome del vincolo, SQLite le colonne
+    return "uniq_site_slug" in msg or "blog_post.slug" in msg
@@ -0,0 +1,270 @@
+"""
+Static JSON snapshots of a site's public data for Jekyll builds and widgets.
+
+For every site three artifacts are written: posts.json (published posts in
+the compact API list shape), taxonomy.json (same payload as TaxonomyView)
+and authors.json. Each one is stored with a content-hashed name plus .gz
+and, when the optional `brotli` package is installed, .br variants; a stable
+<name>.json copy is kept for Jekyll's `site.data`, and manifest.json maps
+logical names to the current files.
+
+Output goes to BLOG_SNAPSHOT_DIR/<site slug>/ or, when that is unset, to
+<repo>/_data/blogmanager/. Regeneration is incremental: after a publish only
+the affected site and artifacts are rebuilt and files whose content hash is
+unchanged are not rewritten. The rebuild never runs in the request: after
+commit it is queued for a per-site daemon thread (BLOG_SNAPSHOT_THREAD), which
+merges the requests that pile up while it works; with the thread off, run
+`manage.py build_snapshots` from cron instead.
+Enabled by BLOG_SNAPSHOTS; `manage.py build_snapshots` rebuilds on demand.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+try:
+    import brotli  # optional dependency
+except ImportError:  # pragma: no cover - dipende dall'ambiente
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+ARTIFACTS = ("posts", "taxonomy", "authors")
+MANIFEST = "manifest.json"
+HASH_CHARS = 12
+BROTLI_QUALITY = 5  # 11 costa secondi su payload di qualche MB per pochi punti di compressione
+
+_pending = threading.local()
+_queued = {}  # site_id -> artifact in attesa del worker del sito
+_running = set()
+_queue_lock = threading.Lock()
+
+
+def enabled():
+    return bool(getattr(settings, "BLOG_SNAPSHOTS", False))
+
+
+def snapshot_dir(site):
+    """Output directory for `site`, or None when neither a snapshot dir nor a repo is configured."""
+    base = (getattr(settings, "BLOG_SNAPSHOT_DIR", "") or "").strip()
+    if base:
+        return os.path.join(base, site.slug)
+    repo = (site.repo_path or "").strip()
+    if not repo and getattr(settings, "BLOG_REPO_BASE", None):
+        repo = os.path.join(settings.BLOG_REPO_BASE, site.slug)
+    if repo and os.path.isdir(repo):
+        return os.path.join(repo, "_data", "blogmanager")
+    return None
+
+
+# --- payloads -----------------------------------------------------------------
+
+def _posts_payload(site):
+    from django.db.models import Prefetch
+    from django.db.models.functions import Substr
+
+    from blog.models import Category, Post
+    from blog.serializers import EXCERPT_SOURCE_CHARS, PostListSerializer
+
+    qs = (
+        Post.objects.filter(site=site, status="published")
+        .defer("content")
+        .annotate(content_head=Substr("content", 1, EXCERPT_SOURCE_CHARS))
+        .prefetch_related(Prefetch("categories", queryset=Category.objects.only("id")))
+        .order_by("-published_at", "-id")
+    )
+    return PostListSerializer(qs, many=True).data
+
+
+def _taxonomy_payload(site):
+    from .taxonomy import taxonomy_for_site
+
+    return taxonomy_for_site(site.pk)
+
+
+def _authors_payload(site):
+    from django.db.models import Q
+
+    from blog.models import Author
+    from blog.serializers import AuthorSerializer
+
+    # autori del sito + autori globali che firmano post del sito
+    qs = Author.objects.filter(Q(site=site) | Q(site__isnull=True, post__site=site)).distinct().order_by("id")
+    return AuthorSerializer(qs, many=True).data
+
+
+PAYLOADS = {
+    "posts": _posts_payload,
+    "taxonomy": _taxonomy_payload,
+    "authors": _authors_payload,
+}
+
+
+def render(data):
+    """Same compact encoding as the API (dates, decimals, unicode)."""
+    from rest_framework.renderers import JSONRenderer
+
+    return JSONRenderer().render(data)
+
+
+# --- files --------------------------------------------------------------------
+
+def _write_atomic(path, payload):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(payload)
+    os.replace(tmp, path)
+
+
+def _read_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST), "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_artifact(out_dir, name, raw):
+    digest = hashlib.sha256(raw).hexdigest()
+    stem = f"{name}.{digest[:HASH_CHARS]}.json"
+    entry = {"file": stem, "sha256": digest, "bytes": len(raw)}
+    _write_atomic(os.path.join(out_dir, stem), raw)
+    gz = gzip.compress(raw, compresslevel=9, mtime=0)  # mtime=0: output deterministico
+    _write_atomic(os.path.join(out_dir, stem + ".gz"), gz)
+    entry["gzip"] = {"file": stem + ".gz", "bytes": len(gz)}
+    if brotli is not None:
+        br = brotli.compress(raw, quality=BROTLI_QUALITY)
+        _write_atomic(os.path.join(out_dir, stem + ".br"), br)
+        entry["br"] = {"file": stem + ".br", "bytes": len(br)}
+    _write_atomic(os.path.join(out_dir, f"{name}.json"), raw)
+    return entry
+
+
+def _prune(out_dir, keep):
+    """Drop hashed files that neither the current nor the previous manifest references."""
+    for fname in os.listdir(out_dir):
+        parts = fname.split(".")
+        if len(parts) >= 3 and parts[0] in ARTIFACTS and fname not in keep:
+            try:
+                os.remove(os.path.join(out_dir, fname))
+            except OSError:
+                pass
+
+
+def _files(entry):
+    names = {entry.get("file")}
+    for variant in ("gzip", "br"):
+        if isinstance(entry.get(variant), dict):
+            names.add(entry[variant].get("file"))
+    return {n for n in names if n}
+
+
+def write_site_snapshot(site, artifacts=ARTIFACTS, *, force=False):
+    """Rebuild `artifacts` of one site; unchanged ones are left alone. Returns a summary dict."""
+    out_dir = snapshot_dir(site)
+    if not out_dir:
+        logger.info("snapshot skipped for site=%s: no BLOG_SNAPSHOT_DIR and no repo working copy", site.slug)
+        return {"site": site.slug, "dir": None, "written": [], "unchanged": []}
+    os.makedirs(out_dir, exist_ok=True)
+
+    previous = _read_manifest(out_dir)
+    entries = dict(previous.get("artifacts") or {})
+    written, unchanged = [], []
+    for name in artifacts:
+        raw = render(PAYLOADS[name](site))
+        digest = hashlib.sha256(raw).hexdigest()
+        old = entries.get(name) or {}
+        if not force and old.get("sha256") == digest and os.path.exists(os.path.join(out_dir, old.get("file", ""))):
+            unchanged.append(name)
+            continue
+        entries[name] = _write_artifact(out_dir, name, raw)
+        written.append(name)
+
+    if written or not previous:
+        manifest = {
+            "site": site.slug,
+            "generated_at": timezone.now().isoformat(),
+            "content_version": site.content_version,
+            "artifacts": entries,
+        }
+        _write_atomic(os.path.join(out_dir, MANIFEST), render(manifest))
+        keep = set()
+        for entry in list(entries.values()) + list((previous.get("artifacts") or {}).values()):
+            keep |= _files(entry)
+        _prune(out_dir, keep)
+
+    logger.info("snapshot site=%s written=%s unchanged=%s dir=%s", site.slug, written, unchanged, out_dir)
+    return {"site": site.slug, "dir": out_dir, "written": written, "unchanged": unchanged}
+
+
+# --- scheduling ---------------------------------------------------------------
+
+class _SnapshotJob:
+    """on_commit callback queueing a rebuild of some artifacts of one site; merges later requests of the same transaction."""
+
+    def __init__(self, site_id, artifacts):
+        self.site_id = site_id
+        self.artifacts = set(artifacts)
+
+    def __call__(self):
+        if getattr(_pending, "jobs", {}).get(self.site_id) is self:
+            del _pending.jobs[self.site_id]
+        with _queue_lock:
+            _queued.setdefault(self.site_id, set()).update(self.artifacts)
+            if self.site_id in _running:
+                return  # il worker attivo riprende la coda prima di uscire
+            _running.add(self.site_id)
+        _spawn(self.site_id)
+
+
+def _drain(site_id):
+    """Rebuild the queued artifacts of a site until nothing is left."""
+    from blog.models import Site
+
+    while True:
+        with _queue_lock:
+            artifacts = _queued.pop(site_id, None)
+            if not artifacts:
+                _running.discard(site_id)
+                return
+        try:
+            site = Site.objects.get(pk=site_id)
+            write_site_snapshot(site, [a for a in ARTIFACTS if a in artifacts])
+        except Exception:
+            logger.exception("snapshot regeneration failed for site=%s", site_id)
+
+
+def _run_in_thread(site_id):
+    from django.db import connection
+
+    try:
+        _drain(site_id)
+    finally:
+        connection.close()  # connessione propria del thread
+
+
+def _spawn(site_id):
+    threading.Thread(target=_run_in_thread, args=(site_id,), daemon=True,
+                     name=f"snapshot-site-{site_id}").start()
+
+
+def schedule_site_snapshot(site_id, artifacts=("posts", "taxonomy")):
+    """Rebuild the given artifacts of a site off the request once the current transaction commits (one job per site)."""
+    if not enabled() or site_id is None or not getattr(settings, "BLOG_SNAPSHOT_THREAD", True):
+        return  # thread disattivato: ci pensa `manage.py build_snapshots`
+    jobs = _pending.__dict__.setdefault("jobs", {})
+    job = jobs.get(site_id)
+    conn = transaction.get_connection()
+    # job ancora in coda nella transazione corrente (non scartato da un rollback): accoda gli artifact
+    if job is not None and any(entry[1] is job for entry in conn.run_on_commit):
+        job.artifacts.update(artifacts)
+        return
+    job = jobs[site_id] = _SnapshotJob(site_id, artifacts)
+    transaction.on_commit(job)
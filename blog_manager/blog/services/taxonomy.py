@@ -0,0 +1,258 @@
+"""
+Materialized taxonomy (site -> cluster -> subcluster) behind TaxonomyView.
+
+TaxonomyEntry rows carry post_count and a few example titles; memberships live in
+TaxonomyEntry.posts, so a post save/delete only touches the entries it enters or
+leaves. rebuild_site_taxonomy() recomputes everything in bulk.
+"""
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Prefetch
+
+from .versions import bump_site_versions
+
+logger = logging.getLogger(__name__)
+
+NO_CATEGORY = "(no-category)"
+NO_SUBCLUSTER = "(no-subcluster)"
+EXAMPLES_PER_ENTRY = 5
+# campi che possono cambiare la posizione di un post nella tassonomia
+TAXONOMY_FIELDS = {"content", "title", "site", "site_id"}
+
+def _as_list(value):
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(x).strip() for x in value if x]
+    return [str(value).strip()]
+
+
+def taxonomy_pairs(fm, fallback_categories=None):
+    """Return the set of (cluster, subcluster) names for a parsed front-matter.
+
+    `categories`/`category` give the clusters, `subcluster`/`subclusters` the
+    subclusters. Without clusters in the front-matter, `fallback_categories()`
+    (names of the M2M categories) is consulted; it is only called when needed.
+    """
+    clusters, subs = [], []
+    if isinstance(fm, dict):
+        clusters = _as_list(fm.get('categories') or fm.get('category'))
+        subs = _as_list(fm.get('subcluster') or fm.get('subclusters'))
+
+    if not clusters and fallback_categories is not None:
+        try:
+            for name in fallback_categories():
+                name = name or ''
+                clusters.append(name.split('/')[0].strip() if '/' in name else name.strip())
+        except Exception:
+            pass
+
+    if not clusters and not subs:
+        return set()
+    return {(c, s) for c in (clusters or [NO_CATEGORY]) for s in (subs or [NO_SUBCLUSTER])}
+
+
+def post_taxonomy_pairs(post):
+    # Post.frontmatter is filled on save (and by backfill_frontmatter_fields): no YAML here
+    return taxonomy_pairs(
+        post.frontmatter,
+        lambda: [c.name for c in post.categories.all()],
+    )
+
+
+def _examples(rows):
+    return [[pid, title or f'post-{pid}'] for pid, title in rows[:EXAMPLES_PER_ENTRY]]
+
+
+def refresh_entries(entry_ids):
+    """Recompute post_count/examples of the given entries from their memberships.
+
+    Entries left without posts are deleted.
+    """
+    from blog.models import Post, TaxonomyEntry
+
+    entry_ids = set(entry_ids)
+    if not entry_ids:
+        return
+    counts = dict(
+        TaxonomyEntry.objects.filter(pk__in=entry_ids)
+        .annotate(n=Count('posts'))
+        .values_list('pk', 'n')
+    )
+    empty = [eid for eid in entry_ids if not counts.get(eid)]
+    if empty:
+        TaxonomyEntry.objects.filter(pk__in=empty).delete()
+
+    live = [eid for eid in entry_ids if counts.get(eid)]
+    if not live:
+        return
+    entries = list(TaxonomyEntry.objects.filter(pk__in=live))
+    for entry in entries:
+        rows = list(
+            Post.objects.filter(taxonomy_entries=entry.pk)
+            .order_by('id')
+            .values_list('id', 'title')[:EXAMPLES_PER_ENTRY]
+        )
+        entry.post_count = counts[entry.pk]
+        entry.examples = _examples(rows)
+    TaxonomyEntry.objects.bulk_update(entries, ['post_count', 'examples', 'updated_at'])
+
+
+def sync_post_taxonomy(post):
+    """Move a saved post into the entries matching its current front-matter."""
+    from blog.models import TaxonomyEntry
+
+    pairs = post_taxonomy_pairs(post)
+    site_id = post.site_id
+    current = {}
+    stale_title = set()
+    for eid, esite, cluster, sub, examples in (
+        TaxonomyEntry.objects.filter(posts=post.pk)
+        .values_list('id', 'site_id', 'cluster', 'subcluster', 'examples')
+    ):
+        if esite != site_id:
+            current[(None, eid)] = eid  # sito cambiato: va rimosso
+            continue
+        current[(cluster, sub)] = eid
+        if any(pid == post.pk and title != post.title for pid, title in examples or []):
+            stale_title.add(eid)
+
+    removed = [eid for key, eid in current.items() if key not in pairs]
+    added = [p for p in pairs if p not in current]
+    if not removed and not added and not stale_title:
+        return
+
+    through = TaxonomyEntry.posts.through
+    with transaction.atomic():
+        if removed:
+            through.objects.filter(post_id=post.pk, taxonomyentry_id__in=removed).delete()
+        added_ids = []
+        if added:
+            TaxonomyEntry.objects.bulk_create(
+                [TaxonomyEntry(site_id=site_id, cluster=c, subcluster=s) for c, s in added],
+                ignore_conflicts=True,
+            )
+            wanted = set(added)
+            added_ids = [
+                eid for eid, c, s in TaxonomyEntry.objects.filter(
+                    site_id=site_id, cluster__in={c for c, _ in added}
+                ).values_list('id', 'cluster', 'subcluster')
+                if (c, s) in wanted
+            ]
+            through.objects.bulk_create(
+                [through(taxonomyentry_id=eid, post_id=post.pk) for eid in added_ids],
+                ignore_conflicts=True,
+            )
+        refresh_entries(set(removed) | set(added_ids) | stale_title)
+
+
+def add_posts_to_taxonomy(posts):
+    """Bulk variant of sync_post_taxonomy for posts not in any entry yet (just created)."""
+    from blog.models import Category, TaxonomyEntry
+    from django.db.models import prefetch_related_objects
+
+    posts = [p for p in posts if p.pk]
+    # fallback sulle categorie M2M (post senza cluster nel front-matter): una query per tutti
+    prefetch_related_objects(posts, Prefetch('categories', queryset=Category.objects.only('id', 'name')))
+    members = defaultdict(list)
+    for p in posts:
+        for cluster, sub in post_taxonomy_pairs(p):
+            members[(p.site_id, cluster, sub)].append(p.pk)
+    if not members:
+        return 0
+
+    through = TaxonomyEntry.posts.through
+    with transaction.atomic():
+        TaxonomyEntry.objects.bulk_create(
+            [TaxonomyEntry(site_id=sid, cluster=c, subcluster=s) for sid, c, s in members],
+            ignore_conflicts=True,
+        )
+        clusters = defaultdict(set)
+        for sid, c, _s in members:
+            clusters[sid].add(c)
+        ids = {}
+        for sid, names in clusters.items():
+            for eid, c, s in TaxonomyEntry.objects.filter(site_id=sid, cluster__in=names).values_list('id', 'cluster', 'subcluster'):
+                ids[(sid, c, s)] = eid
+        links = [
+            through(taxonomyentry_id=ids[key], post_id=pid)
+            for key, pids in members.items() if key in ids
+            for pid in pids
+        ]
+        through.objects.bulk_create(links, ignore_conflicts=True, batch_size=1000)
+        refresh_entries({ids[key] for key in members if key in ids})
+    return len(links)
+
+
+def rebuild_site_taxonomy(site_id=None):
+    """Recompute the materialized taxonomy for one site (or all sites) in bulk."""
+    from blog.models import Category, Post, TaxonomyEntry
+
+    posts = Post.objects.only('id', 'site_id', 'title', 'frontmatter').prefetch_related(
+        Prefetch('categories', queryset=Category.objects.only('id', 'name'))
+    ).order_by('id')
+    entries = TaxonomyEntry.objects.all()
+    if site_id is not None:
+        posts = posts.filter(site_id=site_id)
+        entries = entries.filter(site_id=site_id)
+
+    members = defaultdict(list)
+    scanned = 0
+    for p in posts.iterator(chunk_size=500):
+        scanned += 1
+        for cluster, sub in post_taxonomy_pairs(p):
+            members[(p.site_id, cluster, sub)].append((p.pk, p.title))
+
+    through = TaxonomyEntry.posts.through
+    with transaction.atomic():
+        entries.delete()
+        created = TaxonomyEntry.objects.bulk_create([
+            TaxonomyEntry(
+                site_id=sid, cluster=cluster, subcluster=sub,
+                post_count=len(rows), examples=_examples(rows),
+            )
+            for (sid, cluster, sub), rows in members.items()
+        ], batch_size=500)
+        if created and created[0].pk is None:
+            # backend senza RETURNING (MySQL): rileggi gli id appena inseriti
+            ids = {
+                (sid, cluster, sub): eid
+                for eid, sid, cluster, sub in entries.values_list('id', 'site_id', 'cluster', 'subcluster')
+            }
+            for e in created:
+                e.pk = ids.get((e.site_id, e.cluster, e.subcluster))
+        links = [
+            through(taxonomyentry_id=e.pk, post_id=pid)
+            for e in created
+            for pid, _title in members[(e.site_id, e.cluster, e.subcluster)]
+        ]
+        through.objects.bulk_create(links, batch_size=1000)
+        bump_site_versions(None if site_id is None else [site_id])
+
+    logger.info("taxonomy rebuilt site=%s posts=%s entries=%s links=%s", site_id, scanned, len(created), len(links))
+    return {"posts": scanned, "entries": len(created), "memberships": len(links)}
+
+
+def taxonomy_for_site(site_id=None):
+    """Grouped taxonomy in the TaxonomyView shape, read from the materialized table."""
+    from blog.models import TaxonomyEntry
+
+    qs = TaxonomyEntry.objects.all()
+    if site_id is not None:
+        qs = qs.filter(site_id=site_id)
+
+    grouped = defaultdict(dict)
+    for cluster, sub, count, examples in qs.order_by('cluster', 'subcluster').values_list(
+        'cluster', 'subcluster', 'post_count', 'examples'
+    ):
+        slot = grouped[cluster].setdefault(sub, {'name': sub, 'count': 0, 'examples': []})
+        slot['count'] += count
+        for _pid, title in examples or []:
+            if len(slot['examples']) < EXAMPLES_PER_ENTRY and title not in slot['examples']:
+                slot['examples'].append(title)
+    return [
+        {'category': cluster, 'subclusters': [subs[k] for k in sorted(subs)]}
+        for cluster, subs in sorted(grouped.items())
+    ]
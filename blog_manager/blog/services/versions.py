@@ -0,0 +1,80 @@
+"""
+Per-site content version markers for conditional GET (and response caching).
+
+`Site.content_version` is bumped by the Post/Category/Comment/PostImage/Site
+signals with a single UPDATE. The new value is max(previous + 1, now in µs),
+so it is monotonic, doubles as a Last-Modified timestamp and never repeats
+even if a stale Site instance writes an older value back with save().
+
+Readers need one query: the site row, or MAX/COUNT over all sites for
+listings that are not scoped to a single site.
+"""
+import logging
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Count, F, Max, Value
+from django.db.models.functions import Greatest
+
+logger = logging.getLogger(__name__)
+
+
+def _now_us():
+    return time.time_ns() // 1000
+
+
+def bump_site_version(site_id=None, *, post_id=None):
+    """Mark the content of `site_id` (or of the site owning `post_id`) as changed."""
+    from blog.models import Site
+
+    if site_id is None and post_id is None:
+        return
+    qs = Site.objects.filter(pk=site_id) if site_id is not None else Site.objects.filter(posts__pk=post_id)
+    try:
+        qs.update(content_version=Greatest(F("content_version") + 1, Value(_now_us())))
+    except Exception as e:
+        logger.warning("Failed to bump content version (site=%s post=%s): %s", site_id, post_id, e)
+
+
+def bump_site_versions(site_ids=None):
+    """Bulk variant for paths that bypass model signals (bulk_create/bulk_update/raw SQL); None = all sites."""
+    from blog.models import Site
+
+    qs = Site.objects.all() if site_ids is None else Site.objects.filter(pk__in=list(site_ids))
+    try:
+        qs.update(content_version=Greatest(F("content_version") + 1, Value(_now_us())))
+    except Exception as e:
+        logger.warning("Failed to bump content versions (sites=%s): %s", site_ids, e)
+
+
+class ContentVersion:
+    """Result of a version lookup: opaque token + last-modified datetime."""
+    __slots__ = ("token", "last_modified")
+
+    def __init__(self, token, version):
+        self.token = token
+        self.last_modified = (
+            datetime.fromtimestamp(version / 1_000_000, tz=dt_timezone.utc) if version and version > 1_000_000 else None
+        )
+
+
+def site_version(site_id=None):
+    """Version of one site, or of all sites when `site_id` is None. None if the site does not exist."""
+    from blog.models import Site
+
+    if site_id is not None:
+        version = Site.objects.filter(pk=site_id).values_list("content_version", flat=True).first()
+        return None if version is None else ContentVersion(f"s{site_id}.{version}", version)
+    agg = Site.objects.aggregate(v=Max("content_version"), n=Count("id"))
+    version = agg["v"] or 0
+    return ContentVersion(f"all.{agg['n']}.{version}", version)
+
+
+def post_site_version(post_id):
+    """Version of the site owning `post_id` (single join query). None if the post does not exist."""
+    from blog.models import Site
+
+    row = Site.objects.filter(posts__pk=post_id).values_list("pk", "content_version").first()
+    if row is None:
+        return None
+    return ContentVersion(f"s{row[0]}.{row[1]}", row[1])
@@ -1,10 +1,13 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete
 from django.dispatch import receiver
 import re
 import yaml
-from .models import Post, Category
+import logging
+import threading
+from .models import Author, Category, Comment, Post, PostImage, Site
 from django.utils.text import slugify as dj_slugify
-from django.db.utils import DataError
+from django.db import transaction
+from django.db.utils import DataError, IntegrityError
 import uuid
 import hashlib
 
@@ -38,14 +41,186 @@ def _extract_values_from_fm(fm_text):
     return category_vals, sub_vals
 
 
+# Per-site cache {site_id: {(cluster_slug, subcluster_slug): category_id}}.
+# Filled with one query per site (after commit), invalidated by Category post_save/post_delete.
+_CATEGORY_CACHE = {}
+_CATEGORY_CACHE_LOCK = threading.Lock()
+
+MAX_COMPAT_SLUG = 200
+
+
+def _compat_slug(cluster_slug, subcluster_slug):
+    """Backwards-compatible Category.slug (cluster or cluster-subcluster), fitting the DB column."""
+    compat_slug = f"{cluster_slug}-{subcluster_slug}" if subcluster_slug else cluster_slug
+    # Defensive: ensure compat_slug fits DB column limits (MySQL enforces VARCHAR length)
+    # If too long, truncate and append a short hash to preserve uniqueness.
+    if len(compat_slug) > MAX_COMPAT_SLUG:
+        truncated = compat_slug[: (MAX_COMPAT_SLUG - 1 - 8)]  # leave room for '-' and hash
+        compat_slug = f"{truncated}-{hashlib.sha1(compat_slug.encode('utf-8')).hexdigest()[:8]}"
+    return compat_slug
+
+
+def invalidate_category_cache(site_id=None):
+    """Drop cached category ids for a site (or for all sites)."""
+    with _CATEGORY_CACHE_LOCK:
+        if site_id is None:
+            _CATEGORY_CACHE.clear()
+        else:
+            _CATEGORY_CACHE.pop(site_id, None)
+
+
+def _site_category_map(site_id):
+    with _CATEGORY_CACHE_LOCK:
+        cached = _CATEGORY_CACHE.get(site_id)
+    if cached is not None:
+        return cached
+    mapping = {
+        (cs, ss): pk
+        for cs, ss, pk in Category.objects.filter(site_id=site_id).values_list('cluster_slug', 'subcluster_slug', 'id')
+    }
+    _remember(site_id, mapping)
+    return mapping
+
+
+def _remember(site_id, mapping, *, merge=False):
+    """Store ids in the cache once the current transaction commits (rolled back rows never get cached)."""
+    def _store():
+        with _CATEGORY_CACHE_LOCK:
+            if not merge:
+                _CATEGORY_CACHE[site_id] = dict(mapping)
+            elif site_id in _CATEGORY_CACHE:
+                _CATEGORY_CACHE[site_id] = {**_CATEGORY_CACHE[site_id], **mapping}
+
+    transaction.on_commit(_store)
+
+
+def resolve_category_ids(site_id, category_specs):
+    """Return category ids for `category_specs` [(cluster_slug, cluster_name, subcluster_slug, full_name)].
+
+    Uses the per-site cache; missing rows are inserted with one bulk_create(ignore_conflicts=True)
+    and read back with one query.
+    """
+    mapping = resolve_category_map(site_id, category_specs)
+    return [mapping[(spec[0], spec[2])] for spec in category_specs if (spec[0], spec[2]) in mapping]
+
+
+def resolve_category_map(site_id, category_specs):
+    """Like resolve_category_ids, but return the whole {(cluster_slug, subcluster_slug): id} map of the site."""
+    mapping = _site_category_map(site_id)
+    missing = [spec for spec in category_specs if (spec[0], spec[2]) not in mapping]
+    if missing:
+        Category.objects.bulk_create(
+            [
+                Category(
+                    site_id=site_id,
+                    cluster_slug=cluster_slug,
+                    subcluster_slug=subcluster_slug,
+                    name=(full_name if full_name else cluster_name)[:100],
+                    slug=_compat_slug(cluster_slug, subcluster_slug),  # Keep for backwards compatibility
+                )
+                for cluster_slug, cluster_name, subcluster_slug, full_name in missing
+            ],
+            ignore_conflicts=True,
+        )
+        clusters = {spec[0] for spec in missing}
+        fresh = {
+            (cs, ss): pk
+            for cs, ss, pk in Category.objects.filter(site_id=site_id, cluster_slug__in=clusters)
+            .values_list('cluster_slug', 'subcluster_slug', 'id')
+        }
+        mapping = {**mapping, **fresh}
+        _remember(site_id, fresh, merge=True)
+    return mapping
+
+
+class StaleCategoryIds(Exception):
+    """A cached category id no longer exists (row deleted by another process)."""
+
+
+def _attach_categories(post_id, category_ids):
+    """Add missing post<->category links with a single through-table insert.
+
+    The cached ids are checked against blog_category by the same query that
+    reads the current links: a vanished category raises StaleCategoryIds
+    instead of an FK error (which SQLite only reports at commit).
+    """
+    from django.db.models import Exists, OuterRef
+
+    Through = Post.categories.through
+    wanted = list(dict.fromkeys(category_ids))
+    linked = dict(
+        Category.objects.filter(pk__in=wanted)
+        .annotate(linked=Exists(Through.objects.filter(post_id=post_id, category_id=OuterRef('pk'))))
+        .values_list('id', 'linked')
+    )
+    if len(linked) != len(wanted):
+        raise StaleCategoryIds(sorted(set(wanted) - set(linked)))
+    to_add = [cid for cid in wanted if not linked[cid]]
+    if to_add:
+        Through.objects.bulk_create(
+            [Through(post_id=post_id, category_id=cid) for cid in to_add],
+            ignore_conflicts=True,
+        )
+    return to_add
+
+
+def category_specs_from_values(cats, subs):
+    """Category specs {(cluster_slug, subcluster_slug): spec} for front-matter categories/subclusters.
+
+    Every cluster gets its own category plus one per cluster/subcluster pair;
+    without clusters the subclusters land under 'uncategorized'.
+    """
+    if not cats:
+        cats = ['uncategorized']
+    if not subs:
+        subs = [None]  # Use None instead of string for no subcluster
+
+    category_specs = {}
+    for c in cats:
+        cluster_name = c.strip()
+        cluster_slug = dj_slugify(cluster_name) or 'uncategorized'
+
+        # Add the cluster itself as a category
+        category_specs.setdefault((cluster_slug, None), (cluster_slug, cluster_name, None, None))
+
+        # Add cluster/subcluster combinations
+        for s in subs:
+            if s and s.strip():
+                subcluster_name = s.strip()
+                subcluster_slug = dj_slugify(subcluster_name)
+                full_name = f"{cluster_name}/{subcluster_name}"
+                category_specs.setdefault((cluster_slug, subcluster_slug), (cluster_slug, cluster_name, subcluster_slug, full_name))
+    return category_specs
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def _invalidate_category_cache_on_change(sender, instance, **kwargs):
+    invalidate_category_cache(getattr(instance, 'site_id', None))
+
+
 @receiver(post_save, sender=Post)
 def ensure_categories_from_post(sender, instance, created, **kwargs):
     """Ensure Category rows exist for clusters and cluster/subcluster pairs found in a Post's front-matter.
     
     This uses the new normalized category structure to avoid duplicates.
     Associates categories from front-matter to post.categories M2M relation for hierarchical export.
-    This runs on every Post save and is idempotent.
+    This runs on every Post save and is idempotent: category ids come from a per-site cache,
+    missing rows are bulk-inserted and the M2M diff is applied with one through-table insert.
+    Derivation is skipped when the front-matter fingerprint matches Post.frontmatter_hash
+    (prose-only edits, saves that don't touch content such as export metadata updates).
     """
+    from .utils import frontmatter_fingerprint, mark_frontmatter_synced
+
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'content' not in update_fields:
+        return
+    fingerprint = frontmatter_fingerprint(instance)
+    if fingerprint == (getattr(instance, 'frontmatter_hash', '') or ''):
+        instance._frontmatter_changed_fp = None
+        return
+    instance._frontmatter_changed_fp = fingerprint
+
     raw = instance.content or getattr(instance, 'body', '') or ''
     m = fm_re.search(raw)
     if not m:
@@ -66,91 +241,214 @@ def ensure_categories_from_post(sender, instance, created, **kwargs):
             pass
 
     if not cats and not subs:
+        try:
+            mark_frontmatter_synced(instance, fingerprint)
+        except Exception:
+            pass
         return
 
-    if not cats:
-        cats = ['uncategorized']
-    if not subs:
-        subs = [None]  # Use None instead of string for no subcluster
-
     site_id = getattr(instance.site, 'id', instance.site_id)
-    
-    # Collect unique (cluster, subcluster) tuples to create categories
-    category_specs = set()
-    
-    for c in cats:
-        cluster_name = c.strip()
-        cluster_slug = dj_slugify(cluster_name) or 'uncategorized'
-        
-        # Add the cluster itself as a category
-        category_specs.add((cluster_slug, cluster_name, None, None))
-        
-        # Add cluster/subcluster combinations
-        for s in subs:
-            if s and s.strip():
-                subcluster_name = s.strip()
-                subcluster_slug = dj_slugify(subcluster_name)
-                full_name = f"{cluster_name}/{subcluster_name}"
-                category_specs.add((cluster_slug, cluster_name, subcluster_slug, full_name))
-    
-    # Bulk create/get categories using the new normalized structure
-    categories_to_associate = []
-    
-    for cluster_slug, cluster_name, subcluster_slug, full_name in category_specs:
-        display_name = full_name if full_name else cluster_name
-        
-        # Create backwards-compatible slug for the slug field
-        if subcluster_slug:
-            compat_slug = f"{cluster_slug}-{subcluster_slug}"
-        else:
-            compat_slug = cluster_slug
-
-        # Defensive: ensure compat_slug fits DB column limits (MySQL enforces VARCHAR length)
-        # If too long, truncate and append a short hash to preserve uniqueness.
-        MAX_COMPAT_SLUG = 200
-        def _short_hash(s: str, length: int = 8) -> str:
-            return hashlib.sha1(s.encode('utf-8')).hexdigest()[:length]
-
-        if len(compat_slug) > MAX_COMPAT_SLUG:
-            truncated = compat_slug[: (MAX_COMPAT_SLUG - 1 - 8)]  # leave room for '-' and hash
-            compat_slug = f"{truncated}-{_short_hash(compat_slug)}"
-        
-        try:
-            cat_obj, cat_created = Category.objects.get_or_create(
-                site_id=site_id, 
-                cluster_slug=cluster_slug,
-                subcluster_slug=subcluster_slug,
-                defaults={
-                    'name': display_name,
-                    'slug': compat_slug,  # Keep for backwards compatibility
-                }
-            )
-            categories_to_associate.append(cat_obj)
-            
-        except Exception as e:
-            # Log the error but don't break the save process
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"Failed to create category {cluster_slug}/{subcluster_slug}: {e}")
+    category_specs = category_specs_from_values(cats, subs)
+
+    try:
+        category_ids = resolve_category_ids(site_id, list(category_specs.values()))
+    except Exception as e:
+        # Log the error but don't break the save process
+        logging.getLogger(__name__).warning("Failed to create categories for post %s: %s", instance.pk, e)
+        invalidate_category_cache(site_id)
+        return
     
     # Associate categories with post through M2M relation
-    if categories_to_associate:
-        try:
-            # Get current categories to avoid unnecessary database hits
-            current_category_ids = set(instance.categories.values_list('id', flat=True))
-            new_category_ids = set(cat.id for cat in categories_to_associate)
-            
-            # Only add categories that aren't already associated
-            categories_to_add = [cat for cat in categories_to_associate if cat.id not in current_category_ids]
-            
-            if categories_to_add:
-                instance.categories.add(*categories_to_add)
-        except Exception:
-            # Best-effort: if M2M association fails, don't break the save process
-            pass
+    if category_ids:
+        for attempt in (1, 2):
+            try:
+                # savepoint per tentativo: un errore non deve abortire la transazione della request
+                with transaction.atomic():
+                    _attach_categories(instance.pk, category_ids)
+                break
+            except (StaleCategoryIds, IntegrityError):
+                if attempt == 2:
+                    logging.getLogger(__name__).warning("Failed to associate categories to post %s", instance.pk)
+                    return
+                # Cached id vanished (category deleted by another process): reload once and retry
+                invalidate_category_cache(site_id)
+                try:
+                    category_ids = resolve_category_ids(site_id, list(category_specs.values()))
+                except Exception:
+                    return
+            except Exception:
+                # Best-effort: if M2M association fails, don't break the save process
+                return
+
+    # record the derivation only once the categories are attached, so failures retry on the next save
+    try:
+        mark_frontmatter_synced(instance, fingerprint)
+    except Exception:
+        pass
+
+
+@receiver(post_save, sender=Post)
+def update_taxonomy_on_save(sender, instance, created, **kwargs):
+    """Keep the materialized taxonomy (TaxonomyEntry) in sync with the saved post."""
+    from .services.taxonomy import TAXONOMY_FIELDS, sync_post_taxonomy
+
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not TAXONOMY_FIELDS.intersection(update_fields):
+        return
+    try:
+        sync_post_taxonomy(instance)
+    except Exception as e:
+        logging.getLogger(__name__).warning("Failed to update taxonomy for post %s: %s", instance.pk, e)
+
+
+@receiver(pre_delete, sender=Post)
+def _remember_taxonomy_entries(sender, instance, **kwargs):
+    # le righe M2M spariscono col post: annota le entry da ricalcolare dopo la delete
+    try:
+        instance._taxonomy_entry_ids = list(instance.taxonomy_entries.values_list('id', flat=True))
+    except Exception:
+        instance._taxonomy_entry_ids = []
+
+
+@receiver(post_delete, sender=Post)
+def update_taxonomy_on_delete(sender, instance, **kwargs):
+    from .services.taxonomy import refresh_entries
+
+    try:
+        refresh_entries(getattr(instance, '_taxonomy_entry_ids', None) or [])
+    except Exception as e:
+        logging.getLogger(__name__).warning("Failed to update taxonomy after deleting post %s: %s", instance.pk, e)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_count_cache(sender, instance, created=True, **kwargs):
+    # il totale cambia solo su insert/delete (post_delete non passa `created`)
+    if created:
+        from .services.counts import invalidate_post_count
+        invalidate_post_count()
+
+
+
+# --- content version markers (ETag / Last-Modified, see services.versions) ---
+
+def _moved_from_site(instance):
+    """site_id the post had before this save when the save moved it to another site, else None."""
+    # in post_save i valori caricati (Post.changed_fields) non sono ancora aggiornati
+    old = (getattr(instance, "_loaded_values", None) or {}).get("site_id")
+    return old if old is not None and old != instance.site_id else None
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_content_version(sender, instance, **kwargs):
+    from .services.versions import bump_site_versions
+    bump_site_versions({instance.site_id, _moved_from_site(instance)} - {None})
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+def bump_content_version_on_categories(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    from .services.versions import bump_site_version
+    bump_site_version(instance.site_id)
+
+
+@receiver(post_save, sender=Site)
+def bump_site_content_version(sender, instance, **kwargs):
+    # i listing dei siti (e la tassonomia, che li include) dipendono dalla riga stessa
+    from .services.versions import bump_site_version
+    bump_site_version(instance.pk)
+
+
+@receiver(post_save, sender=Site)
+def schedule_site_provisioning(sender, instance, **kwargs):
+    # Site.save() scrive solo la riga: clone/init della working copy dopo il commit
+    if getattr(instance, "_provision_requested", False):
+        from .services.provisioning import schedule_provisioning
+        schedule_provisioning(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=PostImage)
+@receiver(post_delete, sender=PostImage)
+def bump_content_version_on_post_children(sender, instance, **kwargs):
+    from .services.versions import bump_site_version
+    bump_site_version(post_id=instance.post_id)
+
+
+# --- static JSON snapshots (see services.snapshots), rebuilt after commit ---
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def schedule_snapshot_on_publish(sender, instance, update_fields=None, **kwargs):
+    # i soli metadati di export (salvati dopo ogni publish) non cambiano gli snapshot
+    if update_fields and set(update_fields).issubset(_EXPORT_META_FIELDS):
+        return
+    # slug_locked resta True dopo la prima pubblicazione: copre anche unpublish e delete
+    if instance.status == "published" or instance.slug_locked:
+        from .services.snapshots import schedule_site_snapshot
+        schedule_site_snapshot(instance.site_id)
+        old_site_id = _moved_from_site(instance)
+        if old_site_id is not None:
+            schedule_site_snapshot(old_site_id)
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def schedule_snapshot_on_author_change(sender, instance, **kwargs):
+    from .services.snapshots import enabled, schedule_site_snapshot
+
+    if not enabled():
+        return
+    site_ids = {instance.site_id} if instance.site_id else set(
+        Post.objects.filter(author_id=instance.pk).values_list("site_id", flat=True).distinct()
+    )
+    for site_id in site_ids:
+        schedule_site_snapshot(site_id, ("authors",))
+
+
+# --- append-only change log (GET /api/blog/changes/, see services.changes) ---
+
+_CHANGE_KINDS = {Post: "post", Category: "category", Site: "site"}
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Site)
+def log_change_on_save(sender, instance, **kwargs):
+    from .services.changes import record_change
+    old_site_id = _moved_from_site(instance)
+    if old_site_id is not None:
+        # per i client filtrati sul vecchio sito il post spostato è sparito
+        record_change(_CHANGE_KINDS[sender], instance, "delete", site_id=old_site_id)
+    record_change(_CHANGE_KINDS[sender], instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Site)
+def log_change_on_delete(sender, instance, **kwargs):
+    from .services.changes import record_change
+    record_change(_CHANGE_KINDS[sender], instance, "delete")
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+def log_change_on_categories(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    from .services.changes import record_change, record_changes
+    if not reverse:
+        record_change("post", instance)
+    elif pk_set:
+        record_changes("post", Post.objects.filter(pk__in=pk_set))
+
+
 from contextvars import ContextVar
 from contextlib import suppress
-import logging
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
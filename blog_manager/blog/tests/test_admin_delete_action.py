@@ -28,7 +28,7 @@ def test_admin_delete_db_only(client, admin_user, monkeypatch, tmp_path):
 
 @pytest.mark.django_db
 def test_admin_delete_db_and_repo(monkeypatch, client, admin_user, tmp_path):
-    # enable repo deletion via settings and mock delete_post_from_repo
+    # enable repo deletion via settings and mock the batch repo delete
     repo_dir = tmp_path / "repo"
     repo_dir.mkdir()
     site = Site.objects.create(name="S2", domain="https://x2", repo_owner="o2", repo_name="r2", repo_path=str(repo_dir))
@@ -39,10 +39,13 @@ def test_admin_delete_db_and_repo(monkeypatch, client, admin_user, tmp_path):
     monkeypatch.setattr(settings, "EXPORT_ENABLED", False)
     monkeypatch.setattr(settings, "ALLOW_REPO_DELETE", True, raising=False)
 
-    def fake_delete(p, message=None, client=None):
-        return {"status": "deleted", "commit_sha": "deadbeef", "html_url": "https://github.com"}
+    calls = []
 
-    monkeypatch.setattr("blog.admin.delete_post_from_repo", fake_delete)
+    def fake_delete(posts, message=None, client=None, sync_local=False):
+        calls.append([p.pk for p in posts])
+        return {p.pk: {"status": "deleted", "commit_sha": "deadbeef", "html_url": "https://github.com"} for p in posts}
+
+    monkeypatch.setattr("blog.admin.delete_posts_from_repo", fake_delete)
 
     client.force_login(admin_user)
     url = reverse("admin:blog_post_delete_confirm") + f"?pks={post.pk}"
@@ -51,3 +54,26 @@ def test_admin_delete_db_and_repo(monkeypatch, client, admin_user, tmp_path):
     r2 = client.post(url, {"mode": "repo"})
     assert r2.status_code in (302, 303)
     assert not Post.objects.filter(pk=post.pk).exists()
+    assert calls == [[post.pk]]
+
+
+@pytest.mark.django_db
+def test_sync_repos_repo_and_db_deletes_posts_without_repo_file(monkeypatch, tmp_path):
+    from django.conf import settings
+    from django.core.management import call_command
+
+    monkeypatch.setattr(settings, "EXPORT_ENABLED", False)
+    monkeypatch.chdir(tmp_path)  # backups/<run_id> finisce nella tmp
+    site = Site.objects.create(name="S3", domain="https://x3", repo_path=str(tmp_path))
+    author = site.authors.create(name="C", slug="c")
+    posts = [Post.objects.create(site=site, title=f"Del{i}", slug=f"del{i}", content="z", author=author) for i in range(4)]
+    statuses = ["deleted", "no_repo_path", "no_owner_repo", "error"]
+
+    def fake_delete(posts_to_delete, message=None, client=None, sync_local=False):
+        return {p.pk: {"status": s, "message": "boom" if s == "error" else None} for p, s in zip(posts, statuses)}
+
+    monkeypatch.setattr("blog.services.github_ops.delete_posts_from_repo", fake_delete)
+    call_command("sync_repos", "--sites", site.slug, "--delete-mode", "repo-and-db", "--confirm",
+                 "--delete-pks", ",".join(str(p.pk) for p in posts), "--report-path", str(tmp_path / "r.json"))
+    # solo l'errore vero dell'API lascia la riga in DB
+    assert list(Post.objects.filter(site=site).values_list("slug", flat=True)) == ["del3"]
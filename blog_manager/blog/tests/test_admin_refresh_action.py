@@ -3,6 +3,9 @@ from django.utils import timezone
 
 from blog.models import Site, Post, ExportJob
 
+# drift is computed on the exported markdown, which requires front-matter with categories
+FM = "---\ntitle: Refresh\ncategories: [django]\n---\n"
+
 
 @pytest.mark.django_db
 def test_refresh_ok(monkeypatch, tmp_path):
@@ -10,11 +13,24 @@ def test_refresh_ok(monkeypatch, tmp_path):
     repo_dir.mkdir()
     site = Site.objects.create(name="RSite", domain="https://r", repo_owner="ro", repo_name="rr", repo_path=str(repo_dir))
     author = site.authors.create(name="RA", slug="ra")
-    post = Post.objects.create(site=site, title="RPost", slug="rpost", status="published", published_at=timezone.now(), content="same-content", author=author)
+    post = Post.objects.create(site=site, title="RPost", slug="rpost", status="published", published_at=timezone.now(), content=FM + "same-content\n", author=author)
+
+    from blog.exporter import render_markdown
+    from blog.services.drift import git_blob_sha
+    from blog.services.github_ops import _resolve_post_path
+
+    # the publish signal may have stored repo_path/last_export_path on the row
+    post.refresh_from_db()
+    path = _resolve_post_path(post)
+    local_sha = git_blob_sha(render_markdown(post, site))
+
+    def fake_get_tree(*args, **kwargs):
+        return [{"path": path, "type": "file", "sha": local_sha}]
 
     def fake_get_file(*args, **kwargs):
-        return {"content": "same-content", "sha": "sha-1"}
+        raise AssertionError("content must not be downloaded when blob shas match")
 
+    monkeypatch.setattr("blog.github_client.GitHubClient.get_tree", fake_get_tree)
     monkeypatch.setattr("blog.github_client.GitHubClient.get_file", fake_get_file)
     from django.test import RequestFactory
     from django.contrib.messages.storage.fallback import FallbackStorage
@@ -37,10 +53,10 @@ def test_refresh_absent(monkeypatch, tmp_path):
     author = site.authors.create(name="RB", slug="rb")
     post = Post.objects.create(site=site, title="RPost2", slug="rpost2", status="published", published_at=timezone.now(), content="same-content", author=author)
 
-    def fake_get_file(*args, **kwargs):
-        raise Exception("Not Found")
+    def fake_get_tree(*args, **kwargs):
+        return [{"path": "_posts/other/2020-01-01-other.md", "type": "file", "sha": "sha-other"}]
 
-    monkeypatch.setattr("blog.github_client.GitHubClient.get_file", fake_get_file)
+    monkeypatch.setattr("blog.github_client.GitHubClient.get_tree", fake_get_tree)
     from django.test import RequestFactory
     from django.contrib.messages.storage.fallback import FallbackStorage
     req = RequestFactory().post("/")
@@ -60,11 +76,20 @@ def test_refresh_content_drift(monkeypatch, tmp_path):
     repo_dir.mkdir()
     site = Site.objects.create(name="RSite3", domain="https://r3", repo_owner="ro3", repo_name="rr3", repo_path=str(repo_dir))
     author = site.authors.create(name="RC", slug="rc")
-    post = Post.objects.create(site=site, title="RPost3", slug="rpost3", status="published", published_at=timezone.now(), content="local-content", author=author)
+    post = Post.objects.create(site=site, title="RPost3", slug="rpost3", status="published", published_at=timezone.now(), content=FM + "local-content\n", author=author)
+
+    from blog.services.github_ops import _resolve_post_path
+
+    post.refresh_from_db()
+    path = _resolve_post_path(post)
+
+    def fake_get_tree(*args, **kwargs):
+        return [{"path": path, "type": "file", "sha": "sha-remote"}]
 
     def fake_get_file(*args, **kwargs):
         return {"content": "remote-content", "sha": "sha-remote"}
 
+    monkeypatch.setattr("blog.github_client.GitHubClient.get_tree", fake_get_tree)
     monkeypatch.setattr("blog.github_client.GitHubClient.get_file", fake_get_file)
     from django.test import RequestFactory
     from django.contrib.messages.storage.fallback import FallbackStorage
@@ -77,3 +102,42 @@ def test_refresh_content_drift(monkeypatch, tmp_path):
     pa.refresh_posts(req, Post.objects.filter(pk=post.pk))
 
     assert ExportJob.objects.filter(post=post, action="refresh", message="drift_content").exists()
+
+
+def test_git_blob_sha_matches_git():
+    from blog.services.drift import git_blob_sha
+
+    # `printf 'hello\n' | git hash-object --stdin`
+    assert git_blob_sha("hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+
+@pytest.mark.django_db
+def test_detect_drift_one_tree_call_and_bulk_jobs(tmp_path):
+    from unittest.mock import MagicMock
+    from blog.exporter import render_markdown
+    from blog.services.drift import detect_drift, git_blob_sha
+    from blog.services.github_ops import _resolve_post_path
+
+    site = Site.objects.create(name="RSite4", domain="https://r4", repo_owner="ro4", repo_name="rr4")
+    author = site.authors.create(name="RD", slug="rd")
+    posts = [
+        Post.objects.create(site=site, title=f"P{i}", slug=f"p{i}", status="published", published_at=timezone.now(), content=FM + f"body {i}\n", author=author)
+        for i in range(3)
+    ]
+    posts = list(Post.objects.filter(site=site).select_related("site").order_by("id"))
+    tree = [
+        {"path": _resolve_post_path(posts[0]), "type": "file", "sha": git_blob_sha(render_markdown(posts[0], site))},
+        {"path": _resolve_post_path(posts[1]), "type": "file", "sha": "stale"},
+    ]
+    client = MagicMock()
+    client.get_tree.return_value = tree
+    client.get_file.return_value = {"content": "old body", "sha": "stale"}
+
+    results = detect_drift(posts, client=client)
+
+    assert [r["status"] for r in results] == ["ok", "drift_content", "drift_absent"]
+    assert client.get_tree.call_count == 1
+    # only the drifted file is downloaded
+    assert client.get_file.call_count == 1
+    assert "+body 1" in results[1]["diff"]
+    assert ExportJob.objects.filter(post__site=site, action="refresh").count() == 3
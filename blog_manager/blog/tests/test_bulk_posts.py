@@ -0,0 +1,119 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from blog.models import Post, Site, TaxonomyEntry
+from blog.services import bulk
+
+URL = "/api/blog/posts/bulk/"
+
+FM = "---\ntitle: {title}\ncategories: [Django]\nsubcluster: orm\n---\n\nbody"
+
+
+def _version(site):
+    return Site.objects.values_list("content_version", flat=True).get(pk=site.pk)
+
+
+@pytest.mark.django_db
+def test_bulk_create_allocates_slugs_and_derives_categories(blog_site, admin_api_client):
+    site, author = blog_site
+    Post.objects.create(site=site, title="Hello", slug="hello", content="x", author=author)
+    v0 = _version(site)
+
+    items = [
+        {"site": site.pk, "author": author.pk, "title": "Hello", "content": FM.format(title="Hello")},
+        {"site": site.pk, "author": author.pk, "title": "Hello", "content": FM.format(title="Hello")},
+        {"author": author.pk, "title": "No site", "content": "x"},
+        {"site": site.pk, "author": author.pk, "content": FM.format(title="From FM")},
+    ]
+    resp = admin_api_client.post(URL, items, format="json")
+    assert resp.status_code == 207
+    body = resp.json()
+    assert (body["created"], body["updated"], body["errors"]) == (3, 0, 1)
+    results = body["results"]
+    assert [r["status"] for r in results] == ["created", "created", "error", "created"]
+    assert "site" in results[2]["errors"]
+    assert [results[i]["slug"] for i in (0, 1, 3)] == ["hello-2", "hello-3", "from-fm"]
+
+    post = Post.objects.get(pk=results[0]["id"])
+    assert post.cluster_slug == "django" and post.subcluster_slug == "orm"
+    assert post.frontmatter_hash
+    assert sorted(c.name for c in post.categories.all()) == ["Django", "Django/orm"]
+    assert TaxonomyEntry.objects.get(site=site, cluster="Django", subcluster="orm").post_count == 3
+    assert _version(site) > v0
+
+
+@pytest.mark.django_db
+def test_bulk_update_and_publish(blog_site, admin_api_client, tmp_path):
+    site, author = blog_site
+    site.repo_path = str(tmp_path)
+    site.save()
+    a = Post.objects.create(site=site, title="A", slug="a", content="x", author=author)
+    b = Post.objects.create(site=site, title="B", slug="b", content="x", author=author)
+
+    resp = admin_api_client.post(URL, {"items": [
+        {"id": a.pk, "title": "A2", "content": FM.format(title="A2")},
+        {"id": b.pk, "status": "published"},
+        {"id": 999999, "title": "missing"},
+    ]}, format="json")
+    assert resp.status_code == 207
+    assert [r["status"] for r in resp.json()["results"]] == ["updated", "updated", "error"]
+
+    a.refresh_from_db()
+    b.refresh_from_db()
+    assert a.title == "A2" and a.slug == "a" and a.cluster_slug == "django"
+    assert a.categories.filter(name="Django/orm").exists()
+    assert b.is_published and b.published_at and b.slug_locked
+
+
+@pytest.mark.django_db
+def test_bulk_create_query_count_is_constant(blog_site, admin_api_client):
+    site, author = blog_site
+
+    def run(n, offset):
+        items = [
+            {"site": site.pk, "author": author.pk, "title": f"T{offset + i}", "content": FM.format(title="t")}
+            for i in range(n)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            assert admin_api_client.post(URL, items, format="json").status_code == 200
+        return len(ctx.captured_queries)
+
+    run(1, 1000)  # crea categorie e voci di tassonomia
+    # FK, slug, categorie e tassonomia risolti per batch: nessuna query per item
+    assert run(5, 0) == run(25, 100)
+
+
+@pytest.mark.django_db
+def test_bulk_schedules_one_export_per_site(blog_site, admin_api_client, settings, tmp_path, monkeypatch, django_capture_on_commit_callbacks):
+    site, author = blog_site
+    settings.EXPORT_ENABLED = True
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    Site.objects.filter(pk=site.pk).update(repo_path=str(tmp_path / "a"))
+    other = Site.objects.create(name="Other", domain="https://o.example", repo_path=str(tmp_path / "b"))
+
+    calls = []
+    monkeypatch.setattr(bulk, "export_site_posts", lambda site_id, ids: calls.append((site_id, sorted(ids))))
+    items = [{"site": s.pk, "author": author.pk, "title": f"P{i}", "status": "published", "content": "x"}
+             for i, s in enumerate([site, site, other, site])]
+    items.append({"site": site.pk, "author": author.pk, "title": "Draft", "content": "x"})
+    with django_capture_on_commit_callbacks(execute=True):
+        resp = admin_api_client.post(URL, items, format="json")
+    assert resp.status_code == 200
+
+    ids = [r["id"] for r in resp.json()["results"]]
+    assert sorted(calls) == sorted([(site.pk, sorted([ids[0], ids[1], ids[3]])), (other.pk, [ids[2]])])
+
+
+@pytest.mark.django_db
+def test_bulk_limits_and_permissions(blog_site, admin_api_client, settings):
+    site, author = blog_site
+    settings.BLOG_BULK_MAX_ITEMS = 2
+    items = [{"site": site.pk, "title": f"T{i}", "content": "x"} for i in range(3)]
+    assert admin_api_client.post(URL, items, format="json").status_code == 400
+    assert admin_api_client.post(URL, [], format="json").status_code == 400
+    assert admin_api_client.post(URL, [{"title": "x"}], format="json").status_code == 400
+    assert APIClient().post(URL, items[:1], format="json").status_code in (401, 403)
+    assert not Post.objects.exists()
@@ -1,4 +1,5 @@
 import pytest
+from django.core.management import call_command
 from django.test import TestCase, override_settings
 from blog.models import Category, Post, Site, Author
 from blog.utils import create_categories_from_frontmatter
@@ -236,4 +237,27 @@ Post about burnout."""
             post = Post.objects.get(slug=f"burnout-post-{i+1}")
             self.assertEqual(post.categories.count(), 2)
             self.assertIn(cluster_cat, post.categories.all())
-            self.assertIn(subcluster_cat, post.categories.all())
\ No newline at end of file
+            self.assertIn(subcluster_cat, post.categories.all())
+
+    @override_settings(EXPORT_ENABLED=False)
+    def test_dedupe_keeps_categories_without_cluster(self):
+        """Categories imported without cluster columns must not collapse into one group"""
+        posts = {}
+        for slug, cats in (("django-post", "[Django/Forms]"), ("python-post", "[Python/Async]")):
+            with patch('django.db.models.signals.post_save.send'):
+                posts[slug] = Post.objects.create(
+                    site=self.site,
+                    title=slug,
+                    slug=slug,
+                    content=f"---\ncategories: {cats}\n---\nbody",
+                    author=self.author
+                )
+        call_command("import_categories_from_posts")
+        imported = set(Category.objects.filter(site=self.site).values_list("slug", flat=True))
+        self.assertTrue({"django", "django-forms", "python", "python-async"} <= imported)
+
+        call_command("dedupe_categories")
+
+        self.assertEqual(set(Category.objects.filter(site=self.site).values_list("slug", flat=True)), imported)
+        python_slugs = set(posts["python-post"].categories.values_list("slug", flat=True))
+        self.assertEqual(python_slugs, {"python", "python-async"})
@@ -0,0 +1,123 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Category, Post
+from blog import signals
+
+
+FM = "---\ntitle: Cache\ncategories: [django]\nsubcluster: forms\n---\nbody\n"
+
+
+def _category_queries(ctx):
+    return [q for q in ctx.captured_queries if "blog_category" in q["sql"] or "blog_post_categories" in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_save_creates_categories_and_links(blog_site):
+    site, author = blog_site
+    post = Post.objects.create(site=site, title="C1", slug="c1", content=FM, author=author)
+
+    pairs = set(post.categories.values_list("cluster_slug", "subcluster_slug"))
+    assert pairs == {("django", None), ("django", "forms")}
+    assert Category.objects.filter(site=site).count() == 2
+
+
+@pytest.mark.django_db
+def test_warm_cache_query_budget(blog_site, django_capture_on_commit_callbacks):
+    site, author = blog_site
+    with django_capture_on_commit_callbacks(execute=True):
+        first = Post.objects.create(site=site, title="C2", slug="c2", content=FM, author=author)
+    assert site.id in signals._CATEGORY_CACHE
+
+    second = Post.objects.create(site=site, title="C3", slug="c3", content="x", author=author)
+    second.content = FM
+
+    # new post, categories cached: one read of the through table + one insert
+    with CaptureQueriesContext(connection) as ctx:
+        signals.ensure_categories_from_post(Post, second, created=False)
+    assert len(_category_queries(ctx)) <= 2
+    assert second.categories.count() == 2
+
+    # unchanged front-matter: fingerprint matches, no query at all
+    with CaptureQueriesContext(connection) as ctx:
+        signals.ensure_categories_from_post(Post, first, created=False)
+    assert len(ctx.captured_queries) == 0
+
+
+@pytest.mark.django_db
+def test_cache_invalidated_on_category_change(blog_site, django_capture_on_commit_callbacks):
+    site, author = blog_site
+    with django_capture_on_commit_callbacks(execute=True):
+        Post.objects.create(site=site, title="C4", slug="c4", content=FM, author=author)
+    assert site.id in signals._CATEGORY_CACHE
+
+    Category.objects.filter(site=site, subcluster_slug="forms").get().delete()
+    assert site.id not in signals._CATEGORY_CACHE
+
+    post = Post.objects.create(site=site, title="C5", slug="c5", content=FM, author=author)
+    assert post.categories.filter(subcluster_slug="forms").exists()
+
+
+@pytest.mark.django_db
+def test_prose_only_edit_skips_derivation(blog_site):
+    site, author = blog_site
+    post = Post.objects.create(site=site, title="C6", slug="c6", content=FM, author=author)
+    assert post.frontmatter_hash
+
+    post.content = FM + "more prose\n"
+    with CaptureQueriesContext(connection) as ctx:
+        post.save()
+    assert _category_queries(ctx) == []
+
+    # utility used by admin/sync_repos: nothing to do for an unchanged front-matter
+    from blog.utils import create_categories_from_frontmatter
+
+    fresh = Post.objects.get(pk=post.pk)
+    with CaptureQueriesContext(connection) as ctx:
+        assert create_categories_from_frontmatter(fresh) == []
+    assert ctx.captured_queries == []
+
+
+@pytest.mark.django_db
+def test_frontmatter_edit_rederives(blog_site):
+    site, author = blog_site
+    post = Post.objects.create(site=site, title="C7", slug="c7", content=FM, author=author)
+    old_hash = post.frontmatter_hash
+
+    post.content = FM.replace("subcluster: forms", "subcluster: views")
+    post.save()
+
+    assert post.categories.filter(subcluster_slug="views").exists()
+    assert Post.objects.get(pk=post.pk).frontmatter_hash not in ("", old_hash)
+
+    # content rewritten behind the model (queryset update): stored hash is stale
+    from blog.utils import create_categories_from_frontmatter
+
+    Post.objects.filter(pk=post.pk).update(content=FM.replace("django", "python"))
+    fresh = Post.objects.get(pk=post.pk)
+    assert create_categories_from_frontmatter(fresh)
+    assert Post.objects.get(pk=post.pk).frontmatter_hash == fresh.frontmatter_hash
+    assert create_categories_from_frontmatter(Post.objects.get(pk=post.pk)) == []
+
+
+@pytest.mark.django_db
+def test_stale_cached_id_is_reloaded_without_breaking_the_transaction(blog_site, django_capture_on_commit_callbacks):
+    site, author = blog_site
+    with django_capture_on_commit_callbacks(execute=True):
+        Post.objects.create(site=site, title="C8", slug="c8", content=FM, author=author)
+    forms = Category.objects.get(site=site, subcluster_slug="forms")
+    stale = dict(signals._CATEGORY_CACHE[site.id])
+    Category.objects.filter(pk=forms.pk).delete()
+    # cancellata da un altro processo: la cache di questo processo non lo sa
+    signals._CATEGORY_CACHE[site.id] = stale
+
+    post = Post.objects.create(site=site, title="C9", slug="c9", content=FM, author=author)
+    pairs = set(post.categories.values_list("cluster_slug", "subcluster_slug"))
+    assert pairs == {("django", None), ("django", "forms")}
+    assert forms.pk not in post.categories.values_list("id", flat=True)
+    if connection.vendor == "sqlite":
+        # nessun link verso l'id sparito: niente errore FK differito al commit
+        with connection.cursor() as c:
+            c.execute("PRAGMA foreign_key_check")
+            assert c.fetchall() == []
@@ -0,0 +1,164 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from blog.models import Category, ChangeLogEntry, Post, Site
+from blog.services.changes import latest_cursor
+
+URL = "/api/blog/changes/"
+
+
+@pytest.fixture
+def feed_site(transactional_db, make_site, settings):
+    settings.BLOG_CHANGES_SETTLE_SECONDS = 0
+    settings.BLOG_PROVISION_THREAD = False  # i commit sono reali: niente clone in background
+    site, author = make_site("FeedSite")
+    other = Site.objects.create(name="Other", domain="https://other.example")
+    return site, other, author
+
+
+def _get(client, **params):
+    resp = client.get(URL, params)
+    assert resp.status_code == 200, resp.content
+    return resp.json()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_deltas_and_tombstones_since_cursor(feed_site):
+    site, _other, author = feed_site
+    client = APIClient()
+    start = _get(client)
+    assert start["changes"] == []
+
+    post = Post.objects.create(site=site, title="P", slug="p", content="x", author=author)
+    post.title = "P2"
+    post.save()
+    cat = Category.objects.create(site=site, name="C", slug="c", cluster_slug="c")
+    gone = Post.objects.create(site=site, title="Gone", slug="gone", content="x", author=author)
+    gone_id = gone.pk
+    gone.delete()
+
+    page = _get(client, since=start["cursor"])
+    by_key = {(c["kind"], c["id"]): c for c in page["changes"]}
+    # più modifiche dello stesso oggetto collassano nell'ultima
+    assert by_key[("post", post.pk)]["op"] == "upsert"
+    assert by_key[("post", post.pk)]["data"]["title"] == "P2"
+    assert by_key[("category", cat.pk)]["data"]["slug"] == "c"
+    assert by_key[("post", gone_id)]["op"] == "delete"
+    assert by_key[("post", gone_id)]["data"] == {"id": gone_id, "slug": "gone", "site": site.pk}
+    seqs = [c["seq"] for c in page["changes"]]
+    assert seqs == sorted(seqs)
+
+    assert _get(client, since=page["cursor"])["changes"] == []
+    post.categories.add(cat)
+    assert [(c["kind"], c["id"]) for c in _get(client, since=page["cursor"])["changes"]] == [("post", post.pk)]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_site_filter_paging_and_settle_window(feed_site, settings):
+    site, other, author = feed_site
+    cursor = ChangeLogEntry.objects.order_by("-seq").values_list("seq", flat=True).first()
+    for i in range(5):
+        Post.objects.create(site=site, title=f"P{i}", slug=f"p{i}", content="x", author=author)
+    Post.objects.create(site=other, title="O", slug="o", content="x", author=author)
+    client = APIClient()
+
+    first = _get(client, since=cursor, site=site.pk, limit=3)
+    assert len(first["changes"]) == 3 and first["has_more"]
+    rest = _get(client, since=first["cursor"], site=site.pk, limit=3)
+    assert len(rest["changes"]) == 2 and not rest["has_more"]
+    assert {c["data"]["site"] for c in first["changes"] + rest["changes"]} == {site.pk}
+
+    settings.BLOG_CHANGES_SETTLE_SECONDS = 60
+    assert _get(client, since=cursor)["changes"] == []
+    assert client.get(URL, {"since": "abc"}).status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_compaction_drops_superseded_entries_and_expires_old_cursors(feed_site):
+    site, _other, author = feed_site
+    client = APIClient()
+    post = Post.objects.create(site=site, title="P", slug="p", content="x", author=author)
+    for i in range(3):
+        post.title = f"P{i}"
+        post.save()
+    gone = Post.objects.create(site=site, title="Gone", slug="gone", content="x", author=author)
+    gone_id = gone.pk
+    gone.delete()
+    old_cursor = ChangeLogEntry.objects.filter(kind="post", object_id=post.pk).order_by("seq").first().seq
+    ChangeLogEntry.objects.filter(op="delete").update(created_at=timezone.now() - timedelta(days=90))
+
+    call_command("compact_changes", "--days", "30")
+    assert ChangeLogEntry.objects.filter(kind="post", object_id=post.pk).count() == 1
+    assert not ChangeLogEntry.objects.filter(kind="post", object_id=gone_id).exists()
+
+    resp = client.get(URL, {"since": old_cursor})
+    assert resp.status_code == 410 and resp.json()["reset"] is True
+    fresh = _get(client, since=resp.json()["floor"])
+    assert all(c["kind"] != "log" for c in fresh["changes"])
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bulk_endpoint_writes_change_entries(feed_site, admin_user):
+    site, _other, author = feed_site
+    client = APIClient()
+    cursor = _get(client)["cursor"]
+    client.force_authenticate(admin_user)
+    resp = client.post("/api/blog/posts/bulk/", [
+        {"site": site.pk, "author": author.pk, "title": f"B{i}", "content": "x"} for i in range(3)
+    ], format="json")
+    assert resp.status_code == 200
+    ids = {r["id"] for r in resp.json()["results"]}
+    changes = _get(APIClient(), since=cursor)["changes"]
+    assert {c["id"] for c in changes if c["kind"] == "post"} == ids
+
+
+@pytest.mark.django_db(transaction=True)
+def test_entries_get_their_seq_at_commit(feed_site):
+    site, other, author = feed_site
+    client = APIClient()
+    cursor = _get(client)["cursor"]
+    with transaction.atomic():
+        slow = Post.objects.create(site=site, title="Slow", slug="slow", content="x", author=author)
+        slow.title = "Slow2"
+        slow.save()
+        # nel frattempo un'altra scrittura committa e il client avanza il cursore
+        assert latest_cursor() == int(cursor)
+        with transaction.atomic():
+            Category.objects.create(site=site, name="Undone", slug="undone", cluster_slug="undone")
+            transaction.set_rollback(True)
+        passed = int(cursor)
+        assert _get(client, since=cursor)["cursor"] == cursor
+    # la transazione lenta committa dopo: le sue entry stanno oltre il cursore già passato
+    page = _get(client, since=passed)
+    assert [(c["kind"], c["id"], c["data"]["title"]) for c in page["changes"]] == [("post", slow.pk, "Slow2")]
+    assert min(ChangeLogEntry.objects.filter(object_id=slow.pk).values_list("seq", flat=True)) > passed
+    assert not ChangeLogEntry.objects.filter(kind="category").exists()
+
+    with transaction.atomic():
+        Post.objects.create(site=other, title="Rolled", slug="rolled", content="x", author=author)
+        transaction.set_rollback(True)
+    assert _get(client, since=page["cursor"])["changes"] == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_moved_post_leaves_a_tombstone_in_the_old_site(feed_site):
+    site, other, author = feed_site
+    client = APIClient()
+    post = Post.objects.create(site=site, title="M", slug="m", content="x", author=author)
+    cursor = _get(client)["cursor"]
+
+    post = Post.objects.get(pk=post.pk)
+    post.site = other
+    post.author = other.authors.create(name="OA", slug="oa")
+    post.save()
+
+    old = _get(client, since=cursor, site=site.pk)["changes"]
+    assert [(c["op"], c["data"]) for c in old] == [("delete", {"id": post.pk, "slug": "m", "site": site.pk})]
+    new = _get(client, since=cursor, site=other.pk)["changes"]
+    assert [(c["op"], c["data"]["site"]) for c in new] == [("upsert", other.pk)]
+    assert [c["op"] for c in _get(client, since=cursor)["changes"]] == ["upsert"]
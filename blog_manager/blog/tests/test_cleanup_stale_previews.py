@@ -0,0 +1,63 @@
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Site, Post
+
+
+FM = "---\ntitle: GC\ncategories: [django]\n---\nbody\n"
+
+
+@pytest.mark.django_db
+def test_cleanup_stale_previews_single_commit(monkeypatch):
+    site = Site.objects.create(name="GCSite", domain="https://gc.example", repo_owner="o", repo_name="r")
+    author = site.authors.create(name="GA", slug="ga")
+    recent = Post.objects.create(site=site, title="Recent", slug="recent", status="draft", content=FM, author=author)
+    old = Post.objects.create(site=site, title="Old", slug="old", status="draft", content=FM, author=author)
+    pub = Post.objects.create(site=site, title="Pub", slug="pub", status="published", published_at=timezone.now(), content=FM, author=author)
+    Post.objects.filter(pk__in=[recent.pk, old.pk, pub.pk]).update(preview_url="https://o.github.io/r/preview/x/", preview_hash="h")
+    Post.objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(days=30))
+
+    client = MagicMock()
+    client.get_tree.return_value = [
+        {"path": "preview", "type": "dir"},
+        {"path": "preview/README.md", "type": "file"},
+        {"path": f"preview/{recent.pk}/index.md", "type": "file"},
+        {"path": f"preview/{old.pk}/index.md", "type": "file"},
+        {"path": f"preview/{pub.pk}/index.md", "type": "file"},
+        {"path": "preview/99999/index.md", "type": "file"},
+        {"path": "preview/new/index.md", "type": "file"},
+    ]
+    client.delete_files.return_value = {"status": "deleted", "commit_sha": "gcsha"}
+    monkeypatch.setattr("blog.preview.GitHubClient", lambda *a, **k: client)
+
+    call_command("cleanup_stale_previews", "--days", "7")
+
+    assert client.get_tree.call_count == 1
+    assert client.delete_files.call_count == 1
+    deleted = sorted(client.delete_files.call_args[0][2])
+    assert deleted == sorted([
+        f"preview/{old.pk}/index.md",
+        f"preview/{pub.pk}/index.md",
+        "preview/99999/index.md",
+        "preview/new/index.md",
+    ])
+    assert Post.objects.get(pk=recent.pk).preview_url
+    assert Post.objects.get(pk=old.pk).preview_url is None
+    assert Post.objects.get(pk=pub.pk).preview_url is None
+    assert Post.objects.get(pk=pub.pk).preview_hash == ""
+
+
+@pytest.mark.django_db
+def test_cleanup_stale_previews_dry_run(monkeypatch):
+    site = Site.objects.create(name="GCSite2", domain="https://gc2.example", repo_owner="o", repo_name="r")
+    client = MagicMock()
+    client.get_tree.return_value = [{"path": "preview/424242/index.md", "type": "file"}]
+    monkeypatch.setattr("blog.preview.GitHubClient", lambda *a, **k: client)
+
+    call_command("cleanup_stale_previews", "--dry-run", "--site", site.slug)
+
+    client.delete_files.assert_not_called()
@@ -0,0 +1,130 @@
+import pytest
+from rest_framework.test import APIClient
+
+from blog.models import Category, Comment, Post, Site
+
+
+@pytest.fixture
+def cg_site(blog_site):
+    site, author = blog_site
+    other = Site.objects.create(name="Other", domain="https://other.example")
+    post = Post.objects.create(site=site, title="P", slug="p", content="x", author=author)
+    return site, other, author, post
+
+
+def _version(site):
+    return Site.objects.values_list("content_version", flat=True).get(pk=site.pk)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", [
+    "/api/blog/posts/?site={site}",
+    "/api/blog/posts/{post}/",
+    "/api/blog/taxonomy/?site={site}",
+    "/api/sites/",
+    "/api/sites/{site}/",
+    "/api/blog/categories/?site={site}",
+])
+def test_304_runs_only_the_version_lookup(cg_site, django_assert_num_queries, url):
+    site, _other, _author, post = cg_site
+    url = url.format(site=site.pk, post=post.pk)
+    client = APIClient()
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.headers["ETag"] and first.headers["Last-Modified"]
+
+    with django_assert_num_queries(1):
+        resp = client.get(url, HTTP_IF_NONE_MATCH=first.headers["ETag"])
+    assert resp.status_code == 304
+
+    with django_assert_num_queries(1):
+        resp = client.get(url, HTTP_IF_MODIFIED_SINCE=first.headers["Last-Modified"])
+    assert resp.status_code == 304
+
+
+@pytest.mark.django_db
+def test_writes_bump_only_their_site(cg_site):
+    site, other, author, post = cg_site
+    v0, o0 = _version(site), _version(other)
+
+    post.title = "P2"
+    post.save()
+    v1 = _version(site)
+    assert v1 > v0 and _version(other) == o0
+
+    cat = Category.objects.create(site=site, name="C", slug="c", cluster_slug="c")
+    v2 = _version(site)
+    assert v2 > v1
+    post.categories.add(cat)
+    v3 = _version(site)
+    assert v3 > v2
+    Comment.objects.create(post=post, author_name="a", author_email="a@b.c", text="hi")
+    v4 = _version(site)
+    assert v4 > v3
+    post.delete()
+    assert _version(site) > v4
+    assert _version(other) == o0
+
+
+@pytest.mark.django_db
+def test_stale_site_save_never_reuses_a_version(cg_site):
+    site, _other, author, _post = cg_site
+    stale = Site.objects.get(pk=site.pk)
+    Post.objects.create(site=site, title="Q", slug="q", content="x", author=author)
+    seen = _version(site)
+    stale.save()  # riscrive il vecchio content_version, il signal lo riporta avanti
+    assert _version(site) > seen
+
+
+@pytest.mark.django_db
+def test_etag_changes_after_write_and_with_query(cg_site):
+    site, _other, author, _post = cg_site
+    client = APIClient()
+    url = f"/api/blog/posts/?site={site.pk}"
+    etag = client.get(url).headers["ETag"]
+
+    assert client.get(url + "&status=draft").headers["ETag"] != etag
+    Post.objects.create(site=site, title="New", slug="new", content="x", author=author)
+    resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200 and resp.headers["ETag"] != etag
+    assert client.get("/api/blog/posts/999999/", HTTP_IF_NONE_MATCH=etag).status_code == 404
+
+
+@pytest.mark.django_db
+def test_repo_sync_invalidates_cached_validators(cg_site, tmp_path):
+    from django.core.management import call_command
+
+    site, _other, _author, post = cg_site
+    posts_dir = tmp_path / "repo" / "_posts"
+    posts_dir.mkdir(parents=True)
+    (posts_dir / "2025-01-01-p.md").write_text("---\ntitle: P\nslug: p\n---\nsynced from repo\n", encoding="utf-8")
+    Site.objects.filter(pk=site.pk).update(repo_path=str(tmp_path / "repo"))
+    client = APIClient()
+    url = f"/api/blog/posts/{post.pk}/"
+    etag = client.get(url).headers["ETag"]
+
+    # sync_repos aggiorna i post via queryset (niente signal): la versione va bumpata comunque
+    call_command("sync_repos", "--apply", "--sites", site.slug, "--report-path", str(tmp_path / "reports"))
+    assert "synced from repo" in Post.objects.get(pk=post.pk).content
+    resp = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    assert "synced from repo" in resp.json()["content"]
+
+
+@pytest.mark.django_db
+def test_moving_a_post_invalidates_both_sites(cg_site):
+    site, other, _author, post = cg_site
+    client = APIClient()
+    url = f"/api/blog/posts/?site={site.pk}"
+    first = client.get(url)
+    assert [p["id"] for p in first.json()["results"]] == [post.pk]
+    o0 = _version(other)
+
+    post = Post.objects.get(pk=post.pk)
+    post.site = other
+    post.author = other.authors.create(name="OA", slug="oa")
+    post.save()
+    assert _version(other) > o0
+    resp = client.get(url, HTTP_IF_NONE_MATCH=first.headers["ETag"])
+    assert resp.status_code == 200 and resp.json()["results"] == []
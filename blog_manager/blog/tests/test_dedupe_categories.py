@@ -0,0 +1,59 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Category, Post
+
+
+def _post(site, author, n, *cats):
+    p = Post.objects.create(site=site, title=f"P{n}", slug=f"p{n}", content="body", author=author)
+    p.categories.add(*cats)
+    return p
+
+
+@pytest.mark.django_db
+def test_dedupe_merges_normalized_and_legacy_keys(blog_site):
+    site, author = blog_site
+    # same normalized key (NULL vs '' subcluster) with different legacy slugs
+    keep = Category.objects.create(site=site, name="django", slug="django", cluster_slug="django")
+    norm_dup = Category.objects.create(site=site, name="Django", slug="django-old", cluster_slug="django", subcluster_slug="")
+    # same legacy slug, different normalized key
+    slug_dup = Category.objects.create(site=site, name="django", slug="django", cluster_slug="django-x")
+    other = Category.objects.create(site=site, name="python", slug="python", cluster_slug="python")
+
+    both = _post(site, author, 1, keep, norm_dup)
+    only_dup = _post(site, author, 2, norm_dup, slug_dup)
+    untouched = _post(site, author, 3, other)
+
+    call_command("dedupe_categories")
+
+    assert set(Category.objects.filter(site=site).values_list("id", flat=True)) == {keep.pk, other.pk}
+    assert list(both.categories.values_list("id", flat=True)) == [keep.pk]
+    assert list(only_dup.categories.values_list("id", flat=True)) == [keep.pk]
+    assert list(untouched.categories.values_list("id", flat=True)) == [other.pk]
+
+
+@pytest.mark.django_db
+def test_dedupe_query_count_independent_of_posts(blog_site):
+    site, author = blog_site
+    keep = Category.objects.create(site=site, name="a", slug="a", cluster_slug="a")
+    dup = Category.objects.create(site=site, name="a", slug="a", cluster_slug="a-2")
+    for i in range(30):
+        _post(site, author, i, dup)
+
+    with CaptureQueriesContext(connection) as ctx:
+        call_command("dedupe_categories", "--site-id", str(site.pk))
+    # set-based merge: no per-post add/remove
+    assert len(ctx.captured_queries) < 30
+    assert Post.categories.through.objects.filter(category_id=keep.pk).count() == 30
+    assert not Category.objects.filter(pk=dup.pk).exists()
+
+
+@pytest.mark.django_db
+def test_dedupe_dry_run(blog_site):
+    site, author = blog_site
+    Category.objects.create(site=site, name="a", slug="a", cluster_slug="a")
+    Category.objects.create(site=site, name="a", slug="a", cluster_slug="b")
+    call_command("dedupe_categories", "--dry-run")
+    assert Category.objects.filter(site=site).count() == 2
@@ -0,0 +1,64 @@
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from blog.models import Post
+from blog.utils import frontmatter_fields
+
+
+FM = "---\ntitle: Cols\ndate: 2024-01-02\ncategories: [Django]\nsubcluster: Forms\ntags: [a, b]\n---\nbody\n"
+
+
+def test_frontmatter_fields_parsing():
+    fm, cluster, sub = frontmatter_fields(FM)
+    assert (cluster, sub) == ("django", "forms")
+    assert fm["tags"] == ["a", "b"]
+    assert fm["date"] == "2024-01-02"  # JSON-safe
+    assert frontmatter_fields("---\ncategories: [web/api]\n---\n")[1:] == ("web", "api")
+    assert frontmatter_fields("no front matter") == ({}, "", "")
+
+
+@pytest.mark.django_db
+def test_save_fills_columns_and_update_fields(blog_site):
+    site, author = blog_site
+    post = Post.objects.create(site=site, title="C", slug="c", content=FM, author=author)
+    row = Post.objects.values("cluster_slug", "subcluster_slug", "frontmatter").get(pk=post.pk)
+    assert row["cluster_slug"] == "django" and row["subcluster_slug"] == "forms"
+    assert row["frontmatter"]["title"] == "Cols"
+
+    post.content = FM.replace("Forms", "Views")
+    post.save(update_fields=["content"])
+    assert Post.objects.get(pk=post.pk).subcluster_slug == "views"
+
+
+@pytest.mark.django_db
+def test_backfill_command(blog_site):
+    site, author = blog_site
+    post = Post.objects.create(site=site, title="B", slug="b", content=FM, author=author)
+    Post.objects.filter(pk=post.pk).update(frontmatter={}, cluster_slug="", subcluster_slug="")
+
+    call_command("backfill_frontmatter_fields", "--site", site.slug)
+
+    post.refresh_from_db()
+    assert (post.cluster_slug, post.subcluster_slug) == ("django", "forms")
+    assert post.frontmatter["categories"] == ["Django"]
+
+
+@pytest.mark.django_db
+def test_api_cluster_filters(blog_site, admin_user):
+    site, author = blog_site
+    a = Post.objects.create(site=site, title="A", slug="a", content=FM, author=author)
+    b = Post.objects.create(site=site, title="B", slug="b", content=FM.replace("Forms", "Views"), author=author)
+    Post.objects.create(site=site, title="C", slug="c", content=FM.replace("Django", "Python"), author=author)
+
+    client = APIClient()
+    client.force_authenticate(admin_user)
+
+    def ids(qs):
+        data = client.get(f"/api/posts/?{qs}").json()
+        rows = data["results"] if isinstance(data, dict) else data
+        return sorted(r["id"] for r in rows)
+
+    assert ids("cluster=django") == sorted([a.pk, b.pk])
+    assert ids("cluster=django&subcluster=views") == [b.pk]
+    assert ids("subcluster=missing") == []
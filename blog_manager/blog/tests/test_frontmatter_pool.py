@@ -0,0 +1,45 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Category, Post
+from blog.services.frontmatter_pool import parallel_map, stream_posts, taxonomy_chunk
+
+
+@pytest.mark.django_db
+def test_stream_posts_keyset_pages(blog_site, django_assert_num_queries):
+    site, author = blog_site
+    ids = [
+        Post.objects.create(site=site, title=f"S{i}", slug=f"s{i}", content="x", author=author).pk
+        for i in range(7)
+    ]
+    # 3 + 3 + 1 rows: three bounded queries, never the whole table at once
+    with django_assert_num_queries(3):
+        rows = list(stream_posts(Post.objects.filter(site=site), chunk_size=3))
+    assert [r[0] for r in rows] == ids
+
+
+def test_parallel_map_process_pool_keeps_order():
+    rows = [(i, 1, f"---\ncategories: [c{i}]\nsubcluster: s\n---\nbody") for i in range(40)]
+    out = [r for chunk in parallel_map(taxonomy_chunk, iter(rows), jobs=2, chunk_size=7) for r in chunk]
+    assert [r[0] for r in out] == list(range(40))
+    assert out[3] == (3, 1, ["c3"], ["s"])
+
+
+@pytest.mark.django_db
+def test_rebuild_taxonomy_parallel(blog_site):
+    site, author = blog_site
+    for i in range(12):
+        Post.objects.create(
+            site=site, title=f"R{i}", slug=f"r{i}", author=author,
+            content=f"---\ncategories: [topic{i % 3}]\nsubcluster: sub\n---\nbody",
+        )
+    Category.objects.filter(site=site).delete()
+
+    out = StringIO()
+    call_command("rebuild_taxonomy", "--site", site.slug, "--jobs", "2", "--chunk-size", "5", stdout=out)
+
+    names = set(Category.objects.filter(site=site).values_list("name", flat=True))
+    assert {"topic0", "topic0/sub", "topic2/sub"} <= names
+    assert "posts/s" in out.getvalue()
@@ -94,3 +94,70 @@ def test_service_wrapper_records_exportjob(GithubMock):
         assert EJMock.objects.create.called
         assert res["status"] == "deleted"
 
+
+
+@patch("blog.github_client.Github")
+def test_delete_files_single_commit(GithubMock):
+    gh_instance = GithubMock.return_value
+    repo = gh_instance.get_repo.return_value
+
+    ref = MagicMock()
+    ref.object.sha = "headsha"
+    repo.get_git_ref.return_value = ref
+    new_commit = MagicMock()
+    new_commit.sha = "batchsha"
+    repo.create_git_commit.return_value = new_commit
+
+    from blog.github_client import GitHubClient
+
+    client = GitHubClient(token="fake")
+    res = client.delete_files("owner", "repo", ["b.md", "a.md", "a.md"], branch="main", message="del")
+
+    assert res["status"] == "deleted"
+    assert res["commit_sha"] == "batchsha"
+    assert res["paths"] == ["a.md", "b.md"]
+    # one tree, one commit, one ref update for all paths
+    assert repo.create_git_tree.call_count == 1
+    elements = repo.create_git_tree.call_args[0][0]
+    assert len(elements) == 2
+    assert repo.create_git_commit.call_count == 1
+    ref.edit.assert_called_once_with("batchsha")
+
+
+@pytest.mark.django_db
+def test_batch_delete_resolves_against_one_tree(tmp_path):
+    from blog.models import Site, Post, ExportJob
+    from blog.services.github_ops import delete_posts_from_repo
+
+    site = Site.objects.create(name="B", domain="https://batch.example", repo_owner="o", repo_name="r", posts_dir="_posts")
+    author = site.authors.create(name="A", slug="a")
+    p1 = Post.objects.create(site=site, title="One", slug="one", content="x", author=author)
+    p2 = Post.objects.create(site=site, title="Two", slug="two", content="x", author=author)
+    p3 = Post.objects.create(site=site, title="Three", slug="three", content="x", author=author)
+    Post.objects.filter(pk=p1.pk).update(repo_path="_posts/one.md")
+    # stored without the posts_dir prefix: resolved through the candidates
+    Post.objects.filter(pk=p2.pk).update(repo_path="two.md")
+    Post.objects.filter(pk=p3.pk).update(repo_path="_posts/missing.md")
+    posts = list(Post.objects.filter(pk__in=[p1.pk, p2.pk, p3.pk]).select_related("site"))
+
+    client = MagicMock()
+    client.get_tree.return_value = [
+        {"path": "_posts", "type": "dir", "sha": "t"},
+        {"path": "_posts/one.md", "type": "file", "sha": "s1"},
+        {"path": "_posts/two.md", "type": "file", "sha": "s2"},
+    ]
+    client.delete_files.return_value = {"status": "deleted", "commit_sha": "c1", "html_url": "u", "paths": []}
+
+    res = delete_posts_from_repo(posts, message="batch", client=client)
+
+    assert client.get_tree.call_count == 1
+    assert client.delete_files.call_count == 1
+    assert sorted(client.delete_files.call_args[0][2]) == ["_posts/one.md", "_posts/two.md"]
+    client.delete_file.assert_not_called()
+    assert res[p1.pk]["status"] == "deleted" and res[p1.pk]["commit_sha"] == "c1"
+    assert res[p2.pk]["path"] == "_posts/two.md"
+    assert res[p3.pk]["status"] == "already_absent"
+    jobs = ExportJob.objects.filter(post__in=posts)
+    assert jobs.count() == 3
+    assert jobs.filter(action="delete_repo_and_db").count() == 2
+    assert jobs.filter(action="delete_db_only").count() == 1
@@ -0,0 +1,93 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from django.conf import settings as django_settings
+from django.core.management import CommandError, call_command
+from django.test import Client
+
+from api import schema
+
+PROJECT = Path(django_settings.BASE_DIR) / "blog_manager"
+COMMITTED = PROJECT / "schema.yaml"
+
+
+@pytest.fixture
+def schema_env(settings, tmp_path, monkeypatch):
+    settings.BLOG_SCHEMA_DIR = str(tmp_path / "openapi")
+    schema.reset()
+    calls = []
+    real = schema.render_schema
+
+    def counting():
+        calls.append(1)
+        return real()
+
+    monkeypatch.setattr(schema, "render_schema", counting)
+    yield tmp_path / "openapi", calls
+    schema.reset()
+
+
+@pytest.mark.django_db
+def test_generated_once_then_served_with_etag_and_gzip(schema_env):
+    out, calls = schema_env
+    client = Client()
+    first = client.get("/api/schema/")
+    assert first.status_code == 200
+    assert first["Content-Type"].startswith("application/vnd.oai.openapi")
+    assert first.content.startswith(b"openapi: ")
+    assert client.get("/api/schema/", {"format": "json"}).json()["info"]["title"] == "Blog Manager API"
+    assert len(calls) == 1
+    # generato al primo accesso e salvato su disco
+    assert json.loads((out / "manifest.json").read_text())["hash"] in first["ETag"]
+
+    gz = client.get("/api/schema/", HTTP_ACCEPT_ENCODING="gzip, br")
+    assert gz["Content-Encoding"] == "gzip"
+    assert gzip.decompress(gz.content) == first.content
+    assert client.get("/api/schema/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code == 304
+    assert client.get("/api/schema/", HTTP_IF_NONE_MATCH=first["ETag"], HTTP_ACCEPT_ENCODING="gzip").status_code == 304
+    assert client.get("/api/schema/", {"format": "json"}, HTTP_IF_NONE_MATCH=first["ETag"]).status_code == 200
+    assert len(calls) == 1
+
+
+@pytest.mark.django_db
+def test_built_artifact_is_loaded_unless_code_changed(schema_env, monkeypatch):
+    out, calls = schema_env
+    call_command("build_schema")
+    assert len(calls) == 1
+
+    assert Client().get("/api/schema/").status_code == 200
+    assert len(calls) == 1  # servito dal disco, nessuna introspezione
+
+    schema.reset()
+    monkeypatch.setattr(schema, "source_fingerprint", lambda: "another-version")
+    assert Client().get("/api/schema/").status_code == 200
+    assert len(calls) == 2
+    assert json.loads((out / "manifest.json").read_text())["fingerprint"] == "another-version"
+
+
+def test_committed_schema_is_up_to_date(tmp_path):
+    # processo separato: il conftest dei test modifica i permessi delle view (e quindi lo schema)
+    env = dict(os.environ, BLOG_SCHEMA_DIR=str(tmp_path))
+    proc = subprocess.run(
+        [sys.executable, "manage.py", "build_schema", "--check", "--file", str(COMMITTED)],
+        cwd=PROJECT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+
+@pytest.mark.django_db
+def test_check_fails_on_stale_schema(schema_env, tmp_path):
+    stale = tmp_path / "schema.yaml"
+    stale.write_bytes(b"openapi: 3.0.3\ninfo:\n  title: Old API\n")
+    with pytest.raises(CommandError, match="stale"):
+        call_command("build_schema", "--check", "--file", str(stale))
+    with pytest.raises(CommandError, match="No built schema"):
+        call_command("build_schema", "--check")
+
+    call_command("build_schema", "--file", str(stale))
+    call_command("build_schema", "--check", "--file", str(stale))
@@ -0,0 +1,83 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Category, Post
+from blog.serializers import post_excerpt
+
+
+FM = "---\ntitle: T\ncategories: [Django]\n---\n"
+
+
+@pytest.fixture
+def list_site(blog_site):
+    site, author = blog_site
+    cats = [Category.objects.create(site=site, name=f"C{i}", slug=f"c{i}", cluster_slug=f"c{i}") for i in range(3)]
+    return site, author, cats
+
+
+def _add_posts(site, author, cats, start, n):
+    for i in range(start, start + n):
+        p = Post.objects.create(
+            site=site, title=f"P{i}", slug=f"p{i}", author=author,
+            content=FM + f"# Heading {i}\n\n" + "lorem ipsum " * 400,
+        )
+        p.categories.add(*cats[: 1 + i % 3])
+
+
+def test_post_excerpt():
+    assert post_excerpt(FM + "# Title\n\nSome *bold* text") == "Title Some bold text"
+    assert post_excerpt("body", {"description": "From FM"}) == "From FM"
+    long = post_excerpt("word " * 100, length=20)
+    assert long.endswith("…") and len(long) <= 21
+
+
+@pytest.mark.django_db
+def test_list_is_compact(list_site, admin_api_client):
+    site, author, cats = list_site
+    _add_posts(site, author, cats, 0, 2)
+    rows = admin_api_client.get("/api/blog/posts/").json()["results"]
+    assert set(rows[0]) == {
+        "id", "site", "title", "slug", "status", "is_published", "published_at", "updated_at",
+        "categories", "canonical_url", "repo_path", "excerpt",
+    }
+    assert rows[0]["excerpt"].startswith("Heading 1 lorem ipsum")
+    expected = Post.objects.get(pk=rows[0]["id"]).categories.values_list("id", flat=True)
+    assert sorted(rows[0]["categories"]) == sorted(expected)
+    assert {c.pk for c in cats[:2]} <= set(rows[0]["categories"])
+
+    full = admin_api_client.get("/api/blog/posts/?include=content").json()["results"]
+    assert "content" in full[0] and "body" in full[0] and "comments" in full[0]
+
+    detail = admin_api_client.get(f"/api/blog/posts/{rows[0]['id']}/").json()
+    assert detail["body"].startswith(FM)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("params", ["", "?include=content"])
+def test_list_query_count_is_constant(list_site, admin_api_client, django_assert_num_queries, params):
+    site, author, cats = list_site
+    _add_posts(site, author, cats, 0, 2)
+    admin_api_client.get(f"/api/blog/posts/{params}")  # scalda la cache del totale
+
+    # versione (ETag) + posts + categorie; include=content: + images + comments
+    expected = 3 if not params else 5
+    with django_assert_num_queries(expected):
+        admin_api_client.get(f"/api/blog/posts/{params}")
+
+    _add_posts(site, author, cats, 2, 8)
+    admin_api_client.get(f"/api/blog/posts/{params}")
+    with django_assert_num_queries(expected):
+        assert len(admin_api_client.get(f"/api/blog/posts/{params}").json()["results"]) == 10
+
+
+@pytest.mark.django_db
+def test_list_does_not_load_full_content(list_site, admin_api_client):
+    site, author, cats = list_site
+    _add_posts(site, author, cats, 0, 1)
+    with CaptureQueriesContext(connection) as ctx:
+        admin_api_client.get("/api/blog/posts/?cursor=")
+    post_sql = next(q["sql"] for q in ctx.captured_queries if 'FROM "blog_post"' in q["sql"])
+    # solo SUBSTR(content, 1, N) per l'estratto, mai la colonna intera
+    assert '"blog_post"."content"' not in post_sql.split("SUBSTR")[0]
+    assert "SUBSTR" in post_sql
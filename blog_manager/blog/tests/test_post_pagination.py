@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Post
+
+
+def _make_posts(site, author, n, drafts=0):
+    base = timezone.now()
+    posts = []
+    for i in range(n):
+        # coppie con lo stesso published_at: il tie-break su id deve reggere
+        posts.append(Post.objects.create(
+            site=site, title=f"P{i}", slug=f"p{i}", content="x", author=author,
+            published_at=base - timedelta(minutes=i // 2),
+        ))
+    for i in range(drafts):
+        posts.append(Post.objects.create(site=site, title=f"D{i}", slug=f"d{i}", content="x", author=author))
+    return posts
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("prefix", ["/api/posts/", "/api/blog/posts/"])
+def test_cursor_walks_all_posts_in_default_order(blog_site, admin_api_client, prefix):
+    site, author = blog_site
+    _make_posts(site, author, 9, drafts=3)
+    expected = list(Post.objects.order_by("-published_at", "-id").values_list("id", flat=True))
+
+    seen, url, pages = [], f"{prefix}?cursor=&page_size=4", 0
+    while url:
+        data = admin_api_client.get(url).json()
+        assert "count" not in data and data["previous"] is None
+        seen += [r["id"] for r in data["results"]]
+        url, pages = data["next"], pages + 1
+    assert seen == expected
+    assert pages == 3
+
+
+@pytest.mark.django_db
+def test_cursor_rejects_other_orderings_and_bad_tokens(blog_site, admin_api_client):
+    assert admin_api_client.get("/api/posts/?cursor=&ordering=title").status_code == 400
+    assert admin_api_client.get("/api/posts/?cursor=&ordering=-published_at,-id").status_code == 200
+    assert admin_api_client.get("/api/posts/?cursor=%%%").status_code == 404
+
+
+@pytest.mark.django_db
+def test_cursor_pages_do_not_count(blog_site, admin_api_client):
+    site, author = blog_site
+    _make_posts(site, author, 6)
+    first = admin_api_client.get("/api/posts/?cursor=&page_size=2").json()
+    with CaptureQueriesContext(connection) as ctx:
+        admin_api_client.get(first["next"])
+    sqls = [q["sql"].upper() for q in ctx.captured_queries if "BLOG_POST" in q["sql"].upper()]
+    assert not any("COUNT(" in s for s in sqls)
+    assert not any("OFFSET" in s for s in sqls)
+
+
+@pytest.mark.django_db
+def test_unfiltered_page_count_is_cached(blog_site, admin_api_client):
+    site, author = blog_site
+    _make_posts(site, author, 3)
+
+    assert admin_api_client.get("/api/posts/").json()["count"] == 3
+    with CaptureQueriesContext(connection) as ctx:
+        assert admin_api_client.get("/api/posts/?page=1").json()["count"] == 3
+    assert not any('COUNT(' in q["sql"].upper() for q in ctx.captured_queries if '"blog_post"' in q["sql"])
+
+    # insert/delete invalidano il totale; i filtri continuano a contare davvero
+    Post.objects.create(site=site, title="New", slug="new", content="x", author=author)
+    assert admin_api_client.get("/api/posts/").json()["count"] == 4
+    drafts = Post.objects.filter(site=site, status="draft").count()
+    assert admin_api_client.get(f"/api/posts/?site={site.pk}&status=draft").json()["count"] == drafts
+    Post.objects.filter(slug="new").get().delete()
+    assert admin_api_client.get("/api/posts/").json()["count"] == 3
@@ -0,0 +1,129 @@
+import os
+import time
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import Post, Site
+
+
+@pytest.fixture
+def save_site(make_site, tmp_path):
+    return make_site("SaveSite", repo_path=str(tmp_path))
+
+
+def _published(site, author, slug="p"):
+    return Post.objects.create(
+        site=site, author=author, title="P", slug=slug, content="x",
+        status="published", is_published=True, published_at=timezone.now(),
+    )
+
+
+def _selects(ctx):
+    return [q["sql"] for q in ctx.captured_queries if q["sql"].lstrip().upper().startswith("SELECT")]
+
+
+@pytest.mark.django_db
+def test_changed_fields_tracks_loaded_values(save_site):
+    site, author = save_site
+    post = Post(site=site, author=author, title="P", slug="p", content="x")
+    assert post.changed_fields() is None
+    post.save()
+    assert post.changed_fields() == set()
+    post.title = "P2"
+    post.content = "y"
+    assert post.changed_fields() == {"title", "content"}
+
+    loaded = Post.objects.get(pk=post.pk)
+    assert loaded.changed_fields() == set()
+    loaded.slug = "p-2"
+    assert loaded.changed_fields() == {"slug"}
+    loaded.refresh_from_db(fields=["slug"])
+    assert loaded.changed_fields() == set()
+
+
+@pytest.mark.django_db
+def test_title_edit_skips_relation_uniqueness_and_slug_lock_queries(save_site):
+    site, author = save_site
+    post = Post.objects.get(pk=_published(site, author).pk)
+    assert post.slug_locked
+
+    post.title = "Renamed"
+    with CaptureQueriesContext(connection) as ctx:
+        post.save()
+    selects = _selects(ctx)
+    # nessun lookup di site/author, nessuna unicità (site, slug), nessuna rilettura dello slug
+    assert not any('"blog_site"' in q or '"blog_author"' in q for q in selects), selects
+    assert not any('"blog_post"' in q for q in selects), selects
+    assert Post.objects.get(pk=post.pk).title == "Renamed"
+
+
+@pytest.mark.django_db
+def test_expensive_checks_still_run_when_their_fields_change(save_site, tmp_path):
+    site, author = save_site
+    post = Post.objects.get(pk=_published(site, author).pk)
+
+    post.slug = "other"
+    with pytest.raises(ValidationError) as exc:
+        post.save()
+    assert "slug" in exc.value.message_dict
+
+    # repo sparito: un edit del titolo non tocca il filesystem, una (ri)pubblicazione sì
+    post = Post.objects.get(pk=post.pk)
+    Site.objects.filter(pk=site.pk).update(repo_path=str(tmp_path / "missing"))
+    post.site.repo_path = str(tmp_path / "missing")
+    post.title = "Still fine"
+    post.save()
+    draft = Post.objects.create(site=post.site, author=author, title="D", slug="d", content="x")
+    draft = Post.objects.get(pk=draft.pk)
+    draft.status, draft.is_published, draft.published_at = "published", True, timezone.now()
+    with pytest.raises(ValidationError) as exc:
+        draft.save()
+    assert "site" in exc.value.message_dict
+
+    other = Post(site=site, author=author, title="Dup", slug="p", content="x")
+    with pytest.raises(ValidationError):
+        other.save()
+
+
+@pytest.mark.django_db
+def test_validate_false_keeps_invariants(save_site):
+    site, author = save_site
+    post = Post(site=site, author=author, title="P", slug="p", content="x", status="review")
+    with pytest.raises(ValidationError):
+        post.save(validate=False)
+
+    post = Post(site=site, author=author, title="P", slug="p", content="x")
+    with CaptureQueriesContext(connection) as ctx:
+        post.save(validate=False)
+    # niente unicità (site, slug) né lookup delle relazioni (i receiver fanno le loro query)
+    assert post.pk and not any('FROM "blog_post"' in q or 'FROM "blog_author"' in q for q in _selects(ctx))
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(not os.environ.get("BLOG_BENCH"), reason="set BLOG_BENCH=1 to run the Post.save benchmark")
+def test_save_benchmark(save_site):
+    """BLOG_BENCH=1 pytest blog/tests/test_post_save_validation.py -k benchmark -s"""
+    site, author = save_site
+    n = int(os.environ.get("BLOG_BENCH_POSTS", 2000))
+    Post.objects.bulk_create(
+        [Post(site=site, author=author, title=f"B{i}", slug=f"bench-{i}", content="lorem ipsum " * 50,
+              status="published", is_published=True, published_at=timezone.now(), slug_locked=True)
+         for i in range(n)],
+        batch_size=1000,
+    )
+    posts = list(Post.objects.filter(site=site).select_related("site"))
+    rates = {}
+    for label in ("untracked", "tracked", "validate=False"):
+        started = time.perf_counter()
+        for i, post in enumerate(posts):
+            if label == "untracked":
+                post._loaded_values = None  # comportamento precedente: tutto conta come cambiato
+            post.title = f"{label} {i}"
+            post.save(validate=label != "validate=False")
+        rates[label] = len(posts) / (time.perf_counter() - started)
+        print(f"\n{label}: {rates[label]:.0f} saves/s")
+    assert rates["tracked"] > rates["untracked"]
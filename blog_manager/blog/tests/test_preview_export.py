@@ -0,0 +1,99 @@
+"""
+Tests for the per-site preview export: skip-if-unchanged and coalescing.
+
+GitHub is never contacted: GitHubClient.upsert_file is monkeypatched.
+"""
+import threading
+import time
+
+import pytest
+from django.utils import timezone
+
+from blog.models import Site, Post
+
+
+FM = "---\ntitle: Preview\ncategories: [django]\n---\n"
+
+
+@pytest.fixture
+def preview_post(db, monkeypatch):
+    monkeypatch.setenv("GIT_TOKEN", "fake-token")
+    site = Site.objects.create(name="PSite", domain="https://preview.example", repo_owner="owner", repo_name="repo")
+    author = site.authors.create(name="PA", slug="pa")
+    return Post.objects.create(site=site, title="Prev", slug="prev", status="draft", published_at=timezone.now(), content=FM + "body\n", author=author)
+
+
+@pytest.fixture
+def upserts(monkeypatch):
+    calls = []
+
+    def fake_upsert(self, owner, repo, path, content, branch="main", message=""):
+        calls.append(path)
+        return {"commit_sha": f"c{len(calls)}", "content_sha": f"b{len(calls)}", "html_url": None}
+
+    monkeypatch.setattr("blog.github_client.GitHubClient.upsert_file", fake_upsert)
+    return calls
+
+
+def _fresh(post):
+    return Post.objects.select_related("site").get(pk=post.pk)
+
+
+@pytest.mark.django_db
+def test_preview_skips_commit_when_unchanged(preview_post, upserts):
+    from blog.preview import export_post_to_preview
+
+    first = export_post_to_preview(_fresh(preview_post))
+    assert first["unchanged"] is False
+    Post.objects.filter(pk=preview_post.pk).update(preview_url=first["preview_url"])
+
+    p = _fresh(preview_post)
+    assert p.preview_hash and p.preview_blob_sha == "b1"
+
+    second = export_post_to_preview(p)
+    assert second["unchanged"] is True
+    assert second["commit_sha"] is None
+    assert second["preview_url"] == first["preview_url"]
+    assert len(upserts) == 1
+
+    # content change => new commit
+    Post.objects.filter(pk=preview_post.pk).update(content=FM + "changed\n")
+    third = export_post_to_preview(_fresh(preview_post))
+    assert third["unchanged"] is False
+    assert len(upserts) == 2
+
+
+@pytest.mark.django_db
+def test_preview_coalesces_concurrent_requests(monkeypatch):
+    import blog.preview as preview
+
+    calls = []
+    release = threading.Event()
+
+    def slow_export(post, site=None):
+        calls.append(post.id)
+        release.wait(5)
+        return {"preview_url": "https://x/preview/1/", "commit_sha": "abc", "unchanged": False}
+
+    monkeypatch.setattr(preview, "_export_post_to_preview", slow_export)
+
+    class P:
+        id = 4242
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(preview.export_post_to_preview(P()))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    # let every thread reach the in-flight future before releasing the leader
+    deadline = time.time() + 5
+    while not calls and time.time() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert calls == [4242]
+    assert len(results) == 4
+    assert all(r["commit_sha"] == "abc" for r in results)
+    assert preview._INFLIGHT == {}
@@ -0,0 +1,113 @@
+"""
+Tests for the local (in-process) preview renderer: GET /api/posts/{id}/preview/local/.
+
+Network access is blocked for the whole module.
+"""
+import socket
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from blog.models import Site, Post
+
+
+FM = "---\ntitle: Local Preview\ncategories: [django]\n---\n"
+
+
+@pytest.fixture(autouse=True)
+def no_network(monkeypatch):
+    def guard(*args, **kwargs):
+        raise AssertionError("network access attempted during local preview")
+
+    monkeypatch.setattr(socket.socket, "connect", guard)
+    monkeypatch.setattr("blog.github_client.GitHubClient.__init__", guard)
+
+
+@pytest.fixture
+def local_post(db):
+    site = Site.objects.create(name="LSite", domain="https://local.example", repo_owner="o", repo_name="r")
+    author = site.authors.create(name="LA", slug="la")
+    body = "# Heading\n\nSome **bold** text and <script>x</script>.\n\n- one\n- two\n"
+    return Post.objects.create(site=site, title="Local", slug="local", status="draft", published_at=timezone.now(), content=FM + body, author=author)
+
+
+def test_markdown_to_html_basic():
+    from blog.preview import markdown_to_html
+
+    out = markdown_to_html("## T\n\n[x](https://example.com \"t\") `a<b`\n\n```python\n<b>\n```")
+    assert "<h2>T</h2>" in out
+    assert '<a href="https://example.com" title="t" rel="noopener noreferrer">x</a>' in out
+    assert "<code>a&lt;b</code>" in out
+    assert '<pre><code class="language-python">&lt;b&gt;\n</code></pre>' in out
+
+
+XSS = (
+    "Text <script>alert(1)</script> <img src=x onerror=alert(1)>\n\n"
+    "<div onclick=\"alert(2)\">\n<script>y</script>\n</div>\n\n"
+    "[a](javascript:alert(3)) [b](JaVa&#115;cript:alert(4)) ![c](data:text/html;base64,PHNjcmlwdD4=)\n\n"
+    "[d](https://example.com){: onmouseover=\"alert(5)\" }\n\n"
+    "## Title {: onclick=\"alert(6)\" }\n"
+    "<a href=\"vbscript:msgbox(7)\">e</a> <iframe src=\"https://evil.example\"></iframe>\n"
+)
+
+
+def test_markdown_to_html_sanitizes():
+    from html.parser import HTMLParser
+
+    from blog.preview import markdown_to_html
+
+    class Collect(HTMLParser):
+        tags = []
+
+        def handle_starttag(self, tag, attrs):
+            self.tags.append((tag, dict(attrs)))
+
+    out = markdown_to_html(XSS)
+    parser = Collect()
+    parser.feed(out)
+    assert not {"script", "iframe"} & {t for t, _a in parser.tags}
+    assert "alert(1)" not in out and "y\n" not in out
+    for _tag, attrs in parser.tags:
+        assert not any(name.startswith("on") for name in attrs), attrs
+        for name in ("href", "src"):
+            url = "".join((attrs.get(name) or "").split()).lower()
+            assert not url.startswith(("javascript:", "vbscript:", "data:")), attrs
+    assert ("a", {"href": "https://example.com", "rel": "noopener noreferrer"}) in parser.tags
+
+
+@pytest.mark.django_db
+def test_local_preview_renders_and_caches(local_post, admin_user):
+    client = APIClient()
+    client.force_authenticate(admin_user)
+    url = f"/api/posts/{local_post.pk}/preview/local/"
+
+    r1 = client.get(url)
+    assert r1.status_code == 200
+    data = r1.json()
+    assert data["post_id"] == local_post.pk
+    assert data["cached"] is False
+    assert "<h1>Heading</h1>" in data["html"]
+    assert "<strong>bold</strong>" in data["html"]
+    assert "<script>" not in data["html"]
+    assert data["front_matter"]["categories"] == ["django"]
+
+    r2 = client.get(url)
+    assert r2.json()["cached"] is True
+    assert r2.json()["content_hash"] == data["content_hash"]
+
+    # new content => new hash, fresh render
+    Post.objects.filter(pk=local_post.pk).update(content=FM + "Changed\n")
+    r3 = client.get(url)
+    assert r3.json()["cached"] is False
+    assert r3.json()["content_hash"] != data["content_hash"]
+    assert "<p>Changed</p>" in r3.json()["html"]
+
+
+@pytest.mark.django_db
+def test_local_preview_validation_error(local_post, admin_user):
+    Post.objects.filter(pk=local_post.pk).update(content="no front matter")
+    client = APIClient()
+    client.force_authenticate(admin_user)
+    r = client.get(f"/api/posts/{local_post.pk}/preview/local/")
+    assert r.status_code == 400
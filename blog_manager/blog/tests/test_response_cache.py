@@ -0,0 +1,124 @@
+import os
+import statistics
+import time
+
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from api import response_cache
+from blog.models import Post
+
+
+@pytest.fixture
+def rc_site(blog_site):
+    site, author = blog_site
+    post = Post.objects.create(site=site, title="P", slug="p", content="x", author=author)
+    return site, author, post
+
+
+@pytest.mark.django_db
+def test_anonymous_reads_are_served_from_cache(rc_site, django_assert_num_queries):
+    site, author, post = rc_site
+    client = APIClient()
+    url = f"/api/blog/posts/?site={site.pk}"
+
+    first = client.get(url)
+    assert first["X-Cache"] == "MISS"
+    with django_assert_num_queries(1):  # solo la versione del sito
+        second = client.get(url)
+    assert second["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+
+    detail = f"/api/blog/posts/{post.pk}/"
+    assert client.get(detail)["X-Cache"] == "MISS"
+    assert client.get(detail)["X-Cache"] == "HIT"
+
+    s = response_cache.stats()
+    assert (s["hits"], s["misses"]) == (2, 2)
+    assert s["hit_rate"] == 0.5
+
+
+@pytest.mark.django_db
+def test_writes_invalidate_through_the_version_marker(rc_site):
+    site, author, post = rc_site
+    client = APIClient()
+    url = f"/api/blog/posts/?site={site.pk}"
+    client.get(url)
+
+    Post.objects.create(site=site, title="New", slug="new", content="x", author=author)
+    resp = client.get(url)
+    assert resp["X-Cache"] == "MISS"
+    assert resp.json()["count"] == 2
+
+
+@pytest.mark.django_db
+def test_authenticated_requests_bypass_cache(rc_site, admin_user):
+    site, _author, _post = rc_site
+    client = APIClient()
+    client.force_authenticate(admin_user)
+    assert "X-Cache" not in client.get(f"/api/blog/posts/?site={site.pk}")
+
+
+@pytest.mark.django_db
+def test_file_backend_and_stats_command(rc_site, settings, tmp_path, capsys):
+    settings.CACHES = dict(settings.CACHES, blog_responses={
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": str(tmp_path),
+    })
+    site, _author, _post = rc_site
+    client = APIClient()
+    for _ in range(4):
+        client.get(f"/api/blog/posts/?site={site.pk}")
+    assert any(tmp_path.iterdir())
+
+    call_command("response_cache")
+    assert "hits=3 misses=1 hit_rate=75.0%" in capsys.readouterr().out
+
+
+@pytest.mark.django_db
+def test_disabled_cache(rc_site, settings):
+    settings.BLOG_RESPONSE_CACHE = "off"
+    site, _author, _post = rc_site
+    client = APIClient()
+    client.get(f"/api/blog/posts/?site={site.pk}")
+    assert "X-Cache" not in client.get(f"/api/blog/posts/?site={site.pk}")
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(not os.environ.get("BLOG_BENCH"), reason="set BLOG_BENCH=1 to run the response cache benchmark")
+def test_response_cache_load_benchmark(rc_site, settings, monkeypatch):
+    """BLOG_BENCH=1 pytest blog/tests/test_response_cache.py -k benchmark -s"""
+    from rest_framework.throttling import AnonRateThrottle
+
+    monkeypatch.setattr(AnonRateThrottle, "allow_request", lambda self, request, view: True)
+    site, author, _post = rc_site
+    Post.objects.bulk_create([
+        Post(site=site, author=author, title=f"Bench {i}", slug=f"bench-{i}", content="lorem ipsum " * 300)
+        for i in range(int(os.environ.get("BLOG_BENCH_POSTS", 2000)))
+    ])
+    urls = [f"/api/blog/posts/?site={site.pk}&page={p}" for p in range(1, 11)]
+    requests = int(os.environ.get("BLOG_BENCH_REQUESTS", 500))
+    client = APIClient()
+
+    results = {}
+    for mode in ("off", "locmem"):
+        settings.BLOG_RESPONSE_CACHE = mode
+        caches["blog_responses"].clear()
+        samples = []
+        for i in range(requests):
+            started = time.perf_counter()
+            assert client.get(urls[i % len(urls)]).status_code == 200
+            samples.append((time.perf_counter() - started) * 1000)
+        results[mode] = (statistics.median(samples), _percentile(samples, 0.99))
+
+    print("\nanonymous post list, %d requests:" % requests)
+    for mode, (p50, p99) in results.items():
+        print(f"  cache={mode:6s} p50={p50:.2f}ms p99={p99:.2f}ms")
+    print(f"  hit rate: {response_cache.stats()['hit_rate']:.1%}")
+    assert results["locmem"][0] < results["off"][0]
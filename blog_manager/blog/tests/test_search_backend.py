@@ -0,0 +1,146 @@
+import os
+import random
+import string
+import time
+
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from blog.models import Post
+from blog.services import search
+from blog.services.search import BasicSearchBackend, SQLiteFTS5Backend, make_snippet, search_posts, snippet_html
+
+
+def _fts_rows(term):
+    with connection.cursor() as c:
+        c.execute("SELECT rowid FROM blog_post_fts WHERE blog_post_fts MATCH %s", [term])
+        return sorted(r[0] for r in c.fetchall())
+
+
+def test_make_snippet_escapes_and_marks():
+    text = "---\ntitle: x\n---\n" + "intro " * 40 + "Django <b>forms</b> rock " + "tail " * 40
+    out = make_snippet(text, ["forms"])
+    assert "<mark>forms</mark>" in out
+    assert "&lt;b&gt;" in out and "<b>" not in out
+    assert out.startswith("…") and out.endswith("…")
+    assert "title:" not in out
+
+
+@pytest.mark.django_db
+def test_fts_index_follows_save_and_delete(blog_site):
+    if connection.vendor != "sqlite":
+        pytest.skip("FTS5 triggers are SQLite-only")
+    site, author = blog_site
+    post = Post.objects.create(site=site, title="Kiwi", slug="kiwi", content="banana split", author=author)
+    assert _fts_rows("banana") == [post.pk]
+
+    post.content = "mango lassi"
+    post.save()
+    assert _fts_rows("banana") == []
+    assert _fts_rows("mango") == [post.pk]
+
+    post.delete()
+    assert _fts_rows("mango") == []
+
+
+@pytest.mark.django_db
+def test_fts_ranks_title_matches_first(blog_site):
+    if connection.vendor != "sqlite":
+        pytest.skip("FTS5 triggers are SQLite-only")
+    site, author = blog_site
+    body = Post.objects.create(site=site, title="Other", slug="other", content="all about caching here", author=author)
+    title = Post.objects.create(site=site, title="Caching guide", slug="caching", content="short", author=author)
+    Post.objects.create(site=site, title="Nope", slug="nope", content="nothing", author=author)
+
+    assert isinstance(search.get_search_backend(), SQLiteFTS5Backend)
+    rows = list(search_posts(Post.objects.all(), "cach").order_by("-search_rank"))  # prefisso sull'ultimo termine
+    assert [p.pk for p in rows] == [title.pk, body.pk]
+    assert "<mark>caching</mark>" in snippet_html(rows[1].search_snippet)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("backend", ["fts5", "basic"])
+def test_api_snippet_escapes_html_in_content(blog_site, admin_user, settings, backend):
+    if backend == "fts5" and connection.vendor != "sqlite":
+        pytest.skip("FTS5 is SQLite-only")
+    settings.BLOG_SEARCH_BACKEND = backend
+    site, author = blog_site
+    Post.objects.create(site=site, title="Zoo", slug="zoo", author=author,
+                        content="zebra <img src=x onerror=alert(1)> zebra")
+
+    client = APIClient()
+    client.force_authenticate(admin_user)
+    data = client.get("/api/posts/", {"search": "zebra"}).json()
+    rows = data["results"] if isinstance(data, dict) else data
+    snippet = rows[0]["search_snippet"]
+    # stesso contratto per tutti i backend: testo escapato, <mark> solo attorno ai match
+    assert "<img" not in snippet and "&lt;img src=x onerror=alert(1)&gt;" in snippet
+    assert snippet.count("<mark>zebra</mark>") == 2
+
+
+@pytest.mark.django_db
+def test_basic_fallback_backend(blog_site, settings):
+    settings.BLOG_SEARCH_BACKEND = "basic"
+    site, author = blog_site
+    a = Post.objects.create(site=site, title="Alpha beta", slug="a", content="x", author=author)
+    b = Post.objects.create(site=site, title="Gamma", slug="g", content="alpha and beta", author=author)
+    Post.objects.create(site=site, title="Alpha", slug="only", content="x", author=author)
+
+    assert isinstance(search.get_search_backend(), BasicSearchBackend)
+    rows = list(search_posts(Post.objects.all(), "alpha beta").order_by("-search_rank", "id"))
+    assert [p.pk for p in rows] == [a.pk, b.pk]
+    assert list(search_posts(Post.objects.all(), "  ")) == []
+
+
+@pytest.mark.django_db
+def test_api_search_param_is_ranked_with_snippets(blog_site, admin_user):
+    site, author = blog_site
+    body = Post.objects.create(site=site, title="Misc", slug="misc", content="notes on Django signals", author=author)
+    title = Post.objects.create(site=site, title="Django signals", slug="signals", content="intro", author=author)
+    Post.objects.create(site=site, title="Flask", slug="flask", content="unrelated", author=author)
+
+    client = APIClient()
+    client.force_authenticate(admin_user)
+    data = client.get("/api/posts/", {"search": "django signals"}).json()
+    rows = data["results"] if isinstance(data, dict) else data
+    assert [r["id"] for r in rows] == [title.pk, body.pk]
+    assert all("search_rank" in r for r in rows)
+    assert "<mark>" in rows[1]["search_snippet"]
+
+    # ordering esplicito vince sulla rilevanza
+    data = client.get("/api/posts/", {"search": "django signals", "ordering": "id"}).json()
+    rows = data["results"] if isinstance(data, dict) else data
+    assert [r["id"] for r in rows] == [body.pk, title.pk]
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(not os.environ.get("BLOG_BENCH"), reason="set BLOG_BENCH=1 to run the search benchmark")
+def test_search_benchmark_50k(blog_site, settings):
+    """BLOG_BENCH=1 pytest blog/tests/test_search_backend.py -k benchmark -s"""
+    site, author = blog_site
+    n = int(os.environ.get("BLOG_BENCH_POSTS", 50000))
+    rnd = random.Random(42)
+    # vocabolario "realistico": parole distinte, non prefissi l'una dell'altra come w1/w17/w175
+    words = sorted({"".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(4, 9))) for _ in range(6000)})[:5000]
+    Post.objects.bulk_create(
+        [
+            Post(site=site, author=author, title=" ".join(rnd.choices(words, k=6)), slug=f"bench-{i}",
+                 content=" ".join(rnd.choices(words, k=300)))
+            for i in range(n)
+        ],
+        batch_size=2000,
+    )
+    queries = [words[17], f"{words[42]} {words[99][:3]}", words[4999], " ".join(words[1:4])]
+    timings = {}
+    for name in ("basic", "fts5"):
+        if name == "fts5" and connection.vendor != "sqlite":
+            continue
+        settings.BLOG_SEARCH_BACKEND = name
+        started = time.perf_counter()
+        for q in queries:
+            list(search_posts(Post.objects.all(), q).order_by("-search_rank")[:20])
+        timings[name] = (time.perf_counter() - started) / len(queries)
+    print(f"\nsearch over {n} posts, avg per query: " + ", ".join(f"{k}={v * 1000:.1f}ms" for k, v in timings.items()))
+    if "fts5" in timings:
+        assert timings["fts5"] < timings["basic"]
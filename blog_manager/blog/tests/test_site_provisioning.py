@@ -0,0 +1,132 @@
+import subprocess
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+
+from blog.models import Site
+from blog.services import provisioning
+
+
+def _git(cwd, *args):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def remote_repo(tmp_path):
+    """Bare repo with a main branch containing _posts/, used as the clone source."""
+    work = tmp_path / "seed"
+    work.mkdir()
+    _git(work, "init", "-q")
+    _git(work, "symbolic-ref", "HEAD", "refs/heads/main")
+    (work / "_posts").mkdir()
+    (work / "_posts" / "2025-01-01-hello.md").write_text("---\ntitle: Hello\n---\nbody\n")
+    _git(work, "add", "--all")
+    _git(work, "-c", "user.name=t", "-c", "user.email=t@example.com", "commit", "-q", "-m", "seed")
+    bare = tmp_path / "remote.git"
+    _git(tmp_path, "clone", "-q", "--bare", str(work), str(bare))
+    return bare
+
+
+@pytest.fixture
+def prov(settings, monkeypatch, remote_repo, tmp_path):
+    settings.EXPORT_ENABLED = False
+    settings.BLOG_PROVISION_THREAD = False
+    settings.BLOG_REPO_BASE = str(tmp_path / "repos")
+    monkeypatch.setattr(provisioning, "remote_url", lambda site: f"file://{remote_repo}" if site.repo_name else None)
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_save_only_writes_the_row(prov, monkeypatch, django_capture_on_commit_callbacks):
+    calls = []
+    monkeypatch.setattr(provisioning.subprocess, "run", lambda *a, **kw: calls.append(a))
+    monkeypatch.setattr(provisioning, "schedule_provisioning", lambda site_id: calls.append(site_id))
+    target = prov / "explicit"
+    target.mkdir()
+    with django_capture_on_commit_callbacks(execute=True):
+        site = Site.objects.create(name="Prov", domain="https://prov.example", repo_path=str(target),
+                                   repo_owner="acme", repo_name="blog")
+    assert site.provision_status == "pending"
+    assert not (target / ".git").exists() and calls == [site.pk]
+
+    # modifiche che non toccano il repo non rimettono in coda il sito
+    Site.objects.filter(pk=site.pk).update(provision_status="ready")
+    site = Site.objects.get(pk=site.pk)
+    site.name = "Renamed"
+    site.save()
+    assert site.provision_status == "ready" and calls == [site.pk]
+    site.default_branch = "dev"
+    site.save()
+    assert Site.objects.get(pk=site.pk).provision_status == "pending"
+
+
+@pytest.mark.django_db
+def test_clone_into_fallback_dir_and_validate(prov):
+    site = Site.objects.create(name="Clone", domain="https://clone.example", repo_owner="acme", repo_name="blog")
+    res = provisioning.provision_site(site.pk)
+    site.refresh_from_db()
+    assert res["status"] == "ready", res
+    assert site.provision_status == "ready" and site.provision_progress == 100
+    assert site.repo_path == str(prov / "repos" / site.slug)
+    assert (prov / "repos" / site.slug / "_posts" / "2025-01-01-hello.md").exists()
+    assert (prov / "repos" / site.slug / "assets" / "img").is_dir()
+    origin = subprocess.run(["git", "remote", "get-url", "origin"], cwd=site.repo_path,
+                            capture_output=True, text=True).stdout.strip()
+    assert origin.endswith("remote.git")
+    # già claimato/pronto: un secondo giro non fa nulla
+    assert provisioning.provision_site(site.pk)["status"] == "skipped"
+
+
+@pytest.mark.django_db
+def test_failures_are_reported_and_retried(prov):
+    site = Site.objects.create(name="Bad", domain="https://bad.example", repo_owner="acme", repo_name="blog",
+                               default_branch="nope")
+    res = provisioning.provision_site(site.pk)
+    site.refresh_from_db()
+    assert res["status"] == site.provision_status == "failed"
+    assert "git clone fallito" in site.provision_message
+
+    # branch giusto ma posts_dir assente nel repo clonato
+    Site.objects.filter(pk=site.pk).update(default_branch="main", posts_dir="content/posts")
+    call_command("provision_sites", "--retry-failed")
+    site.refresh_from_db()
+    assert site.provision_status == "failed" and "content/posts" in site.provision_message
+
+    site.posts_dir = "../escape"
+    with pytest.raises(ValidationError):
+        site.full_clean()
+
+
+@pytest.mark.django_db
+def test_init_without_remote_creates_dirs(prov):
+    site = Site.objects.create(name="Local", domain="https://local.example")
+    call_command("provision_sites")
+    site.refresh_from_db()
+    assert site.provision_status == "ready", site.provision_message
+    repo = prov / "repos" / site.slug
+    assert (repo / ".git").is_dir() and (repo / "README.md").exists()
+    assert (repo / "_posts").is_dir()
+
+
+@pytest.mark.django_db
+def test_stale_instance_save_keeps_worker_state(prov):
+    site = Site.objects.create(name="Stale", domain="https://stale.example", repo_owner="acme", repo_name="blog")
+    stale = Site.objects.get(pk=site.pk)  # es. form admin aperto mentre il sito è pending
+    assert stale.provision_status == "pending"
+
+    assert provisioning.provision_site(site.pk)["status"] == "ready"
+    stale.name = "Renamed"
+    stale.save()
+    row = Site.objects.values("name", "provision_status", "provision_progress", "provisioned_at").get(pk=site.pk)
+    assert row["name"] == "Renamed"
+    assert row["provision_status"] == "ready" and row["provision_progress"] == 100 and row["provisioned_at"]
+
+    # salvataggio vecchio durante il clone: il worker conclude comunque
+    Site.objects.filter(pk=site.pk).update(provision_status="pending")
+    stale = Site.objects.get(pk=site.pk)
+    assert provisioning.claim(site.pk)
+    stale.name = "Again"
+    stale.save()
+    assert provisioning._finish(stale, "ready", "ok")["status"] == "ready"
+    assert Site.objects.get(pk=site.pk).provision_status == "ready"
@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from blog.models import Post
+from blog.services import slugs
+
+
+@pytest.fixture
+def slug_site(make_site):
+    # niente `db`: il test concorrente usa transaction=True
+    return make_site("SlugSite")
+
+
+@pytest.mark.django_db
+def test_one_query_whatever_the_collisions(slug_site):
+    site, author = slug_site
+    Post.objects.create(site=site, title="Hello", content="x", author=author)
+    for i in range(2, 10):
+        Post.objects.create(site=site, title="Hello", slug=f"hello-{i}", content="x", author=author)
+
+    with CaptureQueriesContext(connection) as ctx:
+        slug = Post.safe_slugify(site_id=site.pk, title="Hello")
+    assert slug == "hello-10"
+    assert len(ctx.captured_queries) == 1
+    # lo slug del post stesso non è una collisione
+    own = Post.objects.get(site=site, slug="hello-3")
+    assert slugs.allocate_slug(site.pk, "hello-3", exclude_pk=own.pk) == "hello-3"
+
+
+@pytest.mark.django_db
+def test_insert_retries_when_a_concurrent_create_wins(slug_site, monkeypatch):
+    site, author = slug_site
+    Post.objects.create(site=site, title="Race", content="x", author=author)
+    real = slugs.allocate_slug
+    calls = []
+
+    def stale_first(site_id, base, **kw):
+        # la prima lettura non vede il post "race" (commit concorrente dopo la query)
+        calls.append(kw.get("reserved"))
+        return "race" if len(calls) == 1 else real(site_id, base, **kw)
+
+    monkeypatch.setattr(slugs, "allocate_slug", stale_first)
+    post = Post.objects.create(site=site, title="Race", content="x", author=author)
+    assert post.slug == "race-2"
+    assert calls[1] == {"race"}
+
+    # slug esplicito: nessuna riallocazione silenziosa
+    with pytest.raises(ValidationError):
+        Post.objects.create(site=site, title="Other", slug="race", content="x", author=author)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_creates_get_distinct_slugs(slug_site):
+    site, author = slug_site
+    workers = 6
+    barrier = threading.Barrier(workers)
+    # SQLite in memoria (cache condivisa) blocca la tabella invece di attendere:
+    # le letture dell'allocatore sono concorrenti, le insert serializzate
+    write_lock = threading.Lock()
+    results, errors = [], []
+
+    def create():
+        try:
+            with slugs.auto_slug(site.pk, "popular-title") as slug:
+                barrier.wait(timeout=10)  # tutti hanno letto prima di qualsiasi insert
+                with write_lock:
+                    post = Post.objects.create(site=site, title="Popular title", slug=slug,
+                                               content="x", author=author)
+            results.append((slug, post.slug))
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(repr(e))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=create) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=30)
+
+    assert errors == []
+    assert {allocated for allocated, _saved in results} == {"popular-title"}
+    assert sorted(saved for _allocated, saved in results) == sorted(
+        ["popular-title"] + [f"popular-title-{i}" for i in range(2, workers + 1)]
+    )
+
+
+@pytest.mark.django_db
+def test_api_auto_slug_suffix(slug_site, admin_user):
+    site, author = slug_site
+    client = APIClient()
+    client.force_authenticate(admin_user)
+    payload = {"site": site.pk, "author": author.pk, "title": "Same Title", "content": "x"}
+    first = client.post("/api/blog/posts/", payload, format="json")
+    second = client.post("/api/blog/posts/", payload, format="json")
+    assert (first.status_code, second.status_code) == (201, 201)
+    assert [first.json()["slug"], second.json()["slug"]] == ["same-title", "same-title-2"]
+
+    # rinominare con il proprio slug non aggiunge suffissi
+    pk = first.json()["id"]
+    resp = client.patch(f"/api/blog/posts/{pk}/", {"slug": "same-title"}, format="json")
+    assert resp.status_code == 200 and resp.json()["slug"] == "same-title"
@@ -0,0 +1,149 @@
+import gzip
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+
+from blog.models import Post, Site
+from blog.services import snapshots
+
+
+@pytest.fixture
+def snap_site(db, make_site, settings, tmp_path):
+    settings.BLOG_SNAPSHOTS = False
+    settings.BLOG_SNAPSHOT_DIR = str(tmp_path / "snap")
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    site, author = make_site("SnapSite", repo_path=str(repo))
+    Post.objects.create(
+        site=site, title="Pub", slug="pub", author=author, status="published",
+        content="---\ncategories: [Django]\nsubcluster: orm\n---\n\nbody",
+    )
+    Post.objects.create(site=site, title="Draft", slug="draft", content="x", author=author)
+    return site, author, tmp_path / "snap" / site.slug
+
+
+def _manifest(out):
+    return json.loads((out / "manifest.json").read_text())
+
+
+@pytest.mark.django_db
+def test_snapshot_files_manifest_and_variants(snap_site):
+    site, author, out = snap_site
+    res = snapshots.write_site_snapshot(site)
+    assert res["written"] == ["posts", "taxonomy", "authors"]
+
+    manifest = _manifest(out)
+    entry = manifest["artifacts"]["posts"]
+    raw = (out / entry["file"]).read_bytes()
+    assert entry["file"].startswith("posts.") and entry["file"] != "posts.json"
+    assert gzip.decompress((out / entry["gzip"]["file"]).read_bytes()) == raw
+    assert (out / "posts.json").read_bytes() == raw
+    if snapshots.brotli is not None:
+        assert snapshots.brotli.decompress((out / entry["br"]["file"]).read_bytes()) == raw
+
+    posts = json.loads(raw)
+    assert [p["slug"] for p in posts] == ["pub"]
+    taxonomy = json.loads((out / "taxonomy.json").read_text())
+    assert taxonomy[0]["category"] == "Django"
+    assert [a["slug"] for a in json.loads((out / "authors.json").read_text())] == [author.slug]
+
+
+@pytest.mark.django_db
+def test_incremental_regeneration_and_pruning(snap_site):
+    site, author, out = snap_site
+    snapshots.write_site_snapshot(site)
+    first = _manifest(out)["artifacts"]
+
+    assert snapshots.write_site_snapshot(site)["written"] == []
+
+    Post.objects.create(site=site, title="Second", slug="second", content="x", author=author, status="published")
+    res = snapshots.write_site_snapshot(site, ["posts", "authors"])
+    assert res == dict(res, written=["posts"], unchanged=["authors"])
+    second = _manifest(out)["artifacts"]
+    assert second["posts"]["file"] != first["posts"]["file"]
+    assert second["authors"] == first["authors"]
+    # la generazione precedente resta per i client in volo, quella prima ancora no
+    assert (out / first["posts"]["file"]).exists()
+
+    Post.objects.create(site=site, title="Third", slug="third", content="x", author=author, status="published")
+    snapshots.write_site_snapshot(site, ["posts"])
+    assert not (out / first["posts"]["file"]).exists()
+    assert (out / second["posts"]["file"]).exists()
+
+
+@pytest.mark.django_db
+def test_publish_schedules_one_rebuild_per_site(snap_site, settings, monkeypatch, django_capture_on_commit_callbacks):
+    site, author, _out = snap_site
+    settings.BLOG_SNAPSHOTS = True
+    calls = []
+    monkeypatch.setattr(snapshots, "write_site_snapshot", lambda s, artifacts, **kw: calls.append((s.pk, artifacts)))
+    # worker eseguito inline: il thread avrebbe una connessione che non vede la transazione del test
+    monkeypatch.setattr(snapshots, "_spawn", snapshots._drain)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Post.objects.create(site=site, title="Never published", slug="np", content="x", author=author)
+    assert calls == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            for i in range(3):
+                Post.objects.create(site=site, title=f"P{i}", slug=f"p{i}", content="x", author=author, status="published")
+            author.name = "Renamed"
+            author.save()
+    assert calls == [(site.pk, ["posts", "taxonomy", "authors"])]
+
+    # post spostato su un altro sito: si ricostruiscono entrambi
+    with django_capture_on_commit_callbacks(execute=True):
+        other = Site.objects.create(name="Other", domain="https://other.example", repo_path=site.repo_path)
+        other_author = other.authors.create(name="OA", slug="oa")
+    moved = Post.objects.get(slug="p0")
+    moved.site, moved.author = other, other_author
+    calls.clear()
+    with django_capture_on_commit_callbacks(execute=True):
+        moved.save()
+    assert sorted(c[0] for c in calls if "posts" in c[1]) == sorted([site.pk, other.pk])
+
+    # metadati di export salvati dopo il publish: nessuna nuova ricostruzione
+    calls.clear()
+    with django_capture_on_commit_callbacks(execute=True):
+        moved.exported_hash = "abc"
+        moved.save(update_fields=["exported_hash"])
+    assert calls == []
+
+
+@pytest.mark.django_db
+def test_rebuild_runs_off_the_request_and_coalesces(snap_site, settings, monkeypatch, django_capture_on_commit_callbacks):
+    site, author, _out = snap_site
+    settings.BLOG_SNAPSHOTS = True
+    calls, spawned = [], []
+    monkeypatch.setattr(snapshots, "write_site_snapshot", lambda s, artifacts, **kw: calls.append((s.pk, artifacts)))
+    monkeypatch.setattr(snapshots, "_spawn", spawned.append)
+
+    # due commit mentre il worker non ha ancora girato: un solo worker, una sola ricostruzione
+    for i in range(2):
+        with django_capture_on_commit_callbacks(execute=True):
+            Post.objects.create(site=site, title=f"Q{i}", slug=f"q{i}", content="x", author=author, status="published")
+    assert spawned == [site.pk] and calls == []
+    snapshots._drain(site.pk)
+    assert calls == [(site.pk, ["posts", "taxonomy"])]
+    assert site.pk not in snapshots._running
+
+    settings.BLOG_SNAPSHOT_THREAD = False
+    with django_capture_on_commit_callbacks(execute=True):
+        Post.objects.create(site=site, title="Cron", slug="cron", content="x", author=author, status="published")
+    assert spawned == [site.pk]
+
+
+@pytest.mark.django_db
+def test_repo_data_dir_fallback_and_command(snap_site, settings, capsys):
+    site, _author, _out = snap_site
+    settings.BLOG_SNAPSHOT_DIR = ""
+    call_command("build_snapshots", "--site", site.slug)
+    assert "written=posts,taxonomy,authors" in capsys.readouterr().out
+    data_dir = f"{site.repo_path}/_data/blogmanager"
+    assert json.loads(open(f"{data_dir}/manifest.json").read())["site"] == site.slug
+
+    call_command("build_snapshots", "--site", site.slug)
+    assert "written=- unchanged=posts,taxonomy,authors" in capsys.readouterr().out
@@ -0,0 +1,77 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from blog.models import Post, TaxonomyEntry
+
+
+def fm(cats, sub=None):
+    lines = ["---", "title: T", f"categories: [{cats}]"]
+    if sub:
+        lines.append(f"subcluster: {sub}")
+    return "\n".join(lines) + "\n---\nbody\n"
+
+
+def _table(site):
+    return {
+        (e.cluster, e.subcluster): (e.post_count, [t for _pid, t in e.examples])
+        for e in TaxonomyEntry.objects.filter(site=site)
+    }
+
+
+@pytest.mark.django_db
+def test_incremental_save_and_delete(blog_site):
+    site, author = blog_site
+    a = Post.objects.create(site=site, title="A", slug="a", content=fm("django", "forms"), author=author)
+    b = Post.objects.create(site=site, title="B", slug="b", content=fm("django", "forms"), author=author)
+    assert _table(site) == {("django", "forms"): (2, ["A", "B"])}
+
+    # front-matter change moves the post to another entry
+    b.content = fm("django", "views")
+    b.save()
+    assert _table(site) == {("django", "forms"): (1, ["A"]), ("django", "views"): (1, ["B"])}
+
+    # title change refreshes examples
+    a.title = "A2"
+    a.save()
+    assert _table(site)[("django", "forms")] == (1, ["A2"])
+
+    # deleting the last post of an entry drops the entry
+    b.delete()
+    assert _table(site) == {("django", "forms"): (1, ["A2"])}
+
+
+@pytest.mark.django_db
+def test_rebuild_matches_incremental(blog_site):
+    site, author = blog_site
+    Post.objects.create(site=site, title="A", slug="a", content=fm("django", "forms"), author=author)
+    Post.objects.create(site=site, title="B", slug="b", content=fm("python"), author=author)
+    incremental = _table(site)
+
+    TaxonomyEntry.objects.all().delete()
+    call_command("rebuild_taxonomy", "--site", site.slug, "--table-only")
+    assert _table(site) == incremental
+    assert incremental[("python", "(no-subcluster)")] == (1, ["B"])
+
+
+@pytest.mark.django_db
+def test_taxonomy_view_reads_table(blog_site):
+    site, author = blog_site
+    for i in range(5):
+        Post.objects.create(site=site, title=f"P{i}", slug=f"p{i}", content=fm("django", "forms"), author=author)
+
+    client = APIClient()
+    with CaptureQueriesContext(connection) as ctx:
+        r = client.get(f"/api/blog/taxonomy/?site={site.pk}")
+    assert r.status_code == 200
+    # version marker (ETag) + one read of the taxonomy table + one for the site list, whatever the corpus size
+    assert len(ctx.captured_queries) == 3
+    data = r.json()
+    assert data["categories"] == [
+        {"category": "django", "subclusters": [
+            {"name": "forms", "count": 5, "examples": ["P0", "P1", "P2", "P3", "P4"]},
+        ]},
+    ]
+    assert data["sites"][0]["id"] == site.pk
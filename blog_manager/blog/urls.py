@@ -27,9 +27,16 @@ urlpatterns += [
     path('taxonomy/', TaxonomyView.as_view(), name='taxonomy-view'),
 ]
 
-# Site sync endpoints (start run + tail)
-from .views import SiteSyncAPIView, SiteSyncTailAPIView
+# incremental change feed (cursor = change log seq)
+from .views import ChangesView
 urlpatterns += [
+    path('changes/', ChangesView.as_view(), name='changes-feed'),
+]
+
+# Site sync endpoints (start run + tail) and NDJSON export
+from .views import SiteExportNDJSONView, SiteSyncAPIView, SiteSyncTailAPIView
+urlpatterns += [
+    path('sites/<int:pk>/export.ndjson', SiteExportNDJSONView.as_view(), name='site-export-ndjson'),
     path('sites/<int:pk>/sync/', SiteSyncAPIView.as_view(), name='site-sync'),
     path('sites/<int:pk>/sync/tail/', SiteSyncTailAPIView.as_view(), name='site-sync-tail'),
 ]
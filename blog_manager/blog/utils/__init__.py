@@ -1,4 +1,5 @@
 import hashlib
+import json
 from typing import Dict, Any
 import re
 import yaml
@@ -77,11 +78,89 @@ def extract_frontmatter(text: Optional[str]) -> Dict[str, Any]:
 		return {}
 
 
-def create_categories_from_frontmatter(post, fields: Optional[List[str]] = None, hierarchy: str = "slash") -> List:
+def _first_value(value) -> str:
+	if isinstance(value, (list, tuple)):
+		value = next((v for v in value if v), None)
+	return str(value).strip() if value else ""
+
+
+def frontmatter_fields(text: Optional[str]):
+	"""Return (front-matter as JSON-safe dict, cluster_slug, subcluster_slug).
+
+	The cluster is the first of ``categories``/``category`` (or a scalar ``cluster``),
+	the subcluster the first of ``subcluster``/``subclusters``. A legacy
+	``cluster/sub`` category is split. Values are persisted on Post so readers
+	filter on indexed columns instead of parsing YAML.
+	"""
+	fm = extract_frontmatter(text)
+	if not isinstance(fm, dict):
+		fm = {}
+	try:
+		# date/datetime di YAML -> stringhe, così il JSONField accetta il dict
+		fm = json.loads(json.dumps(fm, default=str))
+	except Exception:
+		fm = {}
+
+	cluster = _first_value(fm.get("categories") or fm.get("category"))
+	if not cluster and isinstance(fm.get("cluster"), str):
+		cluster = fm["cluster"].strip()
+	subcluster = _first_value(fm.get("subcluster") or fm.get("subclusters"))
+	if "/" in cluster:
+		cluster, _, legacy_sub = cluster.partition("/")
+		subcluster = subcluster or legacy_sub
+	return fm, slugify(cluster)[:200], slugify(subcluster)[:200]
+
+
+_FM_BLOCK_RE = re.compile(r"^\s*---\s*\n(.*?)\n---\s*(?:\n|$)", flags=re.S)
+
+
+def frontmatter_fingerprint(post) -> str:
+	"""sha256 of site + leading front-matter block ('' when the post has none).
+
+	Only the front-matter drives category derivation, so prose-only edits keep
+	the same fingerprint. Trailing whitespace is ignored.
+	"""
+	txt = getattr(post, "content", None) or getattr(post, "body", "") or ""
+	m = _FM_BLOCK_RE.match(txt)
+	if not m:
+		return ""
+	block = "\n".join(line.rstrip() for line in m.group(1).strip().splitlines())
+	site_id = getattr(post, "site_id", None)
+	return hashlib.sha256(f"{site_id}\n{block}".encode("utf-8")).hexdigest()
+
+
+def frontmatter_changed(post, fingerprint: Optional[str] = None) -> bool:
+	"""True if the front-matter differs from the last derivation stored on the post.
+
+	A save that just re-derived categories marks the instance with
+	``_frontmatter_changed_fp`` so follow-up callers on the same instance
+	(admin save_model, sync_repos) still run once for that change.
+	"""
+	fp = frontmatter_fingerprint(post) if fingerprint is None else fingerprint
+	if getattr(post, "_frontmatter_changed_fp", None) == fp:
+		return True
+	return fp != (getattr(post, "frontmatter_hash", "") or "")
+
+
+def mark_frontmatter_synced(post, fingerprint: str) -> None:
+	"""Store the fingerprint of the front-matter whose categories are now attached."""
+	if not getattr(post, "pk", None) or (getattr(post, "frontmatter_hash", "") or "") == fingerprint:
+		return
+	from ..models import Post
+	Post.objects.filter(pk=post.pk).update(frontmatter_hash=fingerprint)
+	post.frontmatter_hash = fingerprint
+
+
+def create_categories_from_frontmatter(post, fields: Optional[List[str]] = None, hierarchy: str = "slash", force: bool = False) -> List:
 	# import locally to avoid circular import with models
 	from ..models import Category
 	from django.utils.text import slugify
 
+	# front-matter invariato dall'ultima derivazione: niente da fare
+	fingerprint = frontmatter_fingerprint(post)
+	if not force and not frontmatter_changed(post, fingerprint):
+		return []
+
 	if fields is None:
 		fields = ["categories", "cluster"]
 	txt = getattr(post, "content", None) or ""
@@ -239,4 +318,8 @@ def create_categories_from_frontmatter(post, fields: Optional[List[str]] = None,
 			if categories_to_add:
 				post.categories.add(*categories_to_add)  # Add new categories without removing existing ones
 
+	try:
+		mark_frontmatter_synced(post, fingerprint)
+	except Exception:
+		pass
 	return created_objs
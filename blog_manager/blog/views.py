@@ -10,11 +10,10 @@ class Conflict(APIException):
     status_code = HTTPStatus.CONFLICT
     default_detail = "Conflitto: slug già in uso per questo sito."
 from django_filters.rest_framework import DjangoFilterBackend
-import re
-import yaml
-from rest_framework import filters, generics, decorators, permissions, response, status
+from rest_framework import generics, decorators, permissions, response, status
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import AllowAny
+from rest_framework.renderers import JSONRenderer
 from rest_framework.viewsets import ModelViewSet
 import logging
 
@@ -31,7 +30,11 @@ from .serializers import (
     SiteSerializer,
     TagSerializer,
 )
-from api.filters import SafeOrderingFilter
+from api.conditional import conditional_get, global_scope, post_scope, site_detail_scope, site_scope
+from api.filters import FullTextSearchFilter, PostFilter, SafeOrderingFilter
+from api.pagination import PostPagination
+from api.renderers import NDJSONRenderer
+from api.response_cache import cached_read
 from .github_client import GitHubClient
 
 
@@ -69,115 +72,95 @@ class CategoryListView(generics.ListAPIView):
         return Category.objects.all()
 
 
+@conditional_get(get=global_scope)
 class TaxonomyView(generics.GenericAPIView):
     """Return a grouped taxonomy (category -> subclusters -> examples) for a site.
 
+    Reads the materialized TaxonomyEntry table (kept up to date by the Post
+    signals, rebuilt with `manage.py rebuild_taxonomy`): no post is loaded.
+
     Query params:
       - site: site id (optional). If provided, taxonomy is built for that site only.
     """
     permission_classes = [AllowAny]
 
     def get(self, request, *args, **kwargs):
-        site = request.query_params.get('site')
-        from collections import defaultdict
-
-        fm_re = re.compile(r'^\s*---\s*\n([\s\S]*?)\n---\s*\n', re.M)
-        categories_map = defaultdict(lambda: defaultdict(set))
+        from .services.taxonomy import NO_SUBCLUSTER, taxonomy_for_site
 
-        posts_qs = Post.objects.all()
+        site = request.query_params.get('site')
+        site_id = None
         if site:
             try:
                 site_id = int(site)
-                posts_qs = posts_qs.filter(site_id=site_id)
             except Exception:
                 pass
 
-        for p in posts_qs:
-            raw = p.content or getattr(p, 'body', '') or ''
-            m = fm_re.search(raw)
-            fm = None
-            if m:
-                txt = m.group(1)
-                try:
-                    fm = yaml.safe_load(txt) or {}
-                except Exception:
-                    fm = None
-
-            category_vals = []
-            sub_vals = []
-            # parse fm if present: prefer `categories` as primary key
-            if fm and isinstance(fm, dict):
-                c = fm.get('categories') or fm.get('category')
-                if c:
-                    if isinstance(c, list):
-                        category_vals.extend([str(x).strip() for x in c if x])
-                    else:
-                        category_vals.append(str(c).strip())
-                s = fm.get('subcluster') or fm.get('subclusters')
-                if s:
-                    if isinstance(s, list):
-                        sub_vals.extend([str(x).strip() for x in s if x])
-                    else:
-                        sub_vals.append(str(s).strip())
-
-            # fallback: inspect post.categories M2M
-            if not category_vals:
-                try:
-                    for cat in p.categories.all():
-                        name = cat.name or ''
-                        if '/' in name:
-                            category_vals.append(name.split('/')[0].strip())
-                        else:
-                            category_vals.append(name.strip())
-                except Exception:
-                    pass
-
-            if not category_vals and not sub_vals:
-                continue
-
-            if not category_vals:
-                category_vals = ['(no-category)']
-            if not sub_vals:
-                sub_vals = ['(no-subcluster)']
-
-            for cat_name in category_vals:
-                for su in sub_vals:
-                    categories_map[cat_name][su].add(p.title or f'post-{p.pk}')
+        resp = taxonomy_for_site(site_id)
 
         # also include categories from Category model if no posts-derived categories
-        if not categories_map:
+        if not resp:
             qs = Category.objects.all()
-            if site:
-                try:
-                    qs = qs.filter(site_id=int(site))
-                except Exception:
-                    pass
-            for c in qs:
-                parts = (c.name or '').split('/')
-                if not parts:
-                    continue
+            if site_id is not None:
+                qs = qs.filter(site_id=site_id)
+            grouped = {}
+            for name in qs.values_list('name', flat=True):
+                parts = (name or '').split('/')
                 catn = parts[0].strip()
-                sub = '/'.join(parts[1:]).strip() if len(parts) > 1 else '(no-subcluster)'
-                categories_map[catn][sub].add(c.name)
-
-        # format response
-        resp = []
-        for catn, subs in sorted(categories_map.items(), key=lambda x: x[0]):
-            subs_out = []
-            for su, items in sorted(subs.items(), key=lambda x: x[0]):
-                subs_out.append({'name': su, 'count': len(items), 'examples': list(items)[:5]})
-            resp.append({'category': catn, 'subclusters': subs_out})
+                sub = '/'.join(parts[1:]).strip() if len(parts) > 1 else NO_SUBCLUSTER
+                grouped.setdefault(catn, {}).setdefault(sub, set()).add(name)
+            for catn, subs in sorted(grouped.items()):
+                resp.append({'category': catn, 'subclusters': [
+                    {'name': su, 'count': len(items), 'examples': sorted(items)[:5]}
+                    for su, items in sorted(subs.items())
+                ]})
 
         # include available sites so the client can present site choices
         try:
-            sites_qs = Site.objects.all()
-            sites_ser = SiteSerializer(sites_qs, many=True, context={'request': request}).data
+            sites_ser = list(Site.objects.order_by('id').values(*SiteSerializer.Meta.fields))
         except Exception:
             sites_ser = []
 
         return response.Response({'site': site or None, 'categories': resp, 'sites': sites_ser})
 
 
+class ChangesView(generics.GenericAPIView):
+    """Incremental change feed over the append-only change log (blog.services.changes).
+
+    Query params:
+      - since: cursor returned by the previous call. Without it the response is
+        empty and carries the current cursor (start syncing from "now").
+      - site: site id (optional), limit: page size (optional, max 1000).
+
+    Returns {changes: [{seq, kind, op, id, at, data}], cursor, has_more}; deletes
+    come as op="delete" tombstones. A cursor older than the compacted log gets
+    410 with reset=true: reload the full listings and start over.
+    """
+    permission_classes = [AllowAny]
+    pagination_class = None
+
+    def get(self, request, *args, **kwargs):
+        from .services.changes import CursorExpired, changes_since, latest_cursor
+
+        params = request.query_params
+        since = params.get('since')
+        if since in (None, ''):
+            return response.Response({'changes': [], 'cursor': str(latest_cursor()), 'has_more': False})
+        try:
+            since = int(since)
+            site_id = int(params['site']) if params.get('site') else None
+            limit = int(params['limit']) if params.get('limit') else None
+        except ValueError:
+            return response.Response({'detail': 'since, site and limit must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            return response.Response(changes_since(since, limit=limit, site_id=site_id))
+        except CursorExpired as e:
+            return response.Response(
+                {'detail': 'Cursor expired: the change log was compacted.', 'floor': str(e.floor), 'reset': True},
+                status=status.HTTP_410_GONE,
+            )
+
+
 # AUTHORS
 class AuthorListView(generics.ListAPIView):
     serializer_class = AuthorSerializer
@@ -195,8 +178,8 @@ class PostListView(generics.ListAPIView):
     serializer_class = PostSerializer
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
-        filters.OrderingFilter,
+        FullTextSearchFilter,
+        SafeOrderingFilter,
     ]
     filterset_fields = ["site", "is_published", "categories__slug"]
     search_fields = ["title", "slug", "content"]
@@ -261,6 +244,7 @@ class TagViewSet(ModelViewSet):
     serializer_class = TagSerializer
 
 
+@conditional_get(list=global_scope, retrieve=site_detail_scope)
 class SiteViewSet(ModelViewSet):
     queryset = Site.objects.all()
     serializer_class = SiteSerializer
@@ -272,6 +256,7 @@ class SiteViewSet(ModelViewSet):
         return super().get_permissions()
 
 
+@conditional_get(list=site_scope)
 class CategoryViewSet(ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -298,14 +283,39 @@ class AuthorViewSet(ModelViewSet):
         return super().get_permissions()
 
 
+@conditional_get(list=site_scope, retrieve=post_scope)
+@cached_read("list", "retrieve")
 class PostViewSet(ModelViewSet):
+    def _compact_list(self):
+        # liste compatte salvo ?include=content (client che leggono il front-matter dal markdown)
+        include = self.request.query_params.get("include", "") if self.request else ""
+        return self.action == "list" and "content" not in include.split(",")
+
     def get_serializer_class(self):
         if self.action in ("create", "update", "partial_update"):
             from .serializers import PostWriteSerializer
             return PostWriteSerializer
+        if self._compact_list():
+            from .serializers import PostListSerializer
+            return PostListSerializer
         from .serializers import PostSerializer
         return PostSerializer
 
+    def get_queryset(self):
+        from django.db.models import Prefetch
+        from django.db.models.functions import Substr
+        from .serializers import EXCERPT_SOURCE_CHARS
+
+        qs = super().get_queryset()
+        if self._compact_list():
+            # niente markdown completo: solo il prefisso per l'estratto, categorie come soli id
+            return qs.defer("content").annotate(
+                content_head=Substr("content", 1, EXCERPT_SOURCE_CHARS)
+            ).prefetch_related(Prefetch("categories", queryset=Category.objects.only("id")))
+        if self.action in ("list", "retrieve"):
+            return qs.prefetch_related("categories", "images", "comments")
+        return qs
+
     def create(self, request, *args, **kwargs):
         try:
             return super().create(request, *args, **kwargs)
@@ -318,14 +328,9 @@ class PostViewSet(ModelViewSet):
             logger.exception('Unhandled exception during PostViewSet.create')
             return response.Response({'detail': 'Internal server error', 'error': str(exc)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def _unique_slug_for_site(self, *, site_id: int, base_slug: str) -> str:
-        slug = base_slug
-        i = 2
-        from .models import Post
-        while Post.objects.filter(site_id=site_id, slug=slug).exists():
-            slug = f"{base_slug}-{i}"
-            i += 1
-        return slug
+    def _unique_slug_for_site(self, *, site_id: int, base_slug: str, exclude_pk=None) -> str:
+        from blog.services.slugs import allocate_slug
+        return allocate_slug(site_id, base_slug, exclude_pk=exclude_pk)
 
     def perform_create(self, serializer):
         # Normalizza slug e gestisci conflitti
@@ -335,13 +340,13 @@ class PostViewSet(ModelViewSet):
         desired_slug = serializer.validated_data.get("slug") or slugify(title)
         auto_slug = (desired_slug == slugify(title))
 
-        from .models import Post
-        if Post.objects.filter(site_id=site_id, slug=desired_slug).exists():
-            if auto_slug:
-                desired_slug = self._unique_slug_for_site(site_id=site_id, base_slug=desired_slug)
-            else:
+        # una sola query: lo slug stesso se libero, altrimenti il primo suffisso disponibile
+        free_slug = self._unique_slug_for_site(site_id=site_id, base_slug=desired_slug)
+        if free_slug != desired_slug:
+            if not auto_slug:
                 # Slug esplicito occupato => 409
                 raise Conflict()
+            desired_slug = free_slug
 
         serializer.validated_data["slug"] = desired_slug
         obj = serializer.save()
@@ -360,13 +365,11 @@ class PostViewSet(ModelViewSet):
             desired_slug = data.get("slug") or slugify(title)
             auto_slug = (desired_slug == slugify(title))
 
-            from .models import Post
-            conflict = Post.objects.filter(site_id=site_id, slug=desired_slug).exclude(pk=prev.pk).exists()
-            if conflict:
-                if auto_slug:
-                    desired_slug = self._unique_slug_for_site(site_id=site_id, base_slug=desired_slug)
-                else:
+            free_slug = self._unique_slug_for_site(site_id=site_id, base_slug=desired_slug, exclude_pk=prev.pk)
+            if free_slug != desired_slug:
+                if not auto_slug:
                     raise Conflict()
+                desired_slug = free_slug
             serializer.validated_data["slug"] = desired_slug
 
         obj = serializer.save()
@@ -379,13 +382,13 @@ class PostViewSet(ModelViewSet):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [IsPublisherForWriteOrReadOnly]
-    from api.filters import SafeOrderingFilter
     filter_backends = [
         DjangoFilterBackend,
-        filters.SearchFilter,
+        FullTextSearchFilter,
         SafeOrderingFilter,
     ]
-    filterset_fields = ["site", "status"]
+    filterset_class = PostFilter
+    pagination_class = PostPagination
     search_fields = ["title", "slug", "content"]
     ordering_fields = ["published_at", "title", "id"]
     ordering = ["-published_at", "-id"]
@@ -487,6 +490,9 @@ class PostViewSet(ModelViewSet):
                 post.id, preview_url
             )
             
+            # Unchanged content: nothing was committed
+            if result.get('unchanged'):
+                return response.Response(result, status=status.HTTP_200_OK)
             return response.Response(result, status=status.HTTP_201_CREATED)
             
         except FrontMatterValidationError as e:
@@ -517,6 +523,72 @@ class PostViewSet(ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @decorators.action(detail=True, methods=["get"], url_path="preview/local", permission_classes=[permissions.IsAuthenticated])
+    def preview_local(self, request, pk=None):
+        """
+        Render the post preview locally (no GitHub commit, no Pages build).
+        
+        GET /api/posts/{id}/preview/local/
+        
+        Returns:
+        {
+            "post_id": 1,
+            "title": "...",
+            "front_matter": {...},
+            "html": "<h1>...</h1>",
+            "content_hash": "sha256 of the preview markdown",
+            "cached": true | false
+        }
+        """
+        from .preview import render_local_preview
+        from .exporter import FrontMatterValidationError
+        
+        post = self.get_object()
+        try:
+            result = render_local_preview(post)
+        except FrontMatterValidationError as e:
+            logger.warning(
+                "[preview.local] Validation failed for post_id=%s: %s",
+                post.id, str(e)
+            )
+            return response.Response(
+                {'detail': f'Validation error: {str(e)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return response.Response(result, status=status.HTTP_200_OK)
+
+    @decorators.action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """Create/update up to BLOG_BULK_MAX_ITEMS posts in one request.
+
+        Body: a list of PostWriteSerializer payloads (or {"items": [...]});
+        items with an "id" are partial updates. Returns per-item results:
+        200 when every item was written, 207 with some errors, 400 when none.
+        """
+        from .services.bulk import bulk_upsert_posts, max_items
+
+        items = request.data.get("items") if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return response.Response(
+                {"detail": "Expected a non-empty list of posts (or {\"items\": [...]})."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        limit = max_items()
+        if len(items) > limit:
+            return response.Response(
+                {"detail": f"Too many items: {len(items)} (max {limit})."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        result = bulk_upsert_posts(items)
+        if not result["errors"]:
+            code = status.HTTP_200_OK
+        elif result["created"] or result["updated"]:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return response.Response(result, status=code)
+
     def get_permissions(self):
         # lettura per tutti, scrittura con permission custom
         if self.action in ["list", "retrieve"]:
@@ -634,3 +706,41 @@ class SiteSyncTailAPIView(generics.GenericAPIView):
 
 
 
+
+
+class SiteExportNDJSONView(generics.GenericAPIView):
+    """Stream every post of a site as NDJSON (blog.services.ndjson).
+
+    GET /api/blog/sites/<pk>/export.ndjson[?after=<id>][&gzip=1]
+
+    One JSON object per line, in id order, with author, categories and tags;
+    the last line is {"end": true, "count": n, "last_id": id}. A download cut
+    short (no trailer) resumes with ?after=<id of the last complete line>.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [NDJSONRenderer, JSONRenderer]
+    pagination_class = None
+
+    def get(self, request, pk=None):
+        from django.http import StreamingHttpResponse
+        from .services.ndjson import gzip_stream, iter_site_ndjson
+
+        try:
+            site = Site.objects.get(pk=pk)
+        except Site.DoesNotExist:
+            return response.Response({'detail': 'Site not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            after = int(request.query_params.get('after') or 0)
+        except ValueError:
+            return response.Response({'detail': 'after must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        stream = iter_site_ndjson(site, after=after)
+        filename = f'{site.slug}.ndjson'
+        if str(request.query_params.get('gzip', '')).lower() in ('1', 'true', 'yes'):
+            resp = StreamingHttpResponse(gzip_stream(stream), content_type='application/gzip')
+            filename += '.gz'
+        else:
+            resp = StreamingHttpResponse(stream, content_type='application/x-ndjson; charset=utf-8')
+        resp['Content-Disposition'] = f'attachment; filename="{filename}"'
+        resp['Cache-Control'] = 'no-store'
+        return resp
@@ -190,6 +190,25 @@ DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
 
+# Cache delle risposte GET anonime dei post (api.response_cache), invalidata dal
+# marker di versione del sito. 'locmem' (dev, per-processo), 'file' o 'db' (multi-processo,
+# 'db' richiede `manage.py createcachetable`), 'off'.
+BLOG_RESPONSE_CACHE = env.str("BLOG_RESPONSE_CACHE", default="locmem")
+BLOG_RESPONSE_CACHE_TTL = env.int("BLOG_RESPONSE_CACHE_TTL", default=600)
+_RESPONSE_CACHE_BACKENDS = {
+    "locmem": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "blog-responses"},
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": env.str("BLOG_RESPONSE_CACHE_DIR", default=str(BASE_DIR / ".cache" / "responses")),
+    },
+    "db": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "blog_response_cache"},
+    "off": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+}
+CACHES["blog_responses"] = dict(
+    _RESPONSE_CACHE_BACKENDS.get(BLOG_RESPONSE_CACHE, _RESPONSE_CACHE_BACKENDS["locmem"]),
+    TIMEOUT=BLOG_RESPONSE_CACHE_TTL,
+)
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
@@ -246,6 +265,44 @@ BLOG_REPO_BASE = env("BLOG_REPO_BASE", default="")
 # Allow dangerous repo deletes from admin UI. Default False for safety.
 ALLOW_REPO_DELETE = env.bool("ALLOW_REPO_DELETE", default=False)
 
+# Full-text search backend for the posts API `?search=` (blog.services.search):
+# 'auto' (FTS5 on SQLite, FULLTEXT on MySQL, LIKE fallback), 'fts5', 'mysql' or 'basic'
+BLOG_SEARCH_BACKEND = env.str("BLOG_SEARCH_BACKEND", default="auto")
+
+# Totale delle liste post non filtrate (blog.services.counts): cache TTL in secondi e,
+# su MySQL, soglia oltre la quale si usa la stima di information_schema invece di COUNT(*)
+BLOG_POST_COUNT_TTL = env.int("BLOG_POST_COUNT_TTL", default=300)
+BLOG_POST_COUNT_ESTIMATE_ABOVE = env.int("BLOG_POST_COUNT_ESTIMATE_ABOVE", default=100_000)
+
+# Numero massimo di post per richiesta a POST /api/blog/posts/bulk/ (blog.services.bulk)
+BLOG_BULK_MAX_ITEMS = env.int("BLOG_BULK_MAX_ITEMS", default=200)
+
+# Snapshot JSON statici per sito (blog.services.snapshots): posts/taxonomy/authors.json
+# con nomi content-hashed, varianti .gz/.br (br se installato `brotli`) e manifest.json.
+# Directory: BLOG_SNAPSHOT_DIR/<slug>/ oppure, se vuota, <repo>/_data/blogmanager/
+BLOG_SNAPSHOTS = env.bool("BLOG_SNAPSHOTS", default=False)
+BLOG_SNAPSHOT_DIR = env.str("BLOG_SNAPSHOT_DIR", default="")
+# rigenerazione dopo il commit in un thread per sito, mai nella request; False: solo
+# `manage.py build_snapshots` (es. da cron)
+BLOG_SNAPSHOT_THREAD = env.bool("BLOG_SNAPSHOT_THREAD", default=True)
+
+# Change log /api/blog/changes/ (blog.services.changes): pagina di default, ritardo
+# (s) prima di servire le righe più recenti, giorni di conservazione dei tombstone
+BLOG_CHANGES_PAGE_SIZE = env.int("BLOG_CHANGES_PAGE_SIZE", default=500)
+BLOG_CHANGES_SETTLE_SECONDS = env.int("BLOG_CHANGES_SETTLE_SECONDS", default=2)
+BLOG_CHANGES_TOMBSTONE_DAYS = env.int("BLOG_CHANGES_TOMBSTONE_DAYS", default=30)
+
+# Schema OpenAPI precalcolato (api.schema): directory dell'artefatto scritto da
+# `manage.py build_schema` al deploy (vuota = <BASE_DIR>/var/openapi)
+BLOG_SCHEMA_DIR = env.str("BLOG_SCHEMA_DIR", default="")
+
+# Provisioning della working copy dei siti (blog.services.provisioning), mai nella request:
+# thread dopo il commit, oppure (False) solo `manage.py provision_sites` da cron/worker
+BLOG_PROVISION_THREAD = env.bool("BLOG_PROVISION_THREAD", default=True)
+# opzioni di `git clone`: partial clone del solo branch di default (es. "--depth=1" per shallow)
+BLOG_PROVISION_CLONE_ARGS = env.list("BLOG_PROVISION_CLONE_ARGS", default=["--filter=blob:none", "--single-branch"])
+BLOG_PROVISION_TIMEOUT = env.int("BLOG_PROVISION_TIMEOUT", default=600)
+
 # ===== Preview Configuration =====
 # Feature flag to enable/disable preview functionality
 # Each site uses its own Jekyll repository (Site.repo_owner/repo_name)
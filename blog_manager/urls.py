@@ -22,11 +22,12 @@ from django.views.generic import RedirectView
 from django.conf import settings
 from rest_framework.routers import DefaultRouter
 from drf_spectacular.views import (
-    SpectacularAPIView,
     SpectacularRedocView,
     SpectacularSwaggerView,
 )
 
+from api.schema import CachedSchemaView
+
 from django.http import JsonResponse
 
 from blog.views import PostViewSet, SiteViewSet
@@ -50,8 +51,8 @@ urlpatterns = [
     # Expose /api/sites/ (list/create) and /api/sites/<id>/ via DRF router
     path("api/", include((router.urls, "api"), namespace="api")),
     path("api/health/", lambda r: JsonResponse({"ok": True}, status=200)),
-    # OpenAPI schema + docs (only enabled in DEBUG by default)
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
+    # OpenAPI schema (precomputed, see api.schema / build_schema) + docs
+    path("api/schema/", CachedSchemaView.as_view(), name="schema"),
     path(
         "api/docs/swagger/",
         SpectacularSwaggerView.as_view(url_name="schema"),
@@ -178,13 +178,9 @@ class PostViewSet(ModelViewSet):
             return PostWriteSerializer
         return PostSerializer
 
-    def _unique_slug_for_site(self, *, site_id: int, base_slug: str) -> str:
-        slug = base_slug
-        i = 2
-        while Post.objects.filter(site_id=site_id, slug=slug).exists():
-            slug = f"{base_slug}-{i}"
-            i += 1
-        return slug
+    def _unique_slug_for_site(self, *, site_id: int, base_slug: str, exclude_pk=None) -> str:
+        from blog.services.slugs import allocate_slug
+        return allocate_slug(site_id, base_slug, exclude_pk=exclude_pk)
 
     def perform_create(self, serializer):
         site_obj_or_id = serializer.validated_data.get("site")
@@ -192,11 +188,11 @@ class PostViewSet(ModelViewSet):
         title = serializer.validated_data.get("title") or ""
         desired_slug = serializer.validated_data.get("slug") or slugify(title)
         auto_slug = desired_slug == slugify(title)
-        if Post.objects.filter(site_id=site_id, slug=desired_slug).exists():
-            if auto_slug:
-                desired_slug = self._unique_slug_for_site(site_id=site_id, base_slug=desired_slug)
-            else:
+        free_slug = self._unique_slug_for_site(site_id=site_id, base_slug=desired_slug)
+        if free_slug != desired_slug:
+            if not auto_slug:
                 raise Conflict()
+            desired_slug = free_slug
         serializer.validated_data["slug"] = desired_slug
         obj = serializer.save()
         if getattr(obj, "status", None) == "published" and not getattr(obj, "published_at", None):
@@ -211,12 +207,11 @@ class PostViewSet(ModelViewSet):
         title = data.get("title", prev.title)
         desired_slug = data.get("slug", prev.slug) or slugify(title)
         auto_slug = desired_slug == slugify(title)
-        conflict = Post.objects.filter(site_id=site_id, slug=desired_slug).exclude(pk=prev.pk).exists()
-        if conflict:
-            if auto_slug:
-                desired_slug = self._unique_slug_for_site(site_id=site_id, base_slug=desired_slug)
-            else:
+        free_slug = self._unique_slug_for_site(site_id=site_id, base_slug=desired_slug, exclude_pk=prev.pk)
+        if free_slug != desired_slug:
+            if not auto_slug:
                 raise Conflict()
+            desired_slug = free_slug
         serializer.validated_data["slug"] = desired_slug
         obj = serializer.save()
         if getattr(obj, "status", None) == "published" and not getattr(obj, "published_at", None):
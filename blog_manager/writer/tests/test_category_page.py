@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog.models import Category, Post, Site
+
+
+@override_settings(EXPORT_ENABLED=False)
+class CategoryPageQueryCountTest(TestCase):
+    def setUp(self):
+        self.site = Site.objects.create(name="WSite", domain="https://writer.example")
+        self.author = self.site.authors.create(name="WA", slug="wa")
+        self.cat = Category.objects.create(site=self.site, name="Dj", slug="dj", cluster_slug="dj")
+        self.n = 0
+        user = get_user_model().objects.create_user("writer", password="x")
+        self.client.force_login(user)
+
+    def _add_subcluster(self, posts=3):
+        i = Category.objects.filter(site=self.site, name__startswith="Dj/").count()
+        sub = Category.objects.create(
+            site=self.site, name=f"Dj/sub{i}", slug=f"dj-sub{i}", cluster_slug="dj", subcluster_slug=f"sub{i}",
+        )
+        for _ in range(posts):
+            self.n += 1
+            p = Post.objects.create(site=self.site, title=f"P{self.n}", slug=f"p{self.n}", content="body", author=self.author)
+            p.categories.add(self.cat, sub)
+        return sub
+
+    def _render(self, **params):
+        url = reverse("writer:category_page", args=[self.cat.pk])
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, params)
+        self.assertEqual(resp.status_code, 200)
+        return resp, len(ctx.captured_queries)
+
+    def test_query_count_independent_of_subclusters(self):
+        self._add_subcluster()
+        self._add_subcluster()
+        _resp, small = self._render()
+
+        for _ in range(8):
+            self._add_subcluster()
+        resp, large = self._render()
+
+        self.assertEqual(small, large)
+        self.assertEqual(resp.context["total_grouped_count"], 30)
+        self.assertEqual([s.num_posts for s in resp.context["subcategories"]], [3] * 10)
+
+    def test_groups_are_paginated(self):
+        sub = self._add_subcluster(posts=25)
+        parent_only = Post.objects.create(site=self.site, title="Parent", slug="parent", content="body", author=self.author)
+        parent_only.categories.add(self.cat)
+
+        resp, _ = self._render(**{f"page_{sub.pk}": 2})
+        (_s, page, short), = resp.context["grouped_posts"]
+        self.assertEqual(short, "sub0")
+        self.assertEqual(page.number, 2)
+        self.assertEqual(len(page.object_list), 5)
+        self.assertEqual([p.pk for p in resp.context["posts"]], [parent_only.pk])
+
+    def test_subcluster_fallback_stays_in_the_parent_cluster(self):
+        forms = Category.objects.create(
+            site=self.site, name="Dj/forms", slug="dj-forms", cluster_slug="dj", subcluster_slug="forms",
+        )
+        # nessun legame M2M: la pagina usa le colonne/il front-matter persistiti
+        first, listed, legacy, other = Post.objects.bulk_create([
+            Post(site=self.site, author=self.author, title=title, slug=slug, content="body",
+                 cluster_slug=cluster, subcluster_slug=subcluster, frontmatter=fm)
+            for title, slug, cluster, subcluster, fm in [
+                ("First", "first", "dj", "forms", {"categories": ["Dj"], "subcluster": "forms"}),
+                ("Listed", "listed", "dj", "orm", {"categories": ["Dj"], "subclusters": ["orm", "forms"]}),
+                ("Legacy", "legacy", "dj", "auth", {"categories": ["Dj/auth", "Dj/forms"]}),
+                ("Other", "other", "py", "forms", {"categories": ["Py"], "subcluster": "forms"}),
+            ]
+        ])
+        url = reverse("writer:subcluster_page", args=[self.cat.pk, forms.pk])
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual({p.pk for p in resp.context["posts"]}, {first.pk, listed.pk, legacy.pk})
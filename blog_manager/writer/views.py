@@ -8,8 +8,10 @@ from django.urls import reverse_lazy
 from blog.models import Post
 from blog.services.publish import publish_post
 from blog.models import Category
-from django.db.models import Q
-from blog.utils import extract_frontmatter
+from django.db.models import Count, F, Q
+from django.core.paginator import Paginator
+from collections import defaultdict
+from django.utils.text import slugify
 import re
 
 
@@ -65,27 +67,42 @@ def taxonomy(request):
     return render(request, "writer/taxonomy.html", { 'sites': sites })
 
 
+CATEGORY_PAGE_SIZE = 20
+
+
 @login_required
 def category_page(request, cat_id: int):
     cat = get_object_or_404(Category, pk=cat_id)
-    # subcategories are categories with name like 'CategoryName/Sub'
+    # subcategories are categories with name like 'CategoryName/Sub'; post counts come from one annotated query
     prefix = cat.name + '/'
-    subcats = Category.objects.filter(site=cat.site, name__startswith=prefix).order_by('name')
-    # Build grouped posts per subcategory and parent-only posts
-    posts_in_subcats = Post.objects.filter(categories__in=subcats).distinct()
+    subcats = list(
+        Category.objects.filter(site=cat.site, name__startswith=prefix)
+        .annotate(num_posts=Count('posts', distinct=True))
+        .order_by('name')
+    )
+    # All posts of the category and its subcategories fetched once: one row per (post, category)
+    by_cat = defaultdict(list)
+    rows = (
+        Post.objects.filter(categories__in=[cat.pk] + [s.pk for s in subcats])
+        .annotate(category_id=F('categories'))
+        .only('id', 'title', 'slug', 'published_at')
+        .order_by('-published_at', '-id')
+    )
+    for p in rows:
+        by_cat[p.category_id].append(p)
+
+    in_subcats = set()
     grouped = []
     for s in subcats:
-        qs = posts_in_subcats.filter(categories=s).distinct().order_by('-published_at')
+        posts = by_cat.get(s.pk, [])
+        in_subcats.update(p.pk for p in posts)
         # compute short label for display (part after the first slash)
-        if '/' in s.name:
-            short = s.name.split('/', 1)[1]
-        else:
-            short = s.name
-        grouped.append((s, qs, short))
-
-    parent_posts = Post.objects.filter(categories=cat).distinct().exclude(pk__in=posts_in_subcats).order_by('-published_at')
+        short = s.name.split('/', 1)[1] if '/' in s.name else s.name
+        page = Paginator(posts, CATEGORY_PAGE_SIZE).get_page(request.GET.get(f'page_{s.pk}'))
+        grouped.append((s, page, short))
 
-    total_grouped_count = sum(qs.count() for (_s, qs, _short) in grouped)
+    parent_posts = [p for p in by_cat.get(cat.pk, []) if p.pk not in in_subcats]
+    total_grouped_count = sum(s.num_posts for s in subcats)
 
     return render(request, 'writer/category_listing.html', {
         'category': cat,
@@ -95,10 +112,29 @@ def category_page(request, cat_id: int):
         'total_grouped_count': total_grouped_count,
         # Template expects `posts` for listing; provide parent-only posts here so
         # parent category page shows posts that don't belong to any subcluster.
-        'posts': parent_posts,
+        'posts': Paginator(parent_posts, CATEGORY_PAGE_SIZE).get_page(request.GET.get('page')),
     })
 
 
+def _frontmatter_subclusters(fm, cluster):
+    """Slugs of every subcluster a persisted front-matter dict lists under `cluster`."""
+    if not isinstance(fm, dict):
+        return set()
+    found = set()
+    for key in ('subcluster', 'subclusters'):
+        values = fm.get(key)
+        for value in values if isinstance(values, (list, tuple)) else [values]:
+            if value:
+                found.add(slugify(str(value)))
+    # categorie legacy "cluster/sub"
+    cats = fm.get('categories') or fm.get('category')
+    for value in cats if isinstance(cats, (list, tuple)) else [cats]:
+        head, sep, tail = str(value or '').partition('/')
+        if sep and slugify(head) == cluster and tail:
+            found.add(slugify(tail))
+    return found
+
+
 @login_required
 def subcluster_page(request, cat_id: int, sub_id: int):
     # cat_id is parent category id, sub_id is the subcategory id
@@ -106,75 +142,20 @@ def subcluster_page(request, cat_id: int, sub_id: int):
     sub = get_object_or_404(Category, pk=sub_id, site=parent.site)
     # posts in this subcategory
     posts_qs = Post.objects.filter(categories=sub).order_by('-published_at')
-    # If no posts found via M2M, try to find posts that reference this subcluster in front-matter
-    posts_pks = list(posts_qs.values_list('pk', flat=True))
-    if not posts_pks:
-        extra_pks = []
-        # scan posts in same site and check front-matter for matching category/subcategory
-        candidates = Post.objects.filter(site=parent.site).exclude(pk__in=posts_pks)
+    # If no posts found via M2M, match the persisted front-matter columns (indexed, no YAML parsing)
+    if not posts_qs.exists():
         # `sub.name` is stored as 'Parent/Sub'; extract the sub part for matching
-        if '/' in sub.name:
-            sub_part = sub.name.split('/', 1)[1]
-        else:
-            sub_part = sub.name
-        target_full = sub.name  # full stored name
-        target_sub = sub_part  # short subcluster name
-        for p in candidates:
-            try:
-                fm = extract_frontmatter(getattr(p, 'content', '') or '')
-            except Exception:
-                fm = {}
-            matched = False
-            # Strict matching: only consider posts that explicitly reference the subcluster
-            #  - categories front-matter contains the full 'Parent/Sub' (target_full)
-            #  - OR front-matter has a 'subcluster'/'subclusters' that contains target_sub (or target_full)
-            #  - OR cluster mapping includes the sub under the given cluster (clu -> subs)
-            cats = fm.get('categories') if isinstance(fm, dict) else None
-            if cats:
-                if isinstance(cats, (list, tuple)):
-                    for c in cats:
-                        if not c:
-                            continue
-                        if str(c).strip() == target_full:
-                            matched = True
-                            break
-                else:
-                    if str(cats).strip() == target_full:
-                        matched = True
-
-            if not matched:
-                sub_val = fm.get('subcluster') if isinstance(fm, dict) else None
-                if sub_val:
-                    if isinstance(sub_val, (list, tuple)):
-                        for s in sub_val:
-                            if s and (str(s).strip() == target_sub or str(s).strip() == target_full):
-                                matched = True
-                                break
-                    else:
-                        if str(sub_val).strip() in (target_sub, target_full):
-                            matched = True
-
-            if not matched:
-                cluster_val = fm.get('cluster') if isinstance(fm, dict) else None
-                if isinstance(cluster_val, dict):
-                    for clu, subs in cluster_val.items():
-                        if isinstance(subs, (list, tuple)):
-                            for s in subs:
-                                if s and (f"{str(clu).strip()}/{s}" == target_full or str(s).strip() == target_sub):
-                                    matched = True
-                                    break
-                            if matched:
-                                break
-                        elif subs and (f"{str(clu).strip()}/{subs}" == target_full or str(subs).strip() == target_sub):
-                            matched = True
-                            break
-
-            if matched:
-                extra_pks.append(p.pk)
-        if extra_pks:
-            posts_qs = Post.objects.filter(pk__in=extra_pks).order_by('-published_at')
-        else:
-            posts_qs = posts_qs
+        sub_part = sub.name.split('/', 1)[1] if '/' in sub.name else sub.name
+        target_sub = sub.subcluster_slug or slugify(sub_part)
+        target_cluster = parent.cluster_slug or slugify(parent.name.split('/', 1)[0])
+        if target_sub and target_cluster:
+            in_cluster = Post.objects.filter(site=parent.site, cluster_slug=target_cluster)
+            # la colonna tiene solo il primo subcluster: gli altri restano nel front-matter persistito
+            others = [
+                pk for pk, fm in in_cluster.exclude(subcluster_slug=target_sub).values_list('pk', 'frontmatter')
+                if target_sub in _frontmatter_subclusters(fm, target_cluster)
+            ]
+            posts_qs = in_cluster.filter(Q(subcluster_slug=target_sub) | Q(pk__in=others)).order_by('-published_at')
     posts = posts_qs
     # siblings (other subcategories in same parent)
     prefix = parent.name + '/'